@@ -1,35 +1,51 @@
 import os
+from importlib import import_module
 from flask import Flask
 from flask_cors import CORS
 from app.extensions import db, migrate
-from app.config.config import Config
-from app.scheduler import check_goals_on_startup
+from app.config.config import CONFIGS
+from app.services import notification_service, tracking_service, user_service
+from app.services.metrics_service import request_profiler
 
-def create_app(config_class=Config):
+# (module in app.routes, URL prefix); modules are imported by create_app, not on `import app`
+BLUEPRINTS = [
+    ('auth', '/api/auth'),
+    ('user', '/api/user'),
+    ('tracking', '/api/tracking'),
+    ('goals', '/api/goals'),
+    ('achievements', '/api/achievements'),
+    ('chat', '/api/chat'),
+    ('content', '/api/content'),
+    ('notifications', '/api/notifications'),
+    ('metrics', '/api/metrics')
+]
+
+def create_app(config_class=None):
+    """
+    Build the app without touching the database. Seeding and due-goal
+    reminders are `flask sai bootstrap`, run once per deploy; periodic jobs
+    run in the scheduler (SCHEDULER_ENABLED or `flask sai scheduler`).
+    """
     app = Flask(__name__)
-    app.config.from_object(config_class)
+    app.config.from_object(config_class or CONFIGS[os.environ.get('APP_CONFIG', 'development')])
     
     db.init_app(app)
     migrate.init_app(app, db)
     CORS(app)
-    from app.achievement_seed import seed_achievements
-    from app.podcast_seed import seed_podcasts
-    with app.app_context():
-        seed_achievements()
-        seed_podcasts()
-        check_goals_on_startup()
+    request_profiler.init_app(app)
+    # Session flush hooks: notification counters, dashboard summaries, record triggers
+    for service in (notification_service, user_service, tracking_service):
+        service.register_listeners()
+    
+    for module_name, url_prefix in BLUEPRINTS:
+        app.register_blueprint(import_module(f'app.routes.{module_name}').bp, url_prefix=url_prefix)
     
-    from app.routes import auth, user, tracking, goals, achievements, chat, content, notifications
+    from app.cli import register_commands
+    register_commands(app)
     
-    app.register_blueprint(auth.bp, url_prefix='/api/auth')
-    app.register_blueprint(user.bp, url_prefix='/api/user')
-    app.register_blueprint(tracking.bp, url_prefix='/api/tracking')
-    app.register_blueprint(goals.bp, url_prefix='/api/goals')
-    app.register_blueprint(achievements.bp, url_prefix='/api/achievements')
-    app.register_blueprint(chat.bp, url_prefix='/api/chat')
-    app.register_blueprint(content.bp, url_prefix='/api/content')
-    app.register_blueprint(notifications.bp, url_prefix='/api/notifications')
-  
+    if app.config['SCHEDULER_ENABLED']:
+        from app.scheduler import Scheduler
+        Scheduler(app).start()
     
     @app.route('/api/health')
     def health():
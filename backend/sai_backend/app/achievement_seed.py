@@ -1,7 +1,9 @@
+from sqlalchemy.dialects import postgresql
 from app.extensions import db
 from app.models.achievement import Achievement
 
 def seed_achievements():
+    """Insert the achievement catalogue; idempotent, run by `flask sai bootstrap`"""
     achievements = [
         # ===== Beginner =====
         {
@@ -154,13 +156,11 @@ def seed_achievements():
         },
     ]
 
-    for data in achievements:
-        exists = Achievement.query.filter_by(
-            name=data["name"]
-        ).first()
-
-        if not exists:
-            db.session.add(Achievement(**data))
+    # One multi-row INSERT; achievements already present (by name) are left untouched
+    statement = postgresql.insert(Achievement.__table__)
+    statement = statement.values(achievements).on_conflict_do_nothing(index_elements=['name'])
+    inserted = db.session.execute(statement).rowcount
 
     db.session.commit()
-    print("✅ Achievements seeded successfully")
+    print(f"✅ Achievements seeded ({inserted} new, {len(achievements) - inserted} already present)")
+    return inserted
@@ -0,0 +1,133 @@
+"""
+`flask sai ...` commands.
+
+Seeding and the due-goal check used to run inside create_app, i.e. in every
+worker process, every `flask db ...` invocation and every test that built an
+app. They now live in `flask sai bootstrap`, run once per deploy after
+`flask db upgrade`. `flask sai scheduler` runs the periodic jobs (see
+app/scheduler.py); the maintenance commands sit in the same group.
+"""
+import json
+from datetime import datetime, timedelta
+import click
+from flask import current_app
+from flask.cli import AppGroup, with_appcontext
+from app.extensions import db
+from app.scheduler import JOBS, Scheduler, compute_nightly_trends, purge_old_notifications, remind_due_goals
+from app.services import user_service
+from app.services.llm_service import chat_intent_examples
+from app.services.progress_service import recompute_progress
+from app.services.trend_service import TREND_WINDOWS
+
+sai_cli = AppGroup('sai', help='SAI deployment and maintenance commands')
+
+
+@click.command('bootstrap')
+@click.option('--skip-goals', is_flag=True, help='Only seed; do not send due-goal reminders')
+@with_appcontext
+def bootstrap_command(skip_goals):
+    """Seed achievements and podcasts and send today's goal reminders; safe to rerun"""
+    from app.achievement_seed import seed_achievements
+    from app.podcast_seed import seed_podcasts
+    seed_achievements()
+    seed_podcasts()
+    if not skip_goals:
+        remind_due_goals()
+
+
+@click.command('scheduler')
+@click.option('--job', 'job_names', type=click.Choice(sorted(JOBS)), multiple=True, help='Jobs to run (default: SCHEDULER_JOBS)')
+@click.option('--once', is_flag=True, help='Poll once and exit instead of running until interrupted')
+@with_appcontext
+def scheduler_command(job_names, once):
+    """Run the background job scheduler; only the advisory-lock holder among instances runs jobs"""
+    scheduler = Scheduler(current_app._get_current_object(), job_names=list(job_names) or None)
+    if once:
+        scheduler.tick()
+        scheduler.resign()
+        return
+    print(f"⏰ Scheduler running {', '.join(scheduler.job_names)} (poll every {scheduler.poll_seconds:g}s)")
+    try:
+        scheduler.run_forever()
+    except KeyboardInterrupt:
+        scheduler.resign()
+
+
+@click.command('purge-notifications')
+@click.option('--days', type=int, default=None, help='Retention window (default: NOTIFICATION_RETENTION_DAYS)')
+@with_appcontext
+def purge_notifications_command(days):
+    """Delete old read notifications for all users; run daily from cron"""
+    purge_old_notifications(days)
+
+
+@click.command('compute-trends')
+@click.option('--days', type=int, multiple=True, help='Window length(s); default 30, 90 and 365')
+@with_appcontext
+def compute_trends_command(days):
+    """Precompute every user's tracking trends; run nightly from cron"""
+    compute_nightly_trends(days or TREND_WINDOWS)
+
+
+@click.command('rebuild-summaries')
+@click.option('--workers', type=int, default=4)
+@click.option('--chunk-size', type=int, default=user_service.REBUILD_CHUNK_SIZE)
+@with_appcontext
+def rebuild_summaries_command(workers, chunk_size):
+    """Recompute every user dashboard summary from records and goals"""
+    rebuilt = user_service.rebuild_all_summaries(current_app._get_current_object(), workers=workers, chunk_size=chunk_size)
+    print(f"✅ Rebuilt {rebuilt} user summaries.")
+
+
+@click.command('check-summaries')
+@with_appcontext
+def check_summaries_command():
+    """Compare user dashboard summaries with the raw aggregates; exits 1 on drift"""
+    mismatches = user_service.check_summaries()
+    for user_id, field, stored, actual in mismatches:
+        print(f"❌ user {user_id}: {field} is {stored}, expected {actual}")
+    if mismatches:
+        raise SystemExit(1)
+    print("✅ All user summaries match the raw data.")
+
+
+@click.command('recompute-progress')
+@click.option('--user', 'user_ids', type=int, multiple=True, help='Only these user ids (default: everyone)')
+@with_appcontext
+def recompute_progress_command(user_ids):
+    """Recompute streaks and money saved from the check-in history"""
+    updated = recompute_progress(list(user_ids) or None)
+    db.session.commit()
+    print(f"✅ Recomputed progress for {updated} profiles.")
+
+
+@click.command('export-chat-intents')
+@click.option('--output', type=click.Path(dir_okay=False, writable=True), default='chat_intents.jsonl', show_default=True)
+@click.option('--days', type=int, default=None, help='Only messages from the last N days (default: all)')
+@with_appcontext
+def export_chat_intents_command(output, days):
+    """Write user messages labelled with the router's intent as JSON lines for the intent classifier"""
+    since = datetime.utcnow() - timedelta(days=days) if days else None
+    exported = 0
+    with open(output, 'w', encoding='utf-8') as lines:
+        for text, intent in chat_intent_examples(since):
+            lines.write(json.dumps({'text': text, 'intent': intent}, ensure_ascii=False) + '\n')
+            exported += 1
+    print(f"✅ Exported {exported} labelled messages to {output}; review the labels before training.")
+
+
+for command in (
+    bootstrap_command,
+    scheduler_command,
+    purge_notifications_command,
+    compute_trends_command,
+    rebuild_summaries_command,
+    check_summaries_command,
+    recompute_progress_command,
+    export_chat_intents_command
+):
+    sai_cli.add_command(command)
+
+
+def register_commands(app):
+    app.cli.add_command(sai_cli)
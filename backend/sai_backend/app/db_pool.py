@@ -0,0 +1,112 @@
+"""
+Instrumented database connection pool.
+
+`InstrumentedQueuePool` is a QueuePool that times every checkout
+(`Pool.connect`): the time a request waits for a free connection, which is
+where pool exhaustion shows up first. It also counts checkouts served by
+overflow connections and checkouts that gave up after `pool_timeout`. In-use,
+idle and overflow connection gauges are read from the pool itself when a
+snapshot is taken.
+
+The config selects the class through SQLALCHEMY_ENGINE_OPTIONS['poolclass'];
+`pool_snapshot` returns the numbers for the metrics endpoint.
+"""
+import threading
+import time
+from collections import deque
+from sqlalchemy.exc import TimeoutError as PoolTimeoutError
+from sqlalchemy.pool import QueuePool
+
+# Recent checkout waits kept for percentiles
+WAIT_SAMPLES = 1000
+
+
+def percentile(values, fraction):
+    ordered = sorted(values)
+    if not ordered:
+        return 0.0
+    return ordered[min(int(len(ordered) * fraction), len(ordered) - 1)]
+
+
+class PoolMetrics:
+    """Checkout counters and wait times of one pool (thread-safe)"""
+
+    def __init__(self):
+        self.lock = threading.Lock()
+        self.checkouts = 0
+        self.overflow_checkouts = 0
+        self.timeouts = 0
+        self.peak_in_use = 0
+        self.wait_seconds_total = 0.0
+        self.wait_seconds_max = 0.0
+        self.waits = deque(maxlen=WAIT_SAMPLES)
+
+    def record(self, wait_seconds, in_use, overflow, timed_out=False):
+        with self.lock:
+            if timed_out:
+                self.timeouts += 1
+            else:
+                self.checkouts += 1
+                self.overflow_checkouts += overflow > 0
+                self.peak_in_use = max(self.peak_in_use, in_use)
+            self.wait_seconds_total += wait_seconds
+            self.wait_seconds_max = max(self.wait_seconds_max, wait_seconds)
+            self.waits.append(wait_seconds)
+
+    def snapshot(self):
+        with self.lock:
+            waits = list(self.waits)
+            attempts = self.checkouts + self.timeouts
+            return {
+                'checkouts': self.checkouts,
+                'overflow_checkouts': self.overflow_checkouts,
+                'timeouts': self.timeouts,
+                'peak_in_use': self.peak_in_use,
+                'wait_ms_avg': round(self.wait_seconds_total / attempts * 1000, 3) if attempts else 0.0,
+                'wait_ms_p95': round(percentile(waits, 0.95) * 1000, 3),
+                'wait_ms_max': round(self.wait_seconds_max * 1000, 3),
+                'wait_seconds_total': round(self.wait_seconds_total, 6)
+            }
+
+
+class InstrumentedQueuePool(QueuePool):
+    """QueuePool that records checkout wait times, overflow use and timeouts"""
+
+    def __init__(self, *args, **kwargs):
+        super().__init__(*args, **kwargs)
+        self.metrics = PoolMetrics()
+
+    def connect(self):
+        start = time.perf_counter()
+        try:
+            connection = super().connect()
+        except PoolTimeoutError:
+            self.metrics.record(time.perf_counter() - start, self.checkedout(), self.overflow(), timed_out=True)
+            raise
+        self.metrics.record(time.perf_counter() - start, self.checkedout(), self.overflow())
+        return connection
+
+    def recreate(self):
+        # engine.dispose() swaps in a fresh pool; keep counting into the same metrics
+        pool = super().recreate()
+        pool.metrics = self.metrics
+        return pool
+
+
+def pool_snapshot(engine):
+    """Gauges and counters of an engine's pool as a dict"""
+    pool = engine.pool
+    snapshot = {'pool_class': type(pool).__name__}
+    if isinstance(pool, QueuePool):
+        snapshot.update({
+            'size': pool.size(),
+            'max_overflow': pool._max_overflow,
+            'in_use': pool.checkedout(),
+            'idle': pool.checkedin(),
+            # QueuePool.overflow() counts down from -size until the pool is full
+            'overflow_in_use': max(pool.overflow(), 0),
+            'timeout_seconds': pool.timeout()
+        })
+    if isinstance(pool, InstrumentedQueuePool):
+        snapshot.update(pool.metrics.snapshot())
+    return snapshot
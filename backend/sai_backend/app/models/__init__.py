@@ -1,15 +1,20 @@
-from app.models.user import User, UserProfile
-from app.models.tracking import SmokingRecord
+from app.models.user import User, UserProfile, UserSummary
+from app.models.tracking import SmokingRecord, Trigger, RecordTrigger, UserTrend
 from app.models.goal import Goal
 from app.models.achievement import Achievement, UserAchievement
 from app.models.chat import ChatSession, ChatMessage
 from app.models.content import EducationalContent, UserContentProgress
-from app.models.notification import Notification
+from app.models.notification import Notification, NotificationCounter
+from app.models.job import ScheduledJobRun
 
 __all__ = [
     'User',
     'UserProfile',
+    'UserSummary',
     'SmokingRecord',
+    'Trigger',
+    'RecordTrigger',
+    'UserTrend',
     'Goal',
     'Achievement',
     'UserAchievement',
@@ -17,5 +22,7 @@ __all__ = [
     'ChatMessage',
     'EducationalContent',
     'UserContentProgress',
-    'Notification'
+    'Notification',
+    'NotificationCounter',
+    'ScheduledJobRun'
 ]
\ No newline at end of file
@@ -13,6 +13,11 @@ class Achievement(db.Model):
     criteria_value = db.Column(db.Integer)
     points = db.Column(db.Integer, default=0)
     
+    __table_args__ = (
+        # Natural key of the catalogue; `flask sai bootstrap` seeds with ON CONFLICT (name) DO NOTHING
+        db.UniqueConstraint('name', name='uq_achievements_name'),
+    )
+    
     # Relationships
     user_achievements = db.relationship('UserAchievement', backref='achievement', cascade='all, delete-orphan')
     
@@ -12,6 +12,10 @@ class ChatSession(db.Model):
     is_active = db.Column(db.Boolean, default=True)
     message_count = db.Column(db.Integer, default=0)
     
+    __table_args__ = (
+        db.Index('ix_chat_sessions_user_id_last_message_at', 'user_id', 'last_message_at'),
+    )
+    
     # Relationships
     messages = db.relationship('ChatMessage', backref='session', cascade='all, delete-orphan')
     
@@ -39,6 +43,11 @@ class ChatMessage(db.Model):
     flagged = db.Column(db.Boolean, default=False)
     created_at = db.Column(db.DateTime, default=datetime.utcnow)
     
+    __table_args__ = (
+        # Conversation order, and keyset pagination by (created_at, id)
+        db.Index('ix_chat_messages_session_id_created_at_id', 'session_id', 'created_at', 'id'),
+    )
+    
     def to_dict(self):
         return {
             'id': self.id,
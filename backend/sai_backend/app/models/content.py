@@ -1,5 +1,6 @@
 from app.extensions import db
 from datetime import datetime
+from sqlalchemy.dialects.postgresql import TSVECTOR
 
 class EducationalContent(db.Model):
     __tablename__ = 'educational_content'
@@ -15,6 +16,21 @@ class EducationalContent(db.Model):
     is_published = db.Column(db.Boolean, default=False)
     created_at = db.Column(db.DateTime, default=datetime.utcnow)
     updated_at = db.Column(db.DateTime, default=datetime.utcnow, onupdate=datetime.utcnow)
+    # Full-text document of title + content_text; written by a database trigger
+    # (see app/services/content_service.py), never by the app. Deferred: only search reads it.
+    search_vector = db.deferred(db.Column(TSVECTOR()))
+    
+    __table_args__ = (
+        # Natural key for seeded content (podcast episodes); seeding is ON CONFLICT DO NOTHING,
+        # the admin create / update routes answer 409 on a duplicate
+        db.UniqueConstraint('category', 'title', name='uq_educational_content_category_title'),
+        # Keyset pagination of the published catalogue by (created_at, id)
+        db.Index(
+            'ix_educational_content_published_created_at_id', 'created_at', 'id',
+            postgresql_where=db.text('is_published = true')
+        ),
+        db.Index('ix_educational_content_search_vector', 'search_vector', postgresql_using='gin'),
+    )
     
     # Relationships
     user_progress = db.relationship('UserContentProgress', backref='content', cascade='all, delete-orphan')
@@ -47,6 +63,7 @@ class UserContentProgress(db.Model):
     
     __table_args__ = (
         db.UniqueConstraint('user_id', 'content_id', name='unique_user_content'),
+        db.Index('ix_user_content_progress_user_id_completed', 'user_id', 'completed'),
     )
     
     def to_dict(self):
@@ -19,6 +19,15 @@ class Goal(db.Model):
     # <-- New column
     notification_sent = db.Column(db.Boolean, default=False, nullable=False)
     
+    __table_args__ = (
+        db.Index('ix_goals_user_id_status', 'user_id', 'status'),
+        # Due-goal reminders only ever look at goals that have not been notified yet
+        db.Index(
+            'ix_goals_target_date_unsent', 'target_date',
+            postgresql_where=db.text('notification_sent = false')
+        ),
+    )
+    
     def to_dict(self):
         return {
             'id': self.id,
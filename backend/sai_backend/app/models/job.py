@@ -0,0 +1,21 @@
+from app.extensions import db
+from datetime import datetime
+
+class ScheduledJobRun(db.Model):
+    """One row per scheduler job and period; inserting it claims the run"""
+    __tablename__ = 'scheduled_job_runs'
+    
+    job_name = db.Column(db.String(100), primary_key=True)
+    period_start = db.Column(db.DateTime, primary_key=True)
+    started_at = db.Column(db.DateTime, nullable=False, default=datetime.utcnow)
+    finished_at = db.Column(db.DateTime)
+    result = db.Column(db.Integer)
+    
+    def to_dict(self):
+        return {
+            'job_name': self.job_name,
+            'period_start': self.period_start.isoformat() if self.period_start else None,
+            'started_at': self.started_at.isoformat() if self.started_at else None,
+            'finished_at': self.finished_at.isoformat() if self.finished_at else None,
+            'result': self.result
+        }
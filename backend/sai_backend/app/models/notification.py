@@ -13,6 +13,22 @@ class Notification(db.Model):
     created_at = db.Column(db.DateTime, default=datetime.utcnow)
     read_at = db.Column(db.DateTime)
     
+    __table_args__ = (
+        db.Index('ix_notifications_user_id_is_read_created_at', 'user_id', 'is_read', 'created_at'),
+        # Keyset pagination of a user's notifications by (created_at, id)
+        db.Index('ix_notifications_user_id_created_at_id', 'user_id', 'created_at', 'id'),
+        # Unread badge and unread list: only the (small) unread part of the table is indexed
+        db.Index(
+            'ix_notifications_unread_user_id_created_at', 'user_id', 'created_at',
+            postgresql_where=db.text('is_read = false')
+        ),
+        # Retention purge: old read notifications across all users
+        db.Index(
+            'ix_notifications_read_created_at', 'created_at',
+            postgresql_where=db.text('is_read = true')
+        ),
+    )
+    
     def to_dict(self):
         return {
             'id': self.id,
@@ -24,3 +40,21 @@ class Notification(db.Model):
             'created_at': self.created_at.isoformat() if self.created_at else None,
             'read_at': self.read_at.isoformat() if self.read_at else None
         }
+
+
+class NotificationCounter(db.Model):
+    """Per-user, per-type notification counts, kept in step with the notifications table"""
+    __tablename__ = 'notification_counters'
+    
+    user_id = db.Column(db.Integer, db.ForeignKey('users.id', ondelete='CASCADE'), primary_key=True)
+    notification_type = db.Column(db.String(50), primary_key=True)
+    total_count = db.Column(db.Integer, nullable=False, default=0)
+    unread_count = db.Column(db.Integer, nullable=False, default=0)
+    
+    def to_dict(self):
+        return {
+            'user_id': self.user_id,
+            'notification_type': self.notification_type,
+            'total_count': self.total_count,
+            'unread_count': self.unread_count
+        }
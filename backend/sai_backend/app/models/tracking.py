@@ -14,6 +14,11 @@ class SmokingRecord(db.Model):
     notes = db.Column(db.Text)
     created_at = db.Column(db.DateTime, default=datetime.utcnow)
     
+    __table_args__ = (
+        # One check-in per user and day; its index also serves the per-user date range scans
+        db.UniqueConstraint('user_id', 'record_date', name='uq_smoking_records_user_id_record_date'),
+    )
+    
     def to_dict(self):
         return {
             'id': self.id,
@@ -27,3 +32,41 @@ class SmokingRecord(db.Model):
             'created_at': self.created_at.isoformat() if self.created_at else None
         }
 
+
+
+class Trigger(db.Model):
+    """Dictionary of trigger names parsed from SmokingRecord.triggers"""
+    __tablename__ = 'triggers'
+    
+    id = db.Column(db.Integer, primary_key=True)
+    name = db.Column(db.String(100), unique=True, nullable=False)
+    created_at = db.Column(db.DateTime, default=datetime.utcnow)
+    
+    def to_dict(self):
+        return {
+            'id': self.id,
+            'name': self.name
+        }
+
+
+class RecordTrigger(db.Model):
+    """Which dictionary triggers a check-in mentions"""
+    __tablename__ = 'record_triggers'
+    
+    record_id = db.Column(db.Integer, db.ForeignKey('smoking_records.id', ondelete='CASCADE'), primary_key=True)
+    trigger_id = db.Column(db.Integer, db.ForeignKey('triggers.id', ondelete='CASCADE'), primary_key=True)
+    
+    __table_args__ = (
+        # Lookups by trigger ("which check-ins mention X"); the primary key covers lookups by record
+        db.Index('ix_record_triggers_trigger_id_record_id', 'trigger_id', 'record_id'),
+    )
+
+
+class UserTrend(db.Model):
+    """Precomputed /api/tracking/trends payload per user and window length"""
+    __tablename__ = 'user_trends'
+    
+    user_id = db.Column(db.Integer, db.ForeignKey('users.id', ondelete='CASCADE'), primary_key=True)
+    window_days = db.Column(db.Integer, primary_key=True)
+    payload = db.Column(db.JSON, nullable=False)
+    computed_at = db.Column(db.DateTime, nullable=False, default=datetime.utcnow)
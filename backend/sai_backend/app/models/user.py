@@ -79,3 +79,28 @@ class UserProfile(db.Model):
             'longest_streak_days': self.longest_streak_days
         }
 
+
+
+class UserSummary(db.Model):
+    """Per-user dashboard aggregates, kept in step with smoking records and goals"""
+    __tablename__ = 'user_summaries'
+    
+    user_id = db.Column(db.Integer, db.ForeignKey('users.id', ondelete='CASCADE'), primary_key=True)
+    total_records = db.Column(db.Integer, nullable=False, default=0)
+    total_cigarettes = db.Column(db.Integer, nullable=False, default=0)
+    # {'YYYY-MM-DD': [records, cigarettes]} for the days of the rolling window
+    recent_days = db.Column(db.JSON, nullable=False, default=dict)
+    active_goals = db.Column(db.Integer, nullable=False, default=0)
+    completed_goals = db.Column(db.Integer, nullable=False, default=0)
+    updated_at = db.Column(db.DateTime, default=datetime.utcnow, onupdate=datetime.utcnow)
+    
+    def to_dict(self):
+        return {
+            'user_id': self.user_id,
+            'total_records': self.total_records,
+            'total_cigarettes': self.total_cigarettes,
+            'recent_days': self.recent_days,
+            'active_goals': self.active_goals,
+            'completed_goals': self.completed_goals,
+            'updated_at': self.updated_at.isoformat() if self.updated_at else None
+        }
@@ -1,7 +1,8 @@
 """
-Podcast content seeder - runs automatically on app startup
+Podcast content seeder - run by `flask sai bootstrap`
 """
 from datetime import datetime
+from sqlalchemy.dialects import postgresql
 from app.extensions import db
 from app.models.content import EducationalContent
 
@@ -284,36 +285,33 @@ PODCAST_METADATA = [
 
 def seed_podcasts():
     """
-    Seeds initial podcast content if none exists.
-    Called automatically on app startup.
+    Seeds the podcast episodes that are not there yet (matched on category and title).
+    Idempotent; run by `flask sai bootstrap`.
     """
     try:
-        # Check if podcasts already exist
-        existing_count = EducationalContent.query.filter_by(category='podcasts').count()
-        
-        if existing_count > 0:
-            print(f"✓ Podcasts already seeded ({existing_count} episodes)")
-            return
-        
-        # Add podcast episodes
-        print("Seeding podcast content...")
-        for metadata in PODCAST_METADATA:
-            podcast = EducationalContent(
-                title=metadata['title'],
-                content_type='podcast',
-                content_url=metadata['content_url'],
-                content_text=metadata['content_text'],
-                category='podcasts',
-                language='ar-dz',
-                reading_time=metadata['reading_time'],
-                is_published=True,
-                created_at=datetime.utcnow(),
-                updated_at=datetime.utcnow()
-            )
-            db.session.add(podcast)
+        now = datetime.utcnow()
+        episodes = [
+            {
+                'title': metadata['title'],
+                'content_type': 'podcast',
+                'content_url': metadata['content_url'],
+                'content_text': metadata['content_text'],
+                'category': 'podcasts',
+                'language': 'ar-dz',
+                'reading_time': metadata['reading_time'],
+                'is_published': True,
+                'created_at': now,
+                'updated_at': now
+            }
+            for metadata in PODCAST_METADATA
+        ]
+        statement = postgresql.insert(EducationalContent.__table__)
+        statement = statement.values(episodes).on_conflict_do_nothing(index_elements=['category', 'title'])
+        inserted = db.session.execute(statement).rowcount
         
         db.session.commit()
-        print(f"✓ Successfully seeded {len(PODCAST_METADATA)} podcast episodes")
+        print(f"✓ Podcasts seeded ({inserted} new, {len(episodes) - inserted} already present)")
+        return inserted
         
     except Exception as e:
         db.session.rollback()
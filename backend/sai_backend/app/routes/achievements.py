@@ -8,6 +8,7 @@ from app.models.content import UserContentProgress
 from datetime import datetime, timedelta
 from sqlalchemy import func
 from app.models.notification import Notification
+from app.services.achievement_service import evaluate_achievements
 
 bp = Blueprint('achievements', __name__)
 
@@ -151,50 +152,8 @@ def check_achievements():
     if not user:
         return jsonify({'error': 'User not found'}), 404
 
-    profile = UserProfile.query.filter_by(user_id=user_id).first()
-    all_achievements = Achievement.query.all()
-    earned_ids = [id[0] for id in db.session.query(UserAchievement.achievement_id).filter_by(user_id=user_id).all()]
-    newly_earned = []
-
     try:
-        for achievement in all_achievements:
-            if achievement.id in earned_ids:
-                continue
-
-            earned = False
-
-            if achievement.criteria_type == 'days_smoke_free' and profile:
-                earned = profile.longest_streak_days >= achievement.criteria_value
-            elif achievement.criteria_type == 'money_saved' and profile:
-                earned = profile.total_money_saved >= achievement.criteria_value
-            elif achievement.criteria_type == 'goals_completed':
-                completed_goals = Goal.query.filter_by(user_id=user_id, status='completed').count()
-                earned = completed_goals >= achievement.criteria_value
-            elif achievement.criteria_type == 'content_completed':
-                completed_content = UserContentProgress.query.filter_by(user_id=user_id, completed=True).count()
-                earned = completed_content >= achievement.criteria_value
-            elif achievement.criteria_type == 'total_records':
-                total_records = SmokingRecord.query.filter_by(user_id=user_id).count()
-                earned = total_records >= achievement.criteria_value
-
-            if earned:
-                # Add achievement
-                user_achievement = UserAchievement(user_id=user_id, achievement_id=achievement.id)
-                db.session.add(user_achievement)
-
-                # SIMPLE NOTIFICATION CREATION - NO COMPLEX LOGIC
-                notification = Notification(
-                    user_id=user_id,
-                    notification_type='achievement_earned',
-                    title='New Achievement!',
-                    message=f"Congratulations! You earned: {achievement.name}",
-                    is_read=False,
-                    created_at=datetime.utcnow()
-                )
-                db.session.add(notification)
-
-                newly_earned.append(achievement.to_dict())
-
+        newly_earned = [achievement.to_dict() for achievement in evaluate_achievements(user_id)]
         db.session.commit()
         
     except Exception as e:
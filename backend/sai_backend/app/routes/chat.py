@@ -1,17 +1,21 @@
-from flask import Blueprint, request, jsonify
+from flask import Blueprint, request, jsonify, Response, current_app, stream_with_context
 from app.extensions import db
 from app.models.chat import ChatSession, ChatMessage
 from app.models.user import User, UserProfile
 from app.utils.constants import SENDER_USER, SENDER_ASSISTANT
+from app.services.llm_service import (
+    query_rag, stream_rag, sse_event, dispatch_reply, set_reply_status, reply_is_stale, expire_stale_reply,
+    REPLY_PENDING, REPLY_COMPLETED, REPLY_FAILED
+)
 from datetime import datetime
 from sqlalchemy import desc
-import requests
-import os
+import time
+from app.utils.pagination import InvalidCursor, include_total_arg, keyset_page, offset_page
 
 bp = Blueprint('chat', __name__)
 
-# RAG API Configuration
-RAG_API_URL = os.environ.get('RAG_API_URL', 'https://shawana-knurly-merrill.ngrok-free.dev/query')
+# Long-poll interval for GET /messages/<id>/reply (the wait limit is CHAT_REPLY_MAX_WAIT_SECONDS)
+REPLY_POLL_INTERVAL = 0.25
 
 
 @bp.route('/session', methods=['POST'])
@@ -174,36 +178,23 @@ def send_message():
         session.last_message_at = datetime.utcnow()
         session.message_count += 1
         
+        # Async mode: commit the user message now and let a worker write the reply
+        if data.get('async'):
+            set_reply_status(user_message, REPLY_PENDING)
+            db.session.commit()
+            dispatch_reply(user_message.id)
+            
+            return jsonify({
+                'message': 'Message accepted',
+                'user_message': user_message.to_dict(),
+                'reply_status': REPLY_PENDING,
+                'reply_url': f'/api/chat/messages/{user_message.id}/reply'
+            }), 202
+        
         db.session.flush()  # Flush to get user_message.id
         
         # Call RAG API
-        try:
-            rag_response = requests.post(
-                RAG_API_URL,
-                json={'query': data['message']},
-                timeout=30
-            )
-            
-            if rag_response.status_code == 200:
-                rag_data = rag_response.json()
-                ai_response_text = rag_data.get('answer', 'عذرا، ما قدرتش نجاوب دابا.')
-                # Store RAG metadata (sources, confidence, etc.)
-                rag_metadata = {
-                    'intent': rag_data.get('intent'),
-                    'confidence': rag_data.get('confidence'),
-                    'sources_used': len(rag_data.get('sources', [])),
-                    'use_rag': rag_data.get('use_rag', False)
-                }
-            else:
-                ai_response_text = 'عذرا، صار خلل في الخدمة. حاول مرة أخرى.'
-                rag_metadata = {'error': 'RAG API returned non-200 status'}
-        except requests.exceptions.Timeout:
-            ai_response_text = 'عذرا، الطلب أخذ وقت طويل. حاول مرة أخرى.'
-            rag_metadata = {'error': 'timeout'}
-        except Exception as e:
-            # Fallback to placeholder if RAG API fails
-            ai_response_text = generate_placeholder_response(data['message'], session.user_id)
-            rag_metadata = {'error': str(e), 'fallback': True}
+        ai_response_text, rag_metadata = query_rag(data['message'], session.user_id)
         
         # Save AI response
         ai_message = ChatMessage(
@@ -232,6 +223,110 @@ def send_message():
         return jsonify({'error': str(e)}), 500
 
 
+@bp.route('/message/stream', methods=['POST'])
+def send_message_stream():
+    """Send a message and stream the AI answer back as server-sent events"""
+    try:
+        data = request.get_json()
+        
+        # Validate required fields
+        if not data.get('session_id') or not data.get('message'):
+            return jsonify({'error': 'session_id and message are required'}), 400
+        
+        session_id = data['session_id']
+        
+        # Check if session exists
+        session = ChatSession.query.get(session_id)
+        if not session:
+            return jsonify({'error': 'Session not found'}), 404
+        
+        # Save user message and commit before streaming so no transaction stays open
+        user_message = ChatMessage(
+            session_id=session_id,
+            sender_type=SENDER_USER,
+            message_text=data['message'],
+            message_metadata=data.get('metadata')
+        )
+        
+        db.session.add(user_message)
+        session.last_message_at = datetime.utcnow()
+        session.message_count += 1
+        db.session.commit()
+        
+        user_id = session.user_id
+        user_message_data = user_message.to_dict()
+        
+    except Exception as e:
+        db.session.rollback()
+        return jsonify({'error': str(e)}), 500
+    
+    def generate():
+        yield sse_event('user_message', user_message_data)
+        
+        chunks = []
+        final_answer = None
+        rag_metadata = {'streamed': True}
+        
+        try:
+            for event, payload in stream_rag(data['message'], user_id):
+                if event == 'meta':
+                    rag_metadata.update({
+                        'intent': payload.get('query_type'),
+                        'confidence': payload.get('confidence'),
+                        'sources_used': len(payload.get('all_documents') or []),
+                        'use_rag': payload.get('rag_used', False)
+                    })
+                elif event == 'token':
+                    chunks.append(payload.get('text', ''))
+                    yield sse_event('token', payload)
+                elif event == 'done':
+                    final_answer = payload.get('answer')
+                elif event == 'error':
+                    final_answer = payload.get('answer')
+                    rag_metadata.update({key: payload[key] for key in ('error', 'fallback') if key in payload})
+                    if not chunks and final_answer:
+                        yield sse_event('token', {'text': final_answer})
+        finally:
+            # Persist the full text once the stream closes (also on client disconnect)
+            ai_message = save_streamed_reply(
+                session_id,
+                final_answer or ''.join(chunks) or 'عذرا، ما قدرتش نجاوب دابا.',
+                rag_metadata
+            )
+        
+        yield sse_event('done', {'ai_response': ai_message.to_dict() if ai_message else None})
+    
+    return Response(
+        stream_with_context(generate()),
+        mimetype='text/event-stream',
+        headers={'Cache-Control': 'no-cache', 'X-Accel-Buffering': 'no'}
+    )
+
+
+def save_streamed_reply(session_id, message_text, metadata):
+    """Store the assistant message of a streamed reply"""
+    try:
+        ai_message = ChatMessage(
+            session_id=session_id,
+            sender_type=SENDER_ASSISTANT,
+            message_text=message_text,
+            message_metadata=metadata
+        )
+        db.session.add(ai_message)
+        
+        session = ChatSession.query.get(session_id)
+        session.last_message_at = datetime.utcnow()
+        session.message_count = ChatSession.message_count + 1
+        
+        db.session.commit()
+        return ai_message
+    
+    except Exception as e:
+        db.session.rollback()
+        print(f"ERROR saving streamed reply for session {session_id}: {str(e)}")
+        return None
+
+
 @bp.route('/sessions/<int:session_id>/messages', methods=['GET'])
 def get_messages(session_id):
     """Get all messages in a chat session"""
@@ -244,24 +339,39 @@ def get_messages(session_id):
         # Get pagination parameters
         page = request.args.get('page', 1, type=int)
         per_page = request.args.get('per_page', 50, type=int)
+        cursor = request.args.get('cursor')
+        include_total = include_total_arg(request.args)
         
-        # Get messages ordered by creation time
-        pagination = ChatMessage.query.filter_by(
-            session_id=session_id
-        ).order_by(
-            ChatMessage.created_at
-        ).paginate(page=page, per_page=per_page, error_out=False)
+        query = ChatMessage.query.filter_by(session_id=session_id)
         
-        messages = pagination.items
+        if cursor is not None:
+            # Keyset pagination in conversation order
+            messages, next_cursor, total = keyset_page(
+                query, [ChatMessage.created_at, ChatMessage.id], per_page, cursor, with_total=include_total
+            )
+            return jsonify({
+                'messages': [message.to_dict() for message in messages],
+                'total': total,
+                'next_cursor': next_cursor,
+                'session': session.to_dict()
+            }), 200
+        
+        # Get messages ordered by creation time
+        messages, total, pages, has_next = offset_page(
+            query.order_by(ChatMessage.created_at), page, per_page, with_total=include_total
+        )
         
         return jsonify({
             'messages': [message.to_dict() for message in messages],
-            'total': pagination.total,
-            'pages': pagination.pages,
+            'total': total,
+            'pages': pages,
             'current_page': page,
+            'has_next': has_next,
             'session': session.to_dict()
         }), 200
         
+    except InvalidCursor:
+        return jsonify({'error': 'Invalid cursor'}), 400
     except Exception as e:
         return jsonify({'error': str(e)}), 500
 
@@ -280,6 +390,55 @@ def get_message(message_id):
         return jsonify({'error': str(e)}), 500
 
 
+@bp.route('/messages/<int:message_id>/reply', methods=['GET'])
+def get_message_reply(message_id):
+    """Poll (or long-poll with ?wait=N seconds) for the reply to an async message"""
+    try:
+        wait = min(max(request.args.get('wait', 0, type=float), 0), current_app.config['CHAT_REPLY_MAX_WAIT_SECONDS'])
+        deadline = time.monotonic() + wait
+        
+        while True:
+            message = ChatMessage.query.get(message_id)
+            if not message:
+                return jsonify({'error': 'Message not found'}), 404
+            
+            metadata = message.message_metadata or {}
+            status = metadata.get('reply_status')
+            
+            if status is None:
+                return jsonify({'error': 'Message was not sent in async mode'}), 400
+            
+            # The worker that owned it is gone (e.g. the process restarted)
+            if status == REPLY_PENDING and reply_is_stale(message):
+                message = expire_stale_reply(message_id)
+                metadata = message.message_metadata or {}
+                status = metadata.get('reply_status')
+            
+            if status == REPLY_COMPLETED:
+                reply = ChatMessage.query.get(metadata['reply_message_id'])
+                return jsonify({
+                    'reply_status': status,
+                    'user_message': message.to_dict(),
+                    'ai_response': reply.to_dict() if reply else None
+                }), 200
+            
+            if status == REPLY_FAILED:
+                return jsonify({
+                    'reply_status': status,
+                    'error': metadata.get('reply_error')
+                }), 502
+            
+            if time.monotonic() >= deadline:
+                return jsonify({'reply_status': status}), 202
+            
+            # End the read transaction so no connection is held while waiting
+            db.session.rollback()
+            time.sleep(REPLY_POLL_INTERVAL)
+        
+    except Exception as e:
+        return jsonify({'error': str(e)}), 500
+
+
 @bp.route('/messages/<int:message_id>/flag', methods=['POST'])
 def flag_message(message_id):
     """Flag a message for review (content moderation)"""
@@ -384,41 +543,3 @@ def get_session_context(session_id):
         
     except Exception as e:
         return jsonify({'error': str(e)}), 500
-
-
-# ============================================
-# Helper Functions
-# ============================================
-
-def generate_placeholder_response(user_message, user_id):
-    """
-    Placeholder response generator
-    TODO: Replace with actual LLM service call
-    """
-    
-    # Get user profile for personalization
-    profile = UserProfile.query.filter_by(user_id=user_id).first()
-    
-    user_message_lower = user_message.lower()
-    
-    # Simple keyword-based responses (placeholder)
-    if 'help' in user_message_lower or 'مساعدة' in user_message_lower:
-        return "مرحبا! أنا هنا لمساعدتك في رحلتك للإقلاع عن التدخين. كيف يمكنني مساعدتك اليوم؟"
-    
-    elif 'craving' in user_message_lower or 'رغبة' in user_message_lower:
-        return "أفهم أنك تشعر برغبة في التدخين. جرب أخذ نفس عميق، اشرب الماء، أو قم بنشاط بدني قصير. الرغبة ستمر في غضون دقائق!"
-    
-    elif 'motivation' in user_message_lower or 'تحفيز' in user_message_lower:
-        if profile and profile.current_streak_days > 0:
-            return f"رائع! لديك {profile.current_streak_days} يوم بدون تدخين! استمر في هذا المجهود الرائع. أنت أقوى من الإدمان!"
-        else:
-            return "كل يوم بدون تدخين هو انتصار! أنت تستطيع فعل ذلك. فكر في صحتك وعائلتك."
-    
-    elif 'stress' in user_message_lower or 'توتر' in user_message_lower or 'قلق' in user_message_lower:
-        return "التوتر طبيعي، لكن التدخين ليس الحل. جرب تقنيات التنفس، المشي، أو التحدث مع صديق. لديك القوة للتعامل مع التوتر بدون سجائر!"
-    
-    elif 'goal' in user_message_lower or 'هدف' in user_message_lower:
-        return "تحديد أهداف واضحة مهم جدا! ما هو هدفك اليوم؟ يمكنني مساعدتك في تتبع تقدمك."
-    
-    else:
-        return "شكرا لمشاركتك. أنا هنا لدعمك في رحلتك للإقلاع عن التدخين. هل لديك أي أسئلة محددة؟"
\ No newline at end of file
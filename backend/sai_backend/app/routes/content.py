@@ -2,7 +2,7 @@
 # FILE: app/routes/content.py
 # Educational Content Routes
 # ============================================
-from flask import Blueprint, request, jsonify
+from flask import Blueprint, current_app, request, jsonify
 from app.extensions import db
 from app.models.content import EducationalContent, UserContentProgress
 from app.models.user import User
@@ -13,9 +13,15 @@ from app.utils.constants import (
 )
 from datetime import datetime
 from sqlalchemy import desc, func
+from sqlalchemy.exc import IntegrityError
+from app.services.content_service import search_published
+from app.utils.pagination import InvalidCursor, include_total_arg, keyset_page, offset_page
 
 bp = Blueprint('content', __name__)
 
+# (category, title) is unique (uq_educational_content_category_title)
+DUPLICATE_TITLE_ERROR = {'error': 'Content with this title already exists in this category', 'field': 'title'}
+
 
 @bp.route('/', methods=['GET'])
 def get_all_content():
@@ -29,6 +35,8 @@ def get_all_content():
         # Pagination
         page = request.args.get('page', 1, type=int)
         per_page = request.args.get('per_page', 20, type=int)
+        cursor = request.args.get('cursor')
+        include_total = include_total_arg(request.args)
         
         # Build query - only published content
         query = EducationalContent.query.filter_by(is_published=True)
@@ -40,20 +48,34 @@ def get_all_content():
         if content_type:
             query = query.filter_by(content_type=content_type)
         
+        if cursor is not None:
+            # Keyset pagination, newest first
+            content_list, next_cursor, total = keyset_page(
+                query, [EducationalContent.created_at, EducationalContent.id], per_page, cursor,
+                descending=True, with_total=include_total
+            )
+            return jsonify({
+                'content': [content.to_dict() for content in content_list],
+                'total': total,
+                'next_cursor': next_cursor
+            }), 200
+        
         # Order by creation date (newest first)
         query = query.order_by(desc(EducationalContent.created_at))
         
         # Paginate
-        pagination = query.paginate(page=page, per_page=per_page, error_out=False)
-        content_list = pagination.items
+        content_list, total, pages, has_next = offset_page(query, page, per_page, with_total=include_total)
         
         return jsonify({
             'content': [content.to_dict() for content in content_list],
-            'total': pagination.total,
-            'pages': pagination.pages,
-            'current_page': page
+            'total': total,
+            'pages': pages,
+            'current_page': page,
+            'has_next': has_next
         }), 200
         
+    except InvalidCursor:
+        return jsonify({'error': 'Invalid cursor'}), 400
     except Exception as e:
         return jsonify({'error': str(e)}), 500
 
@@ -364,6 +386,9 @@ def create_content():
             'content': new_content.to_dict()
         }), 201
         
+    except IntegrityError:
+        db.session.rollback()
+        return jsonify(DUPLICATE_TITLE_ERROR), 409
     except Exception as e:
         db.session.rollback()
         return jsonify({'error': str(e)}), 500
@@ -406,6 +431,9 @@ def update_content(content_id):
             'content': content.to_dict()
         }), 200
         
+    except IntegrityError:
+        db.session.rollback()
+        return jsonify(DUPLICATE_TITLE_ERROR), 409
     except Exception as e:
         db.session.rollback()
         return jsonify({'error': str(e)}), 500
@@ -431,24 +459,17 @@ def delete_content(content_id):
 
 @bp.route('/search', methods=['GET'])
 def search_content():
-    """Search educational content"""
+    """Search educational content, best matches first (full-text on PostgreSQL)"""
     try:
         query_text = request.args.get('q', '')
         if not query_text:
             return jsonify({'error': 'Search query (q) is required'}), 400
         
-        # Search in title and content_text
-        results = EducationalContent.query.filter(
-            EducationalContent.is_published == True,
-            db.or_(
-                EducationalContent.title.ilike(f'%{query_text}%'),
-                EducationalContent.content_text.ilike(f'%{query_text}%')
-            )
-        ).order_by(desc(EducationalContent.created_at)).limit(20).all()
+        results = search_published(query_text, drop_stopwords=current_app.config['SEARCH_DARIJA_STOPWORDS'])
         
         return jsonify({
             'query': query_text,
-            'results': [content.to_dict() for content in results],
+            'results': [dict(content.to_dict(), rank=rank) for content, rank in results],
             'total': len(results)
         }), 200
         
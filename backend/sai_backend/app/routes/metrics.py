@@ -0,0 +1,29 @@
+from flask import Blueprint, Response, jsonify
+from app.extensions import db
+from app.db_pool import pool_snapshot
+from app.services.metrics_service import request_profiler
+
+bp = Blueprint('metrics', __name__)
+
+@bp.route('', methods=['GET'])
+def get_metrics():
+    """Prometheus exposition: per-endpoint request time and SQL totals, pool gauges"""
+    return Response(request_profiler.prometheus(db.engine), mimetype='text/plain; version=0.0.4')
+
+@bp.route('/endpoints', methods=['GET'])
+def get_endpoint_metrics():
+    """Per-endpoint averages and the slowest SQL statements seen"""
+    try:
+        return jsonify({'endpoints': request_profiler.snapshot()}), 200
+
+    except Exception as e:
+        return jsonify({'error': str(e)}), 500
+
+@bp.route('/pool', methods=['GET'])
+def get_pool_metrics():
+    """Database connection pool gauges, checkout wait times and timeouts"""
+    try:
+        return jsonify({'pool': pool_snapshot(db.engine)}), 200
+
+    except Exception as e:
+        return jsonify({'error': str(e)}), 500
@@ -7,8 +7,10 @@ from app.utils.constants import (
     NOTIF_DAILY_REMINDER, NOTIF_STREAK_MILESTONE,
     NOTIF_MOTIVATIONAL, NOTIF_EDUCATIONAL
 )
+from app.services.notification_service import delete_read, mark_all_read, notification_statistics, send_bulk, unread_counts
 from datetime import datetime, timedelta
 from sqlalchemy import desc
+from app.utils.pagination import InvalidCursor, include_total_arg, keyset_page, offset_page
 
 bp = Blueprint('notifications', __name__)
 
@@ -29,6 +31,8 @@ def get_all_notifications():
         # Get pagination parameters
         page = request.args.get('page', 1, type=int)
         per_page = request.args.get('per_page', 20, type=int)
+        cursor = request.args.get('cursor')
+        include_total = include_total_arg(request.args)
         
         # Get filter parameters
         is_read = request.args.get('is_read', type=bool)
@@ -42,19 +46,53 @@ def get_all_notifications():
         if notification_type:
             query = query.filter_by(notification_type=notification_type)
         
+        if cursor is not None:
+            # Keyset pagination, newest first
+            notifications, next_cursor, total = keyset_page(
+                query, [Notification.created_at, Notification.id], per_page, cursor,
+                descending=True, with_total=include_total
+            )
+            return jsonify({
+                'notifications': [notif.to_dict() for notif in notifications],
+                'total': total,
+                'next_cursor': next_cursor,
+                'unread_count': unread_counts(user_id)[0]
+            }), 200
+        
         # Order by creation date (newest first)
         query = query.order_by(desc(Notification.created_at))
         
         # Paginate
-        pagination = query.paginate(page=page, per_page=per_page, error_out=False)
-        notifications = pagination.items
+        notifications, total, pages, has_next = offset_page(query, page, per_page, with_total=include_total)
         
         return jsonify({
             'notifications': [notif.to_dict() for notif in notifications],
-            'total': pagination.total,
-            'pages': pagination.pages,
+            'total': total,
+            'pages': pages,
             'current_page': page,
-            'unread_count': Notification.query.filter_by(user_id=user_id, is_read=False).count()
+            'has_next': has_next,
+            'unread_count': unread_counts(user_id)[0]
+        }), 200
+        
+    except InvalidCursor:
+        return jsonify({'error': 'Invalid cursor'}), 400
+    except Exception as e:
+        return jsonify({'error': str(e)}), 500
+
+
+@bp.route('/unread-count', methods=['GET'])
+def get_unread_count():
+    """Get the unread badge count for a user (from the notification counter cache)"""
+    try:
+        user_id = request.args.get('user_id', type=int)
+        if not user_id:
+            return jsonify({'error': 'user_id is required'}), 400
+        
+        unread_count, by_type = unread_counts(user_id)
+        
+        return jsonify({
+            'unread_count': unread_count,
+            'unread_by_type': by_type
         }), 200
         
     except Exception as e:
@@ -141,18 +179,7 @@ def mark_all_as_read():
         if not user:
             return jsonify({'error': 'User not found'}), 404
         
-        # Update all unread notifications
-        unread_notifications = Notification.query.filter_by(
-            user_id=user_id,
-            is_read=False
-        ).all()
-        
-        count = 0
-        for notification in unread_notifications:
-            notification.is_read = True
-            notification.read_at = datetime.utcnow()
-            count += 1
-        
+        count = mark_all_read(user_id)
         db.session.commit()
         
         return jsonify({
@@ -195,16 +222,7 @@ def delete_read_notifications():
         if not user:
             return jsonify({'error': 'User not found'}), 404
         
-        # Delete all read notifications
-        read_notifications = Notification.query.filter_by(
-            user_id=user_id,
-            is_read=True
-        ).all()
-        
-        count = len(read_notifications)
-        for notification in read_notifications:
-            db.session.delete(notification)
-        
+        count = delete_read(user_id)
         db.session.commit()
         
         return jsonify({
@@ -263,49 +281,16 @@ def get_notification_statistics(user_id):
         if not user:
             return jsonify({'error': 'User not found'}), 404
         
-        # Total notifications
-        total_notifications = Notification.query.filter_by(user_id=user_id).count()
-        
-        # Unread count
-        unread_count = Notification.query.filter_by(user_id=user_id, is_read=False).count()
-        
-        # Read count
-        read_count = Notification.query.filter_by(user_id=user_id, is_read=True).count()
-        
-        # Count by type
-        notifications_by_type = {}
-        notification_types = [
+        statistics = notification_statistics(user_id, [
             NOTIF_ACHIEVEMENT_EARNED,
             NOTIF_GOAL_COMPLETED,
             NOTIF_DAILY_REMINDER,
             NOTIF_STREAK_MILESTONE,
             NOTIF_MOTIVATIONAL,
             NOTIF_EDUCATIONAL
-        ]
-        
-        for notif_type in notification_types:
-            count = Notification.query.filter_by(
-                user_id=user_id,
-                notification_type=notif_type
-            ).count()
-            notifications_by_type[notif_type] = count
+        ])
         
-        # Recent notifications (last 7 days)
-        seven_days_ago = datetime.utcnow() - timedelta(days=7)
-        recent_count = Notification.query.filter(
-            Notification.user_id == user_id,
-            Notification.created_at >= seven_days_ago
-        ).count()
-        
-        return jsonify({
-            'statistics': {
-                'total_notifications': total_notifications,
-                'unread_count': unread_count,
-                'read_count': read_count,
-                'notifications_by_type': notifications_by_type,
-                'recent_count': recent_count
-            }
-        }), 200
+        return jsonify({'statistics': statistics}), 200
         
     except Exception as e:
         return jsonify({'error': str(e)}), 500
@@ -332,40 +317,36 @@ def get_notification_types():
 
 @bp.route('/send-bulk', methods=['POST'])
 def send_bulk_notifications():
-    """Send notification to multiple users (admin function)"""
+    """
+    Send notification to multiple users (admin function).
+    
+    Recipients are either `user_ids` (array) or a `segment` resolved in SQL,
+    e.g. {"min_streak_days": 30}.
+    """
     try:
         data = request.get_json()
         
         # Validate required fields
-        if not data.get('user_ids') or not data.get('notification_type') or not data.get('title') or not data.get('message'):
-            return jsonify({'error': 'user_ids (array), notification_type, title, and message are required'}), 400
-        
-        user_ids = data['user_ids']
-        notification_type = data['notification_type']
-        title = data['title']
-        message = data['message']
-        
-        created_count = 0
-        failed_count = 0
-        
-        for user_id in user_ids:
-            # Check if user exists
-            user = User.query.get(user_id)
-            if not user:
-                failed_count += 1
-                continue
-            
-            # Create notification
-            notification = Notification(
-                user_id=user_id,
-                notification_type=notification_type,
-                title=title,
-                message=message
+        if not (data.get('user_ids') or data.get('segment')) or not data.get('notification_type') or not data.get('title') or not data.get('message'):
+            return jsonify({'error': 'user_ids (array) or segment, notification_type, title, and message are required'}), 400
+        
+        user_ids = None
+        if data.get('user_ids'):
+            try:
+                user_ids = [int(user_id) for user_id in data['user_ids']]
+            except (TypeError, ValueError):
+                return jsonify({'error': 'user_ids must be an array of integers'}), 400
+        
+        try:
+            created_count, failed_count = send_bulk(
+                data['notification_type'],
+                data['title'],
+                data['message'],
+                user_ids=user_ids,
+                segment=data.get('segment')
             )
-            db.session.add(notification)
-            created_count += 1
-        
-        db.session.commit()
+        except ValueError as e:
+            return jsonify({'error': str(e)}), 400
         
         return jsonify({
             'message': f'Sent {created_count} notifications',
@@ -427,17 +408,7 @@ def clear_old_notifications():
         days = request.args.get('days', 30, type=int)
         cutoff_date = datetime.utcnow() - timedelta(days=days)
         
-        # Delete old read notifications
-        old_notifications = Notification.query.filter(
-            Notification.user_id == user_id,
-            Notification.is_read == True,
-            Notification.created_at < cutoff_date
-        ).all()
-        
-        count = len(old_notifications)
-        for notification in old_notifications:
-            db.session.delete(notification)
-        
+        count = delete_read(user_id, older_than=cutoff_date)
         db.session.commit()
         
         return jsonify({
@@ -4,10 +4,16 @@ from app.models.tracking import SmokingRecord
 from app.models.user import User, UserProfile
 from datetime import datetime, timedelta
 from sqlalchemy import func, desc
-from app.models.notification import Notification
+from app.services.achievement_service import evaluate_achievements
+from app.services.progress_service import locked_profile, update_progress
+from app.services.tracking_service import daily_series, ingest_records, insert_check_in, record_statistics
+from app.services.analytics_service import top_triggers, trigger_mood_matrix, weekly_trigger_trend
+from app.services.trend_service import stored_trends, user_trends
+from app.utils.pagination import InvalidCursor, include_total_arg, keyset_page, offset_page
 bp = Blueprint('tracking', __name__)
 
-CIGARETTE_PRICE = 25  # ✅ CONSTANT PRICE
+MAX_TREND_DAYS = 3650
+MAX_BATCH_RECORDS = 366
 
 # -------------------- CREATE RECORD --------------------
 @bp.route('/record', methods=['POST'])
@@ -25,44 +31,23 @@ def create_record():
 
         record_date = datetime.strptime(data['record_date'], '%Y-%m-%d').date()
 
-        existing_record = SmokingRecord.query.filter_by(
-            user_id=user_id, record_date=record_date
-        ).first()
-        if existing_record:
+        # Lock the profile first so check-ins of one user apply their counter changes in turn
+        profile = locked_profile(user_id)
+
+        new_record = insert_check_in(user_id, {
+            'record_date': record_date,
+            'cigarettes_smoked': data['cigarettes_smoked'],
+            'cravings_count': data.get('cravings_count', 0),
+            'mood': data.get('mood'),
+            'triggers': data.get('triggers'),
+            'notes': data.get('notes')
+        })
+        if new_record is None:
+            db.session.rollback()
             return jsonify({'error': 'Record already exists for this date. Use PUT to update.'}), 400
 
-        new_record = SmokingRecord(
-            user_id=user_id,
-            record_date=record_date,
-            cigarettes_smoked=data['cigarettes_smoked'],
-            cravings_count=data.get('cravings_count', 0),
-            mood=data.get('mood'),
-            triggers=data.get('triggers'),
-            notes=data.get('notes')
-        )
-        db.session.add(new_record)
-
-        profile = UserProfile.query.filter_by(user_id=user_id).first()
-        if not profile:
-            profile = UserProfile(user_id=user_id)
-            db.session.add(profile)
-
-        # ---- STREAK LOGIC ----
-        if data['cigarettes_smoked'] == 0:
-            profile.current_streak_days = (profile.current_streak_days or 0) + 1
-            profile.longest_streak_days = max(
-                profile.longest_streak_days or 0,
-                profile.current_streak_days
-            )
-        else:
-            profile.current_streak_days = 0
-
-        # ---- MONEY & AVOIDED CALCULATION (BACKEND ONLY) ----
-        cigarettes_per_day = profile.cigarettes_per_day or 0
-        avoided = max(cigarettes_per_day - data['cigarettes_smoked'], 0)
-
-        profile.total_cigarettes_avoided = (profile.total_cigarettes_avoided or 0) + avoided
-        profile.total_money_saved = (profile.total_money_saved or 0) + (avoided * CIGARETTE_PRICE)
+        # ---- STREAK, MONEY & AVOIDED (BACKEND ONLY) ----
+        update_progress(profile, [(record_date, None, data['cigarettes_smoked'])])
 
         profile.updated_at = datetime.utcnow()
         
@@ -70,61 +55,7 @@ def create_record():
         db.session.commit()
 
         # -------------------- CHECK ACHIEVEMENTS --------------------
-        from app.models.achievement import Achievement, UserAchievement
-        all_achievements = Achievement.query.all()
-        earned_ids = [id[0] for id in db.session.query(UserAchievement.achievement_id).filter_by(user_id=user_id).all()]
-        newly_earned = []
-
-        for achievement in all_achievements:
-            if achievement.id in earned_ids:
-                continue
-
-            earned = False
-
-            if achievement.criteria_type == 'days_smoke_free' and profile:
-                if profile.longest_streak_days and profile.longest_streak_days >= achievement.criteria_value:
-                    earned = True
-
-            elif achievement.criteria_type == 'money_saved' and profile:
-                if profile.total_money_saved >= achievement.criteria_value:
-                    earned = True
-
-            elif achievement.criteria_type == 'goals_completed':
-                from app.models.goal import Goal
-                completed_goals = Goal.query.filter_by(user_id=user_id, status='completed').count()
-                if completed_goals >= achievement.criteria_value:
-                    earned = True
-
-            elif achievement.criteria_type == 'content_completed':
-                from app.models.content import UserContentProgress
-                completed_content = UserContentProgress.query.filter_by(user_id=user_id, completed=True).count()
-                if completed_content >= achievement.criteria_value:
-                    earned = True
-
-            elif achievement.criteria_type == 'total_records':
-                total_records = SmokingRecord.query.filter_by(user_id=user_id).count()
-                if total_records >= achievement.criteria_value:
-                    earned = True
-
-            if earned:
-                # Add achievement
-                user_achievement = UserAchievement(user_id=user_id, achievement_id=achievement.id)
-                db.session.add(user_achievement)
-                
-                # ADD NOTIFICATION HERE
-                notification = Notification(
-                    user_id=user_id,
-                    notification_type='achievement_earned',
-                    title='New Achievement!',
-                    message=f"Congratulations! You earned: {achievement.name}",
-                    is_read=False,
-                    created_at=datetime.utcnow()
-                )
-                db.session.add(notification)
-                
-                print(f"NOTIFICATION: Created notification for achievement: {achievement.name}")
-                
-                newly_earned.append(achievement.to_dict())
+        newly_earned = [achievement.to_dict() for achievement in evaluate_achievements(user_id)]
 
         if newly_earned:
             # SECOND COMMIT - Save achievements and notifications
@@ -145,6 +76,56 @@ def create_record():
         traceback.print_exc()
         return jsonify({'error': str(e)}), 500
 
+# -------------------- BATCH RECORDS (OFFLINE SYNC) --------------------
+@bp.route('/records/batch', methods=['POST'])
+def create_records_batch():
+    """
+    Upsert several daily check-ins at once, e.g. after the app was offline.
+
+    Body: {"user_id": 1, "records": [{"record_date": "2025-01-01", "cigarettes_smoked": 0, ...}]}.
+    Each item replaces the record of its day (insert or update); every item
+    gets its own status.
+    """
+    try:
+        data = request.get_json() or {}
+        records = data.get('records')
+
+        if not data.get('user_id') or not isinstance(records, list) or not records:
+            return jsonify({'error': 'user_id and records (non-empty array) are required'}), 400
+        if len(records) > MAX_BATCH_RECORDS:
+            return jsonify({'error': f'At most {MAX_BATCH_RECORDS} records per batch'}), 400
+
+        user_id = data['user_id']
+        user = User.query.get(user_id)
+        if not user:
+            return jsonify({'error': 'User not found'}), 404
+
+        profile = locked_profile(user_id)
+        results, changes = ingest_records(user_id, records)
+
+        # ---- STREAK, MONEY & AVOIDED: once for the whole batch ----
+        update_progress(profile, changes)
+        profile.updated_at = datetime.utcnow()
+
+        newly_earned = [achievement.to_dict() for achievement in evaluate_achievements(user_id)]
+        db.session.commit()
+
+        statuses = [result['status'] for result in results]
+        return jsonify({
+            'message': 'Records synced',
+            'created_count': statuses.count('created'),
+            'updated_count': statuses.count('updated'),
+            'failed_count': statuses.count('error'),
+            'results': results,
+            'profile': profile.to_dict(),
+            'newly_earned_achievements': newly_earned
+        }), 200
+
+    except Exception as e:
+        db.session.rollback()
+        return jsonify({'error': str(e)}), 500
+
+
 # -------------------- GET ALL RECORDS --------------------
 @bp.route('/records/<int:user_id>', methods=['GET'])
 def get_records(user_id):
@@ -155,18 +136,38 @@ def get_records(user_id):
 
         page = request.args.get('page', 1, type=int)
         per_page = request.args.get('per_page', 20, type=int)
+        cursor = request.args.get('cursor')
+        include_total = include_total_arg(request.args)
 
-        query = SmokingRecord.query.filter_by(user_id=user_id).order_by(desc(SmokingRecord.record_date))
-        pagination = query.paginate(page=page, per_page=per_page, error_out=False)
+        query = SmokingRecord.query.filter_by(user_id=user_id)
+
+        if cursor is not None:
+            # One record per user and day: record_date alone is the keyset, served by the unique index
+            records, next_cursor, total = keyset_page(
+                query, [SmokingRecord.record_date], per_page, cursor, descending=True, with_total=include_total
+            )
+            return jsonify({
+                'records': [record.to_dict() for record in records],
+                'total': total,
+                'next_cursor': next_cursor,
+                'per_page': per_page
+            }), 200
+
+        records, total, pages, has_next = offset_page(
+            query.order_by(desc(SmokingRecord.record_date)), page, per_page, with_total=include_total
+        )
 
         return jsonify({
-            'records': [record.to_dict() for record in pagination.items],
-            'total': pagination.total,
-            'pages': pagination.pages,
+            'records': [record.to_dict() for record in records],
+            'total': total,
+            'pages': pages,
             'current_page': page,
+            'has_next': has_next,
             'per_page': per_page
         }), 200
 
+    except InvalidCursor:
+        return jsonify({'error': 'Invalid cursor'}), 400
     except Exception as e:
         return jsonify({'error': str(e)}), 500
 
@@ -193,35 +194,16 @@ def update_record(record_id):
         if not record:
             return jsonify({'error': 'Record not found'}), 404
 
-        profile = UserProfile.query.filter_by(user_id=record.user_id).first()
-        if not profile:
-            profile = UserProfile(user_id=record.user_id)
-            db.session.add(profile)
+        profile = locked_profile(record.user_id)
+        # Re-read under the lock in case a concurrent request just changed it
+        db.session.refresh(record)
 
         old_cigarettes = record.cigarettes_smoked or 0
         new_cigarettes = data.get('cigarettes_smoked', old_cigarettes) or 0
         record.cigarettes_smoked = new_cigarettes
 
-        # ---- STREAK UPDATE ----
-        if old_cigarettes > 0 and new_cigarettes == 0:
-            profile.current_streak_days = (profile.current_streak_days or 0) + 1
-            profile.longest_streak_days = max(profile.longest_streak_days or 0, profile.current_streak_days)
-        elif old_cigarettes == 0 and new_cigarettes > 0:
-            profile.current_streak_days = 0
-
-        cigarettes_per_day = profile.cigarettes_per_day or 0
-        old_avoided = max(cigarettes_per_day - old_cigarettes, 0)
-        new_avoided = max(cigarettes_per_day - new_cigarettes, 0)
-
-        profile.total_cigarettes_avoided = (
-            (profile.total_cigarettes_avoided or 0) - old_avoided + new_avoided
-        )
-
-        profile.total_money_saved = (
-            (profile.total_money_saved or 0)
-            - (old_avoided * CIGARETTE_PRICE)
-            + (new_avoided * CIGARETTE_PRICE)
-        )
+        # ---- STREAK, MONEY & AVOIDED ----
+        update_progress(profile, [(record.record_date, old_cigarettes, new_cigarettes)])
 
         for field in ['cravings_count', 'mood', 'triggers', 'notes']:
             if field in data:
@@ -233,61 +215,7 @@ def update_record(record_id):
         db.session.commit()
 
         # -------------------- CHECK ACHIEVEMENTS --------------------
-        from app.models.achievement import Achievement, UserAchievement
-        all_achievements = Achievement.query.all()
-        earned_ids = [id[0] for id in db.session.query(UserAchievement.achievement_id).filter_by(user_id=record.user_id).all()]
-        newly_earned = []
-
-        for achievement in all_achievements:
-            if achievement.id in earned_ids:
-                continue
-
-            earned = False
-
-            if achievement.criteria_type == 'days_smoke_free' and profile:
-                if profile.longest_streak_days and profile.longest_streak_days >= achievement.criteria_value:
-                    earned = True
-
-            elif achievement.criteria_type == 'money_saved' and profile:
-                if profile.total_money_saved >= achievement.criteria_value:
-                    earned = True
-
-            elif achievement.criteria_type == 'goals_completed':
-                from app.models.goal import Goal
-                completed_goals = Goal.query.filter_by(user_id=record.user_id, status='completed').count()
-                if completed_goals >= achievement.criteria_value:
-                    earned = True
-
-            elif achievement.criteria_type == 'content_completed':
-                from app.models.content import UserContentProgress
-                completed_content = UserContentProgress.query.filter_by(user_id=record.user_id, completed=True).count()
-                if completed_content >= achievement.criteria_value:
-                    earned = True
-
-            elif achievement.criteria_type == 'total_records':
-                total_records = SmokingRecord.query.filter_by(user_id=record.user_id).count()
-                if total_records >= achievement.criteria_value:
-                    earned = True
-
-            if earned:
-                # Add achievement
-                user_achievement = UserAchievement(user_id=record.user_id, achievement_id=achievement.id)
-                db.session.add(user_achievement)
-                
-                # ADD NOTIFICATION HERE
-                notification = Notification(
-                    user_id=record.user_id,
-                    notification_type='achievement_earned',
-                    title='New Achievement!',
-                    message=f"Congratulations! You earned: {achievement.name}",
-                    is_read=False,
-                    created_at=datetime.utcnow()
-                )
-                db.session.add(notification)
-                
-                print(f"NOTIFICATION: Created notification for achievement: {achievement.name}")
-                
-                newly_earned.append(achievement.to_dict())
+        newly_earned = [achievement.to_dict() for achievement in evaluate_achievements(record.user_id)]
 
         if newly_earned:
             # SECOND COMMIT - Save achievements and notifications
@@ -317,7 +245,10 @@ def delete_record(record_id):
         if not record:
             return jsonify({'error': 'Record not found'}), 404
 
+        profile = locked_profile(record.user_id)
+        db.session.refresh(record)
         db.session.delete(record)
+        update_progress(profile, [(record.record_date, record.cigarettes_smoked, None)])
         db.session.commit()
         return jsonify({'message': 'Record deleted successfully'}), 200
 
@@ -337,14 +268,12 @@ def get_statistics(user_id):
         days = request.args.get('days', 30, type=int)
         start_date = datetime.utcnow().date() - timedelta(days=days)
 
-        records = SmokingRecord.query.filter(
-            SmokingRecord.user_id == user_id,
-            SmokingRecord.record_date >= start_date
-        ).order_by(SmokingRecord.record_date).all()
+        # Aggregates come back from the database as plain numbers
+        stats = record_statistics(user_id, start_date)
 
         profile = UserProfile.query.filter_by(user_id=user_id).first()
 
-        if not records:
+        if not stats['total_records']:
             return jsonify({
                 'statistics': {
                     'total_records': 0,
@@ -360,39 +289,20 @@ def get_statistics(user_id):
                 'daily_data': []
             }), 200
 
-        total_cigarettes = sum(r.cigarettes_smoked for r in records)
-        total_cravings = sum(r.cravings_count for r in records)
-        smoke_free_days = sum(1 for r in records if r.cigarettes_smoked == 0)
-
-        moods = [r.mood for r in records if r.mood]
-        most_common_mood = max(set(moods), key=moods.count) if moods else None
-
-        all_triggers = [t.strip() for r in records if r.triggers for t in r.triggers.split(',')]
-        most_common_trigger = max(set(all_triggers), key=all_triggers.count) if all_triggers else None
-
-        daily_data = [
-            {
-                'date': r.record_date.isoformat(),
-                'cigarettes': r.cigarettes_smoked,
-                'cravings': r.cravings_count,
-                'mood': r.mood
-            } for r in records
-        ]
-
         return jsonify({
             'statistics': {
-                'total_records': len(records),
-                'total_cigarettes': total_cigarettes,
-                'average_per_day': round(total_cigarettes / len(records), 2),
-                'total_cravings': total_cravings,
-                'smoke_free_days': smoke_free_days,
-                'most_common_mood': most_common_mood,
-                'most_common_trigger': most_common_trigger,
+                'total_records': stats['total_records'],
+                'total_cigarettes': stats['total_cigarettes'],
+                'average_per_day': round(stats['total_cigarettes'] / stats['total_records'], 2),
+                'total_cravings': stats['total_cravings'],
+                'smoke_free_days': stats['smoke_free_days'],
+                'most_common_mood': stats['most_common_mood'],
+                'most_common_trigger': stats['most_common_trigger'],
                 'days_analyzed': days,
-                'total_money_saved': float(profile.total_money_saved or 0),
-                'total_cigarettes_avoided': profile.total_cigarettes_avoided or 0
+                'total_money_saved': float(profile.total_money_saved or 0) if profile else 0,
+                'total_cigarettes_avoided': profile.total_cigarettes_avoided or 0 if profile else 0
             },
-            'daily_data': daily_data
+            'daily_data': daily_series(user_id, start_date)
         }), 200
 
     except Exception as e:
@@ -406,45 +316,73 @@ def get_trends(user_id):
         if not user:
             return jsonify({'error': 'User not found'}), 404
 
-        thirty_days_ago = datetime.utcnow().date() - timedelta(days=30)
-        records = SmokingRecord.query.filter(
-            SmokingRecord.user_id == user_id,
-            SmokingRecord.record_date >= thirty_days_ago
-        ).order_by(SmokingRecord.record_date).all()
-
-        if len(records) < 2:
-            return jsonify({'trend': 'insufficient_data'}), 200
-
-        weeks = []
-        current_week = []
-        week_start = records[0].record_date
-
-        for record in records:
-            if (record.record_date - week_start).days >= 7:
-                weeks.append(sum(r.cigarettes_smoked for r in current_week) / len(current_week))
-                current_week = [record]
-                week_start = record.record_date
-            else:
-                current_week.append(record)
-
-        if current_week:
-            weeks.append(sum(r.cigarettes_smoked for r in current_week) / len(current_week))
-
-        trend = 'stable'
-        change = 0
-        if len(weeks) >= 2:
-            if weeks[-1] < weeks[0]:
-                trend = 'improving'
-                change = round(((weeks[0] - weeks[-1]) / weeks[0]) * 100, 1)
-            elif weeks[-1] > weeks[0]:
-                trend = 'worsening'
-                change = round(((weeks[-1] - weeks[0]) / weeks[0]) * 100, 1)
+        days = request.args.get('days', 30, type=int)
+        if not 2 <= days <= MAX_TREND_DAYS:
+            return jsonify({'error': f'days must be between 2 and {MAX_TREND_DAYS}'}), 400
+
+        # Nightly payload while no check-in has happened since, else computed live
+        trends = stored_trends(user_id, days) or user_trends(user_id, days)
+        return jsonify(trends), 200
+
+    except Exception as e:
+        return jsonify({'error': str(e)}), 500
+
+
+# -------------------- TRIGGER ANALYTICS --------------------
+@bp.route('/triggers/top/<int:user_id>', methods=['GET'])
+def get_top_triggers(user_id):
+    try:
+        user = User.query.get(user_id)
+        if not user:
+            return jsonify({'error': 'User not found'}), 404
+
+        days = request.args.get('days', 30, type=int)
+        limit = request.args.get('limit', 10, type=int)
+        start_date = datetime.utcnow().date() - timedelta(days=days)
+
+        return jsonify({
+            'triggers': top_triggers(user_id, start_date, limit=limit),
+            'days_analyzed': days
+        }), 200
+
+    except Exception as e:
+        return jsonify({'error': str(e)}), 500
+
+
+@bp.route('/triggers/moods/<int:user_id>', methods=['GET'])
+def get_trigger_moods(user_id):
+    try:
+        user = User.query.get(user_id)
+        if not user:
+            return jsonify({'error': 'User not found'}), 404
+
+        days = request.args.get('days', 30, type=int)
+        start_date = datetime.utcnow().date() - timedelta(days=days)
+
+        return jsonify({
+            'co_occurrence': trigger_mood_matrix(user_id, start_date),
+            'days_analyzed': days
+        }), 200
+
+    except Exception as e:
+        return jsonify({'error': str(e)}), 500
+
+
+@bp.route('/triggers/weekly/<int:user_id>', methods=['GET'])
+def get_weekly_triggers(user_id):
+    try:
+        user = User.query.get(user_id)
+        if not user:
+            return jsonify({'error': 'User not found'}), 404
+
+        days = request.args.get('days', 90, type=int)
+        trigger = request.args.get('trigger')
+        start_date = datetime.utcnow().date() - timedelta(days=days)
 
         return jsonify({
-            'trend': trend,
-            'change_percentage': change,
-            'weekly_averages': [round(w, 1) for w in weeks],
-            'total_weeks_analyzed': len(weeks)
+            'weeks': weekly_trigger_trend(user_id, start_date, trigger=trigger),
+            'trigger': trigger,
+            'days_analyzed': days
         }), 200
 
     except Exception as e:
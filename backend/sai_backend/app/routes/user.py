@@ -1,10 +1,9 @@
 from flask import Blueprint, request, jsonify
 from app.extensions import db
 from app.models.user import User, UserProfile
-from app.models.tracking import SmokingRecord
-from app.models.goal import Goal
-from datetime import datetime, timedelta
-from sqlalchemy import func
+from app.services.progress_service import recompute_progress
+from app.services.user_service import dashboard_row, window_average
+from datetime import datetime
 
 bp = Blueprint('user', __name__)
 
@@ -111,6 +110,7 @@ def update_profile(user_id):
         if 'smoking_start_age' in data:
             profile.smoking_start_age = data['smoking_start_age']
 
+        recompute_savings = 'cigarettes_per_day' in data and data['cigarettes_per_day'] != profile.cigarettes_per_day
         if 'cigarettes_per_day' in data:
             profile.cigarettes_per_day = data['cigarettes_per_day']
 
@@ -134,6 +134,10 @@ def update_profile(user_id):
 
         profile.updated_at = datetime.utcnow()
 
+        # Savings of every past check-in depend on cigarettes_per_day
+        if recompute_savings:
+            recompute_progress([user_id])
+
         # ---------- SAVE ----------
         db.session.commit()
 
@@ -151,44 +155,21 @@ def update_profile(user_id):
 def get_statistics(user_id):
     """Get user statistics dashboard"""
     try:
-        user = User.query.get(user_id)
-        if not user:
+        # User, profile and the incrementally maintained summary in one row
+        row = dashboard_row(user_id)
+        if not row:
             return jsonify({'error': 'User not found'}), 404
         
-        profile = UserProfile.query.filter_by(user_id=user_id).first()
-        
-        # Get smoking records statistics
-        total_records = SmokingRecord.query.filter_by(user_id=user_id).count()
-        
-        # Last 7 days records
-        seven_days_ago = datetime.utcnow().date() - timedelta(days=7)
-        recent_records = SmokingRecord.query.filter(
-            SmokingRecord.user_id == user_id,
-            SmokingRecord.record_date >= seven_days_ago
-        ).all()
-        
-        # Calculate average cigarettes per day (last 7 days)
-        avg_cigarettes = 0
-        if recent_records:
-            total_cigarettes = sum(record.cigarettes_smoked for record in recent_records)
-            avg_cigarettes = total_cigarettes / len(recent_records)
-        
-        # Get active goals
-        active_goals = Goal.query.filter_by(user_id=user_id, status='active').count()
-        completed_goals = Goal.query.filter_by(user_id=user_id, status='completed').count()
-        
-        # Get all-time statistics
-        all_records = SmokingRecord.query.filter_by(user_id=user_id).all()
-        total_cigarettes_logged = sum(record.cigarettes_smoked for record in all_records)
+        _, profile, summary = row
         
         return jsonify({
             'profile': profile.to_dict() if profile else None,
             'statistics': {
-                'total_records': total_records,
-                'avg_cigarettes_last_7_days': round(avg_cigarettes, 1),
-                'total_cigarettes_logged': total_cigarettes_logged,
-                'active_goals': active_goals,
-                'completed_goals': completed_goals,
+                'total_records': summary.total_records if summary else 0,
+                'avg_cigarettes_last_7_days': round(window_average(summary), 1),
+                'total_cigarettes_logged': summary.total_cigarettes if summary else 0,
+                'active_goals': summary.active_goals if summary else 0,
+                'completed_goals': summary.completed_goals if summary else 0,
                 'current_streak_days': profile.current_streak_days if profile else 0,
                 'longest_streak_days': profile.longest_streak_days if profile else 0,
                 'total_money_saved': float(profile.total_money_saved) if profile and profile.total_money_saved else 0.0,
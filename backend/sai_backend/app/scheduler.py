@@ -1,46 +1,221 @@
-# app/check_goals.py
-from datetime import date
+"""
+Periodic jobs and the background scheduler that runs them.
+
+The job wrappers print their progress and re-raise on failure; they are
+also what the `flask sai ...` commands call.
+
+`Scheduler` runs the jobs named in SCHEDULER_JOBS, either as its own process
+(`flask sai scheduler`) or as a thread in every web worker
+(SCHEDULER_ENABLED=true):
+
+- Leader election: only the instance holding a PostgreSQL session-level
+  advisory lock runs jobs. The lock is taken with pg_try_advisory_lock on a
+  connection kept checked out for that purpose; the other instances retry
+  every poll. If the leader dies its connection closes, the lock is released
+  and the next instance to poll takes over.
+- Each job runs once per period of its interval, counted from UTC midnight:
+  the run is claimed by inserting (job name, period start) into
+  scheduled_job_runs with ON CONFLICT DO NOTHING, so a new leader never
+  repeats a period the old one finished. A failed run drops its claim and
+  is retried on the next poll; a run cut short by a crash keeps it, and the
+  job runs again in its next period.
+- New periodic jobs (daily check-in reminders, streak milestones, ...) are a
+  wrapper function plus an entry in JOBS.
+"""
+import threading
+from datetime import datetime, time, timedelta
+from flask import current_app
+from sqlalchemy import delete, exc, text, update
+from sqlalchemy.dialects import postgresql
 from app.extensions import db
-from app.models.goal import Goal
-from app.models.notification import Notification
+from app.models.job import ScheduledJobRun
+from app.services.goal_service import send_due_goal_reminders
+from app.services.notification_service import purge_read_notifications
+from app.services.trend_service import TREND_WINDOWS, compute_all_trends
+
+# pg_try_advisory_lock key shared by every scheduler instance of this app ('SAISCHED')
+SCHEDULER_LOCK_KEY = 0x5341495343484544
+
+
+def remind_due_goals():
+    """Send a reminder for every goal due today that was not notified yet"""
+    print("🔍 Checking for due goals...")
+
+    try:
+        sent = send_due_goal_reminders(chunk_size=current_app.config['GOAL_REMINDER_CHUNK_SIZE'])
+        print(f"✅ Sent {sent} goal reminder(s).")
+        return sent
+
+    except Exception as e:
+        db.session.rollback()
+        print(f"❌ Error checking goals: {str(e)}")
+        raise
+
+
+def purge_old_notifications(older_than_days=None):
+    """Retention job: delete read notifications older than the retention window for all users"""
+    days = older_than_days or current_app.config['NOTIFICATION_RETENTION_DAYS']
+    print(f"🧹 Purging read notifications older than {days} days...")
 
-def check_goals_on_startup():
-    """Check for due goals when app starts and send notifications"""
-    print("🔍 Checking for due goals on app startup...")
-    
     try:
-        today = date.today()
-        
-        # Find goals that are due today and not notified yet
-        goals = Goal.query.filter(
-            Goal.target_date == today,
-            Goal.notification_sent == False
-        ).all()
-        
-        if not goals:
-            print("✅ No due goals found today.")
+        purged = purge_read_notifications(days, batch_size=current_app.config['NOTIFICATION_PURGE_BATCH_SIZE'])
+        print(f"✅ Purged {purged} notification(s).")
+        return purged
+
+    except Exception as e:
+        db.session.rollback()
+        print(f"❌ Error purging notifications: {str(e)}")
+        raise
+
+
+def compute_nightly_trends(windows=TREND_WINDOWS):
+    """Nightly job: precompute /api/tracking/trends payloads for every user"""
+    print(f"📈 Computing trends for windows {', '.join(str(days) for days in windows)} days...")
+
+    try:
+        computed = compute_all_trends(windows)
+        print(f"✅ Computed trends for {computed} user(s).")
+        return computed
+
+    except Exception as e:
+        db.session.rollback()
+        print(f"❌ Error computing trends: {str(e)}")
+        raise
+
+
+# Job name -> (wrapper, config key holding its interval in minutes)
+JOBS = {
+    'goal-reminders': (remind_due_goals, 'SCHEDULER_GOAL_REMINDER_MINUTES'),
+    'purge-notifications': (purge_old_notifications, 'SCHEDULER_DAILY_MINUTES'),
+    'compute-trends': (compute_nightly_trends, 'SCHEDULER_DAILY_MINUTES')
+}
+
+
+def period_start(now, interval):
+    """Start of the interval-long period containing `now`, counted from UTC midnight"""
+    midnight = datetime.combine(now.date(), time.min)
+    return midnight + ((now - midnight) // interval) * interval
+
+
+def claim_run(job_name, started):
+    """Insert the run row for this period; returns False if another instance already has it"""
+    table = ScheduledJobRun.__table__
+    statement = postgresql.insert(table).values(
+        job_name=job_name, period_start=started, started_at=datetime.utcnow()
+    ).on_conflict_do_nothing(
+        index_elements=['job_name', 'period_start']
+    ).returning(table.c.job_name)
+    claimed = db.session.execute(statement).first() is not None
+    db.session.commit()
+    return claimed
+
+
+class Scheduler:
+    """Runs the configured jobs while this instance holds the scheduler advisory lock"""
+
+    def __init__(self, app, job_names=None, poll_seconds=None):
+        self.app = app
+        self.job_names = job_names or app.config['SCHEDULER_JOBS']
+        unknown = set(self.job_names) - set(JOBS)
+        if unknown:
+            raise ValueError(f"Unknown scheduler job(s): {', '.join(sorted(unknown))}")
+        self.poll_seconds = poll_seconds or app.config['SCHEDULER_POLL_SECONDS']
+        self.lock_connection = None
+        self._stop = threading.Event()
+        self._thread = None
+
+    def elect(self):
+        """Take or confirm leadership; returns whether this instance may run jobs"""
+        if self.lock_connection is not None:
+            try:
+                self.lock_connection.execute(text('SELECT 1'))
+                self.lock_connection.commit()
+                return True
+            except exc.DBAPIError:
+                # The connection (and with it the lock) is gone; compete again
+                self.lock_connection.invalidate()
+                self.lock_connection.close()
+                self.lock_connection = None
+                print("⚠ Scheduler lost its leader connection.")
+
+        connection = db.engine.connect()
+        acquired = connection.execute(
+            text('SELECT pg_try_advisory_lock(:key)'), {'key': SCHEDULER_LOCK_KEY}
+        ).scalar()
+        # Session-level lock: it outlives the transaction, which must not stay idle open
+        connection.commit()
+        if not acquired:
+            connection.close()
+            return False
+        self.lock_connection = connection
+        print("👑 Scheduler elected leader.")
+        return True
+
+    def resign(self):
+        if self.lock_connection is None:
             return
-        
-        print(f"📅 Found {len(goals)} goal(s) due today.")
-        
-        for goal in goals:
-            # Create notification
-            notification = Notification(
-                user_id=goal.user_id,
-                notification_type='goal_reminder',
-                title='Goal Deadline Today!',
-                message=f'Today is the deadline for your goal: {goal.goal_type.replace("_", " ").title()}'
+        try:
+            self.lock_connection.execute(text('SELECT pg_advisory_unlock(:key)'), {'key': SCHEDULER_LOCK_KEY})
+            self.lock_connection.commit()
+        except exc.DBAPIError:
+            pass
+        self.lock_connection.close()
+        self.lock_connection = None
+
+    def run_job(self, job_name, now=None):
+        """Run `job_name` if its current period has not been claimed yet; returns its result or None"""
+        job, interval_key = JOBS[job_name]
+        started = period_start(now or datetime.utcnow(), timedelta(minutes=self.app.config[interval_key]))
+        if not claim_run(job_name, started):
+            return None
+
+        key = {'job_name': job_name, 'period_start': started}
+        try:
+            result = job()
+        except Exception:
+            db.session.rollback()
+            db.session.execute(delete(ScheduledJobRun).filter_by(**key))
+            db.session.commit()
+            return None
+        db.session.execute(
+            update(ScheduledJobRun).filter_by(**key).values(
+                finished_at=datetime.utcnow(), result=result if isinstance(result, int) else None
             )
-            db.session.add(notification)
-            
-            # Mark as notified
-            goal.notification_sent = True
-            print(f"   ✓ Sent notification for goal: {goal.goal_type} (User {goal.user_id})")
-        
-        # Save everything to database
+        )
         db.session.commit()
-        print(f"✅ Successfully sent {len(goals)} notification(s).")
-        
-    except Exception as e:
-        db.session.rollback()
-        print(f"❌ Error checking goals: {str(e)}")
\ No newline at end of file
+        return result
+
+    def tick(self, now=None):
+        """One poll: elect, then run every job whose period is due; returns {job: result} for jobs run"""
+        with self.app.app_context():
+            try:
+                if not self.elect():
+                    return {}
+                results = {}
+                for job_name in self.job_names:
+                    result = self.run_job(job_name, now)
+                    if result is not None:
+                        results[job_name] = result
+                return results
+            finally:
+                db.session.remove()
+
+    def run_forever(self):
+        while not self._stop.is_set():
+            try:
+                self.tick()
+            except Exception as e:
+                print(f"❌ Scheduler poll failed: {str(e)}")
+            self._stop.wait(self.poll_seconds)
+        with self.app.app_context():
+            self.resign()
+
+    def start(self):
+        self._thread = threading.Thread(target=self.run_forever, name='sai-scheduler', daemon=True)
+        self._thread.start()
+        return self
+
+    def stop(self):
+        self._stop.set()
+        if self._thread is not None:
+            self._thread.join()
@@ -0,0 +1,105 @@
+"""
+Achievement evaluation engine shared by the tracking and achievements routes.
+
+A user's criteria metrics are collected once in a single query, every unearned
+achievement is evaluated against that snapshot in memory and the new
+UserAchievement / Notification rows are bulk-inserted, so the number of
+statements per check does not grow with the achievement catalogue.
+The notification counter cache is bumped in the same transaction.
+"""
+from datetime import datetime
+from sqlalchemy import func, select, insert
+from app.extensions import db
+from app.models.achievement import Achievement, UserAchievement
+from app.models.content import UserContentProgress
+from app.models.goal import Goal
+from app.models.notification import Notification
+from app.models.tracking import SmokingRecord
+from app.models.user import UserProfile
+from app.services.notification_service import adjust_counters
+from app.utils.constants import GOAL_STATUS_COMPLETED, NOTIF_ACHIEVEMENT_EARNED
+
+CRITERIA_TYPES = [
+    'days_smoke_free',
+    'money_saved',
+    'goals_completed',
+    'content_completed',
+    'total_records'
+]
+
+
+def collect_metrics(user_id):
+    """Collect every achievement criteria metric for a user in one query"""
+    row = db.session.execute(
+        select(
+            func.coalesce(
+                select(UserProfile.longest_streak_days).where(
+                    UserProfile.user_id == user_id
+                ).scalar_subquery(), 0
+            ),
+            func.coalesce(
+                select(UserProfile.total_money_saved).where(
+                    UserProfile.user_id == user_id
+                ).scalar_subquery(), 0
+            ),
+            select(func.count(Goal.id)).where(
+                Goal.user_id == user_id,
+                Goal.status == GOAL_STATUS_COMPLETED
+            ).scalar_subquery(),
+            select(func.count(UserContentProgress.id)).where(
+                UserContentProgress.user_id == user_id,
+                UserContentProgress.completed == True
+            ).scalar_subquery(),
+            select(func.count(SmokingRecord.id)).where(
+                SmokingRecord.user_id == user_id
+            ).scalar_subquery()
+        )
+    ).one()
+
+    return dict(zip(CRITERIA_TYPES, row))
+
+
+def is_earned(achievement, metrics):
+    """Check a single achievement against a metrics snapshot"""
+    if achievement.criteria_type not in metrics or achievement.criteria_value is None:
+        return False
+    return metrics[achievement.criteria_type] >= achievement.criteria_value
+
+
+def evaluate_achievements(user_id):
+    """
+    Award every achievement the user now qualifies for.
+
+    Adds the UserAchievement and Notification rows to the current session
+    without committing, and returns the newly earned Achievement objects.
+    """
+    earned_ids = select(UserAchievement.achievement_id).where(UserAchievement.user_id == user_id)
+    unearned = Achievement.query.filter(~Achievement.id.in_(earned_ids)).all()
+    if not unearned:
+        return []
+
+    metrics = collect_metrics(user_id)
+    newly_earned = [achievement for achievement in unearned if is_earned(achievement, metrics)]
+    if not newly_earned:
+        return []
+
+    now = datetime.utcnow()
+    db.session.execute(insert(UserAchievement), [
+        {'user_id': user_id, 'achievement_id': achievement.id, 'earned_at': now}
+        for achievement in newly_earned
+    ])
+    db.session.execute(insert(Notification), [
+        {
+            'user_id': user_id,
+            'notification_type': NOTIF_ACHIEVEMENT_EARNED,
+            'title': 'New Achievement!',
+            'message': f"Congratulations! You earned: {achievement.name}",
+            'is_read': False,
+            'created_at': now
+        }
+        for achievement in newly_earned
+    ])
+    # Core insert bypasses the ORM flush hook, so update the counter cache here
+    adjust_counters([(user_id, NOTIF_ACHIEVEMENT_EARNED, len(newly_earned), len(newly_earned))])
+
+    return newly_earned
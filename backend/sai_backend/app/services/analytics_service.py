@@ -0,0 +1,79 @@
+"""
+Trigger analytics over the normalized record_triggers join table.
+
+Every query starts from the user's check-ins through the
+(user_id, record_date) index and reaches the trigger names through the
+record_triggers primary key, so none of them parses trigger strings.
+"""
+from sqlalchemy import Date, cast, func, select
+from app.extensions import db
+from app.models.tracking import RecordTrigger, SmokingRecord, Trigger
+
+
+def week_start(column):
+    """Monday of the ISO week containing a date column"""
+    return cast(func.date_trunc('week', column), Date)
+
+
+def user_trigger_rows(user_id, start_date):
+    """Base select: the user's check-ins since start_date joined to their trigger names"""
+    return select().select_from(SmokingRecord).join(
+        RecordTrigger, RecordTrigger.record_id == SmokingRecord.id
+    ).join(
+        Trigger, Trigger.id == RecordTrigger.trigger_id
+    ).where(
+        SmokingRecord.user_id == user_id,
+        SmokingRecord.record_date >= start_date
+    )
+
+
+def top_triggers(user_id, start_date, limit=10):
+    """Triggers ranked by how many check-ins mention them, with the cigarettes smoked on those days"""
+    check_ins = func.count(SmokingRecord.id)
+    rows = db.session.execute(
+        user_trigger_rows(user_id, start_date).add_columns(
+            Trigger.name,
+            check_ins,
+            func.coalesce(func.sum(SmokingRecord.cigarettes_smoked), 0)
+        ).group_by(Trigger.name).order_by(check_ins.desc(), Trigger.name).limit(limit)
+    ).all()
+    return [
+        {'trigger': name, 'check_ins': count, 'cigarettes': cigarettes}
+        for name, count, cigarettes in rows
+    ]
+
+
+def trigger_mood_matrix(user_id, start_date):
+    """Trigger x mood co-occurrence counts (check-ins without a mood are left out)"""
+    check_ins = func.count(SmokingRecord.id)
+    rows = db.session.execute(
+        user_trigger_rows(user_id, start_date).add_columns(
+            Trigger.name,
+            SmokingRecord.mood,
+            check_ins
+        ).where(
+            SmokingRecord.mood.is_not(None),
+            SmokingRecord.mood != ''
+        ).group_by(Trigger.name, SmokingRecord.mood).order_by(check_ins.desc(), Trigger.name, SmokingRecord.mood)
+    ).all()
+    return [
+        {'trigger': name, 'mood': mood, 'check_ins': count}
+        for name, mood, count in rows
+    ]
+
+
+def weekly_trigger_trend(user_id, start_date, trigger=None):
+    """Check-ins mentioning each trigger per calendar week (Monday start)"""
+    week = week_start(SmokingRecord.record_date).label('week')
+    statement = user_trigger_rows(user_id, start_date).add_columns(
+        week,
+        Trigger.name,
+        func.count(SmokingRecord.id)
+    ).group_by(week, Trigger.name).order_by(week, Trigger.name)
+    if trigger:
+        statement = statement.where(Trigger.name == trigger)
+
+    return [
+        {'week_start': str(week_start_date), 'trigger': name, 'check_ins': count}
+        for week_start_date, name, count in db.session.execute(statement)
+    ]
@@ -0,0 +1,71 @@
+"""
+Full-text search over educational content.
+
+`educational_content.search_vector` holds a weighted tsvector
+of the title (A) and transcript (B). A trigger maintains it, a GIN index
+serves it, and results are ranked with ts_rank. Three SQL functions created
+by the migration own the text processing, so the index and the queries
+cannot drift apart:
+
+- sai_normalize_arabic(text): strips tashkeel and tatweel and unifies
+  alef (أ إ آ ٱ -> ا), alef maqsura (ى -> ي), ta marbuta (ة -> ه) and hamza
+  seats (ؤ -> و, ئ -> ي), so spelling and vocalisation variants meet;
+- sai_content_document(title, text): the tsvector the trigger stores;
+- sai_search_query(text): the matching plainto_tsquery.
+
+They use the 'arabic' text search configuration (Snowball stemming for
+morphological variants) when the server has it, 'simple' otherwise.
+
+`normalize_arabic` mirrors sai_normalize_arabic in Python. It is used to drop
+Darija question and filler words ("كيفاش", "واش", "باش", ...) from the
+query. These words are rare in transcripts, and every query word must match,
+so one of them would otherwise empty the result list. They stay indexed:
+removing them only on the query side is enough.
+"""
+import re
+from sqlalchemy import desc, func
+from app.extensions import db
+from app.models.content import EducationalContent
+
+SEARCH_LIMIT = 20
+
+# Keep in sync with sai_normalize_arabic (migration 4e2f8b1c7a93)
+TASHKEEL = re.compile('[\u0610-\u061a\u064b-\u065f\u0670\u06d6-\u06ed\u0640]')
+LETTER_FORMS = str.maketrans('أإآٱىةؤئ', 'اااايهوي')
+
+DARIJA_STOPWORDS = [
+    'واش', 'واشنو', 'شنو', 'شنوا', 'كيفاش', 'كيف', 'علاش', 'فين', 'وين', 'منين', 'وقتاش', 'شحال', 'قداش',
+    'باش', 'بش', 'راني', 'راك', 'راكي', 'راه', 'راهي', 'راهم', 'راحنا', 'كاين', 'كاينة', 'ماكانش',
+    'هاد', 'هادي', 'هادا', 'هذا', 'هذه', 'تاع', 'نتاع', 'ديال', 'بزاف', 'شوية', 'ياسر', 'برك', 'غير',
+    'كي', 'كيما', 'لي', 'اللي', 'الذي', 'التي', 'في', 'من', 'على', 'إلى', 'عن', 'مع', 'و', 'أو', 'ولا',
+    'أنا', 'انا', 'نتا', 'نتي', 'هو', 'هي', 'حنا', 'نتوما', 'هوما', 'ما', 'لا', 'يا', 'ني', 'نقدر'
+]
+
+
+def normalize_arabic(text):
+    """Python twin of the sai_normalize_arabic SQL function"""
+    return TASHKEEL.sub('', text or '').lower().translate(LETTER_FORMS)
+
+
+DARIJA_STOPWORD_SET = frozenset(normalize_arabic(word) for word in DARIJA_STOPWORDS)
+
+
+def search_terms(query_text, drop_stopwords=True):
+    """Normalized query words, without Darija stopwords unless nothing else is left"""
+    words = re.findall(r'\w+', normalize_arabic(query_text))
+    if drop_stopwords:
+        return [word for word in words if word not in DARIJA_STOPWORD_SET] or words
+    return words
+
+
+def search_published(query_text, limit=SEARCH_LIMIT, drop_stopwords=True):
+    """Published content matching query_text as [(content, rank)], best match first"""
+    terms = search_terms(query_text, drop_stopwords)
+    if not terms:
+        return []
+    query = func.sai_search_query(' '.join(terms))
+    rank = func.ts_rank(EducationalContent.search_vector, query)
+    return db.session.query(EducationalContent, rank).filter(
+        EducationalContent.is_published == True,
+        EducationalContent.search_vector.op('@@')(query)
+    ).order_by(desc(rank), desc(EducationalContent.created_at)).limit(limit).all()
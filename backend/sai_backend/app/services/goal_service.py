@@ -0,0 +1,72 @@
+"""
+Goal deadline reminders.
+
+`send_due_goal_reminders` is the scheduler's due-goal job. Goals are claimed
+in chunks with one UPDATE ... SET notification_sent = true ... RETURNING
+whose target rows come from a SELECT ... FOR UPDATE SKIP LOCKED, and the
+reminders for a chunk are written with one multi-row INSERT in the same
+transaction. A goal is therefore notified exactly once, even when several
+workers (or a scheduler and `flask sai bootstrap`) run the job at the same
+time: rows claimed by a concurrent transaction are skipped on PostgreSQL,
+and the notification_sent = false re-check drops rows that were committed as
+sent meanwhile.
+"""
+from datetime import date, datetime
+from sqlalchemy import insert, select, update
+from app.extensions import db
+from app.models.goal import Goal
+from app.models.notification import Notification
+from app.services.notification_service import adjust_counters
+from app.utils.constants import NOTIF_GOAL_REMINDER
+
+REMINDER_CHUNK_SIZE = 1000
+
+
+def reminder_row(user_id, goal_type, created_at):
+    return {
+        'user_id': user_id,
+        'notification_type': NOTIF_GOAL_REMINDER,
+        'title': 'Goal Deadline Today!',
+        'message': f'Today is the deadline for your goal: {goal_type.replace("_", " ").title()}',
+        'is_read': False,
+        'created_at': created_at
+    }
+
+
+def send_due_goal_reminders(today=None, chunk_size=REMINDER_CHUNK_SIZE):
+    """
+    Notify every goal due `today` that has not been notified yet; each chunk
+    is its own transaction. Returns the number of reminders sent.
+    """
+    today = today or date.today()
+    sent = 0
+    while True:
+        chunk = select(Goal.id).where(
+            Goal.target_date == today,
+            Goal.notification_sent == False
+        ).order_by(Goal.id).limit(chunk_size).with_for_update(skip_locked=True)
+
+        claimed = db.session.execute(
+            update(Goal).where(
+                Goal.id.in_(chunk.scalar_subquery()),
+                Goal.notification_sent == False
+            ).values(
+                notification_sent=True
+            ).returning(
+                Goal.user_id, Goal.goal_type
+            ).execution_options(synchronize_session=False)
+        ).all()
+
+        if claimed:
+            created_at = datetime.utcnow()
+            db.session.execute(
+                insert(Notification.__table__).values([
+                    reminder_row(user_id, goal_type, created_at) for user_id, goal_type in claimed
+                ])
+            )
+            adjust_counters((user_id, NOTIF_GOAL_REMINDER, 1, 1) for user_id, _ in claimed)
+        db.session.commit()
+
+        sent += len(claimed)
+        if len(claimed) < chunk_size:
+            return sent
@@ -0,0 +1,304 @@
+"""
+RAG / LLM service used by the chat routes.
+
+Besides the synchronous `query_rag` call, this module owns the background
+worker pool used by the asynchronous message mode: the route commits the
+user message and returns immediately, and the assistant reply is written by
+a worker thread in its own short transaction once the RAG API answers.
+The pool lives in the web process, so a reply whose worker died with a
+restart stays pending; `expire_stale_reply` fails it once it is older than
+CHAT_REPLY_TIMEOUT_SECONDS.
+`stream_rag` relays the server-sent events of the RAG streaming endpoint.
+
+`chat_intent_examples` pairs each user message with the intent the RAG
+router recorded on the reply, for `flask sai export-chat-intents`, whose
+JSON lines the notebook's intent classifier trains on.
+"""
+import json
+import os
+from concurrent.futures import ThreadPoolExecutor
+from datetime import datetime, timedelta
+import requests
+from flask import current_app
+from sqlalchemy import func, select
+from app.extensions import db
+from app.models.chat import ChatSession, ChatMessage
+from app.models.user import UserProfile
+from app.utils.constants import SENDER_ASSISTANT, SENDER_USER
+
+# RAG API Configuration
+RAG_API_URL = os.environ.get('RAG_API_URL', 'https://shawana-knurly-merrill.ngrok-free.dev/query')
+RAG_STREAM_URL = os.environ.get('RAG_STREAM_URL', RAG_API_URL.rstrip('/') + '/stream')
+RAG_TIMEOUT = 30
+
+# Intent labels the RAG router records (English or the LLM classifier's Arabic)
+# mapped to the intent classifier's labels
+CHAT_INTENT_LABELS = {
+    'greeting': 'greeting', 'تحية': 'greeting',
+    'smoking': 'smoking', 'سؤال تدخين': 'smoking',
+    'insult': 'insult', 'سب': 'insult',
+    'off_topic': 'off_topic', 'غير ذي صلة': 'off_topic'
+}
+
+REPLY_PENDING = 'pending'
+REPLY_COMPLETED = 'completed'
+REPLY_FAILED = 'failed'
+REPLY_STALE_ERROR = 'reply timed out'
+
+_executor = None
+
+
+def query_rag(message_text, user_id):
+    """
+    Call the RAG API and return (answer_text, metadata).
+
+    Never raises: timeouts, bad statuses and connection errors are turned
+    into a user-facing Darija message plus error metadata.
+    """
+    try:
+        rag_response = requests.post(
+            RAG_API_URL,
+            json={'query': message_text},
+            timeout=RAG_TIMEOUT
+        )
+
+        if rag_response.status_code == 200:
+            rag_data = rag_response.json()
+            ai_response_text = rag_data.get('answer', 'عذرا، ما قدرتش نجاوب دابا.')
+            # Store RAG metadata (sources, confidence, etc.)
+            rag_metadata = {
+                'intent': rag_data.get('query_type'),
+                'confidence': rag_data.get('confidence'),
+                'sources_used': len(rag_data.get('sources', [])),
+                'use_rag': rag_data.get('use_rag', False)
+            }
+        else:
+            ai_response_text = 'عذرا، صار خلل في الخدمة. حاول مرة أخرى.'
+            rag_metadata = {'error': 'RAG API returned non-200 status'}
+    except requests.exceptions.Timeout:
+        ai_response_text = 'عذرا، الطلب أخذ وقت طويل. حاول مرة أخرى.'
+        rag_metadata = {'error': 'timeout'}
+    except Exception as e:
+        # Fallback to placeholder if RAG API fails
+        ai_response_text = generate_placeholder_response(message_text, user_id)
+        rag_metadata = {'error': str(e), 'fallback': True}
+
+    return ai_response_text, rag_metadata
+
+
+def stream_rag(message_text, user_id):
+    """
+    Yield (event, data) pairs from the RAG streaming endpoint.
+
+    The RAG service sends "meta", "token", "done" and "error" events. Failures
+    are reported as a single "error" event carrying a user-facing answer, with
+    the same fallbacks as query_rag.
+    """
+    try:
+        with requests.post(
+            RAG_STREAM_URL,
+            json={'query': message_text},
+            stream=True,
+            timeout=RAG_TIMEOUT
+        ) as rag_response:
+            if rag_response.status_code != 200:
+                yield 'error', {
+                    'answer': 'عذرا، صار خلل في الخدمة. حاول مرة أخرى.',
+                    'error': 'RAG API returned non-200 status'
+                }
+                return
+
+            # chunk_size=None hands over each chunk as it arrives instead of waiting for 512 bytes
+            yield from parse_sse(rag_response.iter_lines(chunk_size=None))
+    except requests.exceptions.Timeout:
+        yield 'error', {'answer': 'عذرا، الطلب أخذ وقت طويل. حاول مرة أخرى.', 'error': 'timeout'}
+    except Exception as e:
+        yield 'error', {
+            'answer': generate_placeholder_response(message_text, user_id),
+            'error': str(e),
+            'fallback': True
+        }
+
+
+def parse_sse(lines):
+    """Parse server-sent event lines (bytes or str) into (event, data) pairs"""
+    event, data_lines = 'message', []
+    for raw_line in lines:
+        line = raw_line.decode('utf-8') if isinstance(raw_line, bytes) else raw_line
+        if not line:
+            if data_lines:
+                yield event, json.loads('\n'.join(data_lines))
+            event, data_lines = 'message', []
+        elif line.startswith('event:'):
+            event = line[len('event:'):].strip()
+        elif line.startswith('data:'):
+            data_lines.append(line[len('data:'):].lstrip())
+
+
+def sse_event(event, data):
+    """Format one server-sent event"""
+    return f"event: {event}\ndata: {json.dumps(data, ensure_ascii=False)}\n\n"
+
+
+def get_executor():
+    """Lazily create the worker pool shared by all async chat requests"""
+    global _executor
+    if _executor is None:
+        _executor = ThreadPoolExecutor(
+            max_workers=current_app.config.get('CHAT_WORKERS', 8),
+            thread_name_prefix='chat-worker'
+        )
+    return _executor
+
+
+def dispatch_reply(user_message_id):
+    """Queue the RAG call for a committed user message on the worker pool"""
+    app = current_app._get_current_object()
+    return get_executor().submit(complete_reply, app, user_message_id)
+
+
+def complete_reply(app, user_message_id):
+    """
+    Worker body: fetch the answer and persist the assistant message.
+
+    No transaction is held while the RAG API is being called; the user
+    message row is read up front, then released before the HTTP request.
+    """
+    with app.app_context():
+        try:
+            user_message = db.session.get(ChatMessage, user_message_id)
+            session_id = user_message.session_id
+            message_text = user_message.message_text
+            user_id = user_message.session.user_id
+            db.session.rollback()
+
+            ai_response_text, rag_metadata = query_rag(message_text, user_id)
+
+            ai_message = ChatMessage(
+                session_id=session_id,
+                sender_type=SENDER_ASSISTANT,
+                message_text=ai_response_text,
+                message_metadata=rag_metadata
+            )
+            db.session.add(ai_message)
+
+            session = db.session.get(ChatSession, session_id)
+            session.last_message_at = datetime.utcnow()
+            session.message_count = ChatSession.message_count + 1
+
+            db.session.flush()
+            set_reply_status(db.session.get(ChatMessage, user_message_id), REPLY_COMPLETED, ai_message.id)
+            db.session.commit()
+
+        except Exception as e:
+            db.session.rollback()
+            print(f"ERROR in chat worker for message {user_message_id}: {str(e)}")
+            user_message = db.session.get(ChatMessage, user_message_id)
+            if user_message:
+                set_reply_status(user_message, REPLY_FAILED, error=str(e))
+                db.session.commit()
+        finally:
+            db.session.remove()
+
+
+def set_reply_status(user_message, status, reply_message_id=None, error=None):
+    """Record the async reply state in the user message metadata"""
+    metadata = dict(user_message.message_metadata or {})
+    metadata['reply_status'] = status
+    if reply_message_id is not None:
+        metadata['reply_message_id'] = reply_message_id
+    if error is not None:
+        metadata['reply_error'] = error
+    # Reassign so SQLAlchemy detects the JSON change
+    user_message.message_metadata = metadata
+
+
+def reply_is_stale(user_message):
+    """True once a pending reply is older than CHAT_REPLY_TIMEOUT_SECONDS"""
+    timeout = timedelta(seconds=current_app.config['CHAT_REPLY_TIMEOUT_SECONDS'])
+    return user_message.created_at < datetime.utcnow() - timeout
+
+
+def expire_stale_reply(user_message_id):
+    """
+    Mark a stale pending reply as failed and return the user message.
+
+    The row is re-read under a lock, so a worker that completes the reply
+    at the same moment wins and its reply is kept.
+    """
+    user_message = db.session.get(ChatMessage, user_message_id, with_for_update=True, populate_existing=True)
+    if (user_message.message_metadata or {}).get('reply_status') == REPLY_PENDING:
+        set_reply_status(user_message, REPLY_FAILED, error=REPLY_STALE_ERROR)
+    db.session.commit()
+    return user_message
+
+
+def generate_placeholder_response(user_message, user_id):
+    """
+    Placeholder response generator
+    TODO: Replace with actual LLM service call
+    """
+
+    # Get user profile for personalization
+    profile = UserProfile.query.filter_by(user_id=user_id).first()
+
+    user_message_lower = user_message.lower()
+
+    # Simple keyword-based responses (placeholder)
+    if 'help' in user_message_lower or 'مساعدة' in user_message_lower:
+        return "مرحبا! أنا هنا لمساعدتك في رحلتك للإقلاع عن التدخين. كيف يمكنني مساعدتك اليوم؟"
+
+    elif 'craving' in user_message_lower or 'رغبة' in user_message_lower:
+        return "أفهم أنك تشعر برغبة في التدخين. جرب أخذ نفس عميق، اشرب الماء، أو قم بنشاط بدني قصير. الرغبة ستمر في غضون دقائق!"
+
+    elif 'motivation' in user_message_lower or 'تحفيز' in user_message_lower:
+        if profile and profile.current_streak_days > 0:
+            return f"رائع! لديك {profile.current_streak_days} يوم بدون تدخين! استمر في هذا المجهود الرائع. أنت أقوى من الإدمان!"
+        else:
+            return "كل يوم بدون تدخين هو انتصار! أنت تستطيع فعل ذلك. فكر في صحتك وعائلتك."
+
+    elif 'stress' in user_message_lower or 'توتر' in user_message_lower or 'قلق' in user_message_lower:
+        return "التوتر طبيعي، لكن التدخين ليس الحل. جرب تقنيات التنفس، المشي، أو التحدث مع صديق. لديك القوة للتعامل مع التوتر بدون سجائر!"
+
+    elif 'goal' in user_message_lower or 'هدف' in user_message_lower:
+        return "تحديد أهداف واضحة مهم جدا! ما هو هدفك اليوم؟ يمكنني مساعدتك في تتبع تقدمك."
+
+    else:
+        return "شكرا لمشاركتك. أنا هنا لدعمك في رحلتك للإقلاع عن التدخين. هل لديك أي أسئلة محددة؟"
+
+
+def chat_intent_examples(since=None):
+    """
+    (user message text, intent) pairs from the chat history, oldest first.
+
+    The intent is the router's label on the assistant reply that directly
+    follows the message in its session; replies the user flagged and labels
+    the classifier does not know are skipped, and each text is kept once.
+    """
+    order = (ChatMessage.created_at, ChatMessage.id)
+    messages = select(
+        ChatMessage.id,
+        ChatMessage.sender_type,
+        ChatMessage.message_text,
+        ChatMessage.created_at,
+        func.lead(ChatMessage.sender_type).over(partition_by=ChatMessage.session_id, order_by=order).label('reply_sender'),
+        func.lead(ChatMessage.flagged).over(partition_by=ChatMessage.session_id, order_by=order).label('reply_flagged'),
+        func.lead(ChatMessage.message_metadata['intent'].as_string()).over(
+            partition_by=ChatMessage.session_id, order_by=order
+        ).label('intent')
+    ).subquery()
+    query = select(messages.c.message_text, messages.c.intent).where(
+        messages.c.sender_type == SENDER_USER,
+        messages.c.reply_sender == SENDER_ASSISTANT,
+        messages.c.reply_flagged.isnot(True),
+        messages.c.intent.in_(list(CHAT_INTENT_LABELS))
+    ).order_by(messages.c.created_at, messages.c.id)
+    if since is not None:
+        query = query.where(messages.c.created_at >= since)
+
+    seen = set()
+    for text, intent in db.session.execute(query):
+        text = text.strip()
+        if text and text not in seen:
+            seen.add(text)
+            yield text, CHAT_INTENT_LABELS[intent]
@@ -0,0 +1,237 @@
+"""
+Request instrumentation.
+
+`request_profiler` (registered by create_app) times every request and, via
+before/after_cursor_execute listeners on all engines, the SQL statements it
+issues, aggregated per blueprint and endpoint for GET /api/metrics.
+"""
+import heapq
+import itertools
+import os
+import sys
+import tempfile
+import threading
+import time
+from collections import Counter
+from flask import current_app, g, has_request_context, request
+from sqlalchemy import event
+from sqlalchemy.engine import Engine
+from app.db_pool import pool_snapshot
+
+# Wall-time histogram buckets (seconds) for the Prometheus exposition
+REQUEST_BUCKETS = (0.01, 0.025, 0.05, 0.1, 0.25, 0.5, 1.0, 2.5, 5.0, 10.0)
+STATEMENT_TEXT_LENGTH = 200
+# Stack sampling interval of the debug flamegraph profiler
+SAMPLE_INTERVAL_SECONDS = 0.001
+
+
+def statement_text(statement):
+    return ' '.join(statement.split())[:STATEMENT_TEXT_LENGTH]
+
+
+class EndpointStats:
+    """Request and SQL totals of one (blueprint, endpoint)"""
+
+    def __init__(self):
+        self.requests = 0
+        self.wall_seconds = 0.0
+        self.wall_seconds_max = 0.0
+        self.buckets = [0] * len(REQUEST_BUCKETS)
+        self.statements = 0
+        self.db_seconds = 0.0
+        # {statement: slowest execution seconds}, trimmed to the top N statements
+        self.slowest = {}
+
+    def add(self, wall_seconds, statements, top_statements):
+        self.requests += 1
+        self.wall_seconds += wall_seconds
+        self.wall_seconds_max = max(self.wall_seconds_max, wall_seconds)
+        for index, bound in enumerate(REQUEST_BUCKETS):
+            if wall_seconds <= bound:
+                self.buckets[index] += 1
+        self.statements += len(statements)
+        self.db_seconds += sum(seconds for seconds, _ in statements)
+        for seconds, statement in statements:
+            if seconds > self.slowest.get(statement, 0.0):
+                self.slowest[statement] = seconds
+        if len(self.slowest) > top_statements:
+            self.slowest = dict(heapq.nlargest(top_statements, self.slowest.items(), key=lambda item: item[1]))
+
+    def to_dict(self):
+        return {
+            'requests': self.requests,
+            'avg_ms': round(self.wall_seconds / self.requests * 1000, 3),
+            'max_ms': round(self.wall_seconds_max * 1000, 3),
+            'avg_statements': round(self.statements / self.requests, 2),
+            'avg_db_ms': round(self.db_seconds / self.requests * 1000, 3),
+            'slowest_statements': [
+                {'ms': round(seconds * 1000, 3), 'statement': statement}
+                for statement, seconds in sorted(self.slowest.items(), key=lambda item: item[1], reverse=True)
+            ]
+        }
+
+
+class StackSampler(threading.Thread):
+    """Samples one thread's Python stack into folded (flamegraph) stacks until stopped"""
+
+    def __init__(self, thread_id, interval=SAMPLE_INTERVAL_SECONDS):
+        super().__init__(daemon=True)
+        self.thread_id = thread_id
+        self.interval = interval
+        self.stacks = Counter()
+        self.stopped = threading.Event()
+
+    def run(self):
+        while not self.stopped.wait(self.interval):
+            frame = sys._current_frames().get(self.thread_id)
+            frames = []
+            while frame is not None:
+                frames.append(f"{os.path.basename(frame.f_code.co_filename)}:{frame.f_code.co_name}")
+                frame = frame.f_back
+            if frames:
+                self.stacks[';'.join(reversed(frames))] += 1
+
+    def stop(self):
+        self.stopped.set()
+        self.join()
+        return self.stacks
+
+
+class RequestProfiler:
+    """
+    Per-endpoint wall time, SQL statement count, DB time and slowest
+    statements of every request, fed by the cursor listeners below.
+
+    With PROFILER_DEBUG_HEADER enabled, a request carrying the
+    `X-Debug-Profile` header is also stack-sampled; the folded stacks are
+    written to PROFILE_DIR (render with flamegraph.pl or speedscope), which
+    keeps the newest PROFILE_MAX_FILES of them, and the response carries the
+    file name in X-Profile-File plus the request's SQL numbers.
+    """
+
+    def __init__(self):
+        self.lock = threading.Lock()
+        self.endpoints = {}
+        self.top_statements = 5
+        # Tells apart profiles written in the same millisecond
+        self.profile_numbers = itertools.count()
+
+    def init_app(self, app):
+        self.top_statements = app.config.get('PROFILER_TOP_STATEMENTS', 5)
+        app.before_request(self.start_request)
+        app.after_request(self.finish_request)
+        app.teardown_request(self.stop_sampler)
+
+    def start_request(self):
+        g.profile_start = time.perf_counter()
+        g.profile_statements = []
+        g.profile_sampler = None
+        if current_app.config.get('PROFILER_DEBUG_HEADER') and request.headers.get('X-Debug-Profile'):
+            g.profile_sampler = StackSampler(threading.get_ident())
+            g.profile_sampler.start()
+
+    def finish_request(self, response):
+        if 'profile_start' not in g:
+            return response
+        wall_seconds = time.perf_counter() - g.profile_start
+        statements = g.profile_statements
+        key = (request.blueprint or '', request.endpoint or 'unmatched')
+        with self.lock:
+            self.endpoints.setdefault(key, EndpointStats()).add(wall_seconds, statements, self.top_statements)
+
+        if g.profile_sampler is not None:
+            stacks = g.profile_sampler.stop()
+            g.profile_sampler = None
+            response.headers['X-Profile-File'] = self.write_profile(key, stacks)
+            response.headers['X-Request-Time-ms'] = f"{wall_seconds * 1000:.3f}"
+            response.headers['X-SQL-Count'] = str(len(statements))
+            response.headers['X-SQL-Time-ms'] = f"{sum(seconds for seconds, _ in statements) * 1000:.3f}"
+        return response
+
+    def stop_sampler(self, exc):
+        # after_request is skipped when the view raised
+        if g.get('profile_sampler') is not None:
+            g.profile_sampler.stop()
+
+    def write_profile(self, key, stacks):
+        """Write the folded stacks, drop the oldest files over PROFILE_MAX_FILES; returns the file name"""
+        directory = current_app.config.get('PROFILE_DIR') or os.path.join(tempfile.gettempdir(), 'sai-profiles')
+        os.makedirs(directory, exist_ok=True)
+        name = f"{int(time.time() * 1000)}-{os.getpid()}-{next(self.profile_numbers):06d}-{key[1].replace('.', '-')}.folded"
+        with open(os.path.join(directory, name), 'w', encoding='utf-8') as profile:
+            profile.writelines(f"{stack} {count}\n" for stack, count in stacks.items())
+
+        # Names start with the millisecond timestamp, so they sort oldest first
+        profiles = sorted(entry for entry in os.listdir(directory) if entry.endswith('.folded'))
+        for old in profiles[:max(len(profiles) - current_app.config.get('PROFILE_MAX_FILES', 50), 0)]:
+            try:
+                os.remove(os.path.join(directory, old))
+            except FileNotFoundError:
+                pass  # removed by a concurrent request
+        return name
+
+    def snapshot(self):
+        with self.lock:
+            return {endpoint: stats.to_dict() for (_, endpoint), stats in sorted(self.endpoints.items())}
+
+    def prometheus(self, engine=None):
+        """Prometheus text exposition of the request totals (and pool, given an engine)"""
+        lines = [
+            '# HELP sai_http_request_duration_seconds Request wall time by endpoint',
+            '# TYPE sai_http_request_duration_seconds histogram'
+        ]
+        with self.lock:
+            endpoints = sorted(self.endpoints.items())
+            for (blueprint, endpoint), stats in endpoints:
+                labels = f'blueprint="{label_value(blueprint)}",endpoint="{label_value(endpoint)}"'
+                for bound, count in zip(REQUEST_BUCKETS, stats.buckets):
+                    lines.append(f'sai_http_request_duration_seconds_bucket{{{labels},le="{bound}"}} {count}')
+                lines.append(f'sai_http_request_duration_seconds_bucket{{{labels},le="+Inf"}} {stats.requests}')
+                lines.append(f'sai_http_request_duration_seconds_sum{{{labels}}} {stats.wall_seconds:.6f}')
+                lines.append(f'sai_http_request_duration_seconds_count{{{labels}}} {stats.requests}')
+            for name, kind, help_text, value in (
+                ('sai_sql_statements_total', 'counter', 'SQL statements issued by endpoint', lambda s: s.statements),
+                ('sai_sql_duration_seconds_total', 'counter', 'Time spent in SQL by endpoint', lambda s: f"{s.db_seconds:.6f}"),
+                ('sai_http_request_max_duration_seconds', 'gauge', 'Slowest request by endpoint', lambda s: f"{s.wall_seconds_max:.6f}")
+            ):
+                lines += [f'# HELP {name} {help_text}', f'# TYPE {name} {kind}']
+                lines += [
+                    f'{name}{{blueprint="{label_value(blueprint)}",endpoint="{label_value(endpoint)}"}} {value(stats)}'
+                    for (blueprint, endpoint), stats in endpoints
+                ]
+
+        if engine is not None:
+            pool = pool_snapshot(engine)
+            for name, kind, key in (
+                ('sai_db_pool_size', 'gauge', 'size'),
+                ('sai_db_pool_in_use', 'gauge', 'in_use'),
+                ('sai_db_pool_idle', 'gauge', 'idle'),
+                ('sai_db_pool_overflow_in_use', 'gauge', 'overflow_in_use'),
+                ('sai_db_pool_checkouts_total', 'counter', 'checkouts'),
+                ('sai_db_pool_overflow_checkouts_total', 'counter', 'overflow_checkouts'),
+                ('sai_db_pool_timeouts_total', 'counter', 'timeouts'),
+                ('sai_db_pool_wait_seconds_total', 'counter', 'wait_seconds_total')
+            ):
+                if key in pool:
+                    lines += [f'# TYPE {name} {kind}', f'{name} {pool[key]}']
+        return '\n'.join(lines) + '\n'
+
+
+def label_value(value):
+    return str(value).replace('\\', '\\\\').replace('"', '\\"').replace('\n', '\\n')
+
+
+request_profiler = RequestProfiler()
+
+
+@event.listens_for(Engine, 'before_cursor_execute')
+def start_statement(conn, cursor, statement, parameters, context, executemany):
+    if has_request_context() and 'profile_statements' in g:
+        conn.info.setdefault('profile_query_start', []).append(time.perf_counter())
+
+
+@event.listens_for(Engine, 'after_cursor_execute')
+def finish_statement(conn, cursor, statement, parameters, context, executemany):
+    starts = conn.info.get('profile_query_start')
+    if starts and has_request_context() and 'profile_statements' in g:
+        g.profile_statements.append((time.perf_counter() - starts.pop(), statement_text(statement)))
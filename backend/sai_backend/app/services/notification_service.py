@@ -0,0 +1,327 @@
+"""
+Notification counter cache and aggregate statistics.
+
+`notification_counters` holds one row per (user, notification type) with the
+total and unread counts, so the unread badge the app polls is read from a
+handful of counter rows instead of counting notifications. The counters are
+changed in the same transaction as the notification rows themselves:
+
+- ORM inserts, read-state changes and deletes of Notification objects are
+  picked up by a before_flush listener;
+- Core / bulk statements that bypass the unit of work (e.g. the achievement
+  engine's insert) must call `adjust_counters` with their own deltas.
+
+`rebuild_counters` recomputes the cache from the notifications table.
+
+`send_bulk` fans one notification out to many users with set-based
+INSERT ... SELECT statements, chunk by chunk, for explicit recipient lists as
+well as segments resolved in SQL.
+
+`mark_all_read`, `delete_read` and `purge_read_notifications` change many
+notifications with one UPDATE / DELETE ... RETURNING statement each instead of
+loading and flushing every row; the returned notification types give the
+counter deltas.
+"""
+import time
+from collections import Counter, defaultdict
+from datetime import datetime, timedelta
+from sqlalchemy import Boolean, DateTime, String, any_, bindparam, case, delete, event, func, insert, inspect, literal, select, update
+from sqlalchemy.dialects import postgresql
+from sqlalchemy.orm import Session
+from app.extensions import db
+from app.models.notification import Notification, NotificationCounter
+from app.models.user import User, UserProfile
+
+FANOUT_CHUNK_SIZE = 5000
+PURGE_BATCH_SIZE = 5000
+
+# Segment name -> filter on users / user_profiles, e.g. {'min_streak_days': 30}
+SEGMENT_FILTERS = {
+    'min_streak_days': lambda value: UserProfile.current_streak_days >= int(value),
+    'max_streak_days': lambda value: UserProfile.current_streak_days <= int(value),
+    'is_active': lambda value: User.is_active == bool(value)
+}
+
+
+def adjust_counters(deltas, session=None):
+    """
+    Apply (user_id, notification_type, total_delta, unread_delta) changes to the
+    counter cache with one upsert, inside the caller's transaction.
+    """
+    session = session or db.session
+    merged = defaultdict(lambda: [0, 0])
+    for user_id, notification_type, total_delta, unread_delta in deltas:
+        merged[(user_id, notification_type)][0] += total_delta
+        merged[(user_id, notification_type)][1] += unread_delta
+
+    rows = [
+        {'user_id': user_id, 'notification_type': notification_type, 'total_count': total, 'unread_count': unread}
+        for (user_id, notification_type), (total, unread) in merged.items()
+        if total or unread
+    ]
+    if not rows:
+        return
+
+    table = NotificationCounter.__table__
+    statement = postgresql.insert(table)
+    statement = statement.on_conflict_do_update(
+        index_elements=[table.c.user_id, table.c.notification_type],
+        set_={
+            'total_count': table.c.total_count + statement.excluded.total_count,
+            'unread_count': table.c.unread_count + statement.excluded.unread_count
+        }
+    )
+    session.connection().execute(statement, rows)
+
+
+def _was_read(notification):
+    """Read state as loaded from the database, ignoring unflushed changes"""
+    history = inspect(notification).attrs.is_read.history
+    values = history.deleted or history.unchanged
+    return bool(values and values[0])
+
+
+def track_notification_changes(session, flush_context, instances):
+    """Turn pending Notification inserts, read-state changes and deletes into counter deltas"""
+    deltas = []
+    for obj in session.new:
+        if isinstance(obj, Notification):
+            deltas.append((obj.user_id, obj.notification_type, 1, 0 if obj.is_read else 1))
+
+    for obj in session.dirty:
+        if isinstance(obj, Notification) and obj not in session.deleted:
+            was_read, is_read = _was_read(obj), bool(obj.is_read)
+            if was_read != is_read:
+                deltas.append((obj.user_id, obj.notification_type, 0, -1 if is_read else 1))
+
+    for obj in session.deleted:
+        if isinstance(obj, Notification):
+            deltas.append((obj.user_id, obj.notification_type, -1, 0 if _was_read(obj) else -1))
+
+    if deltas:
+        adjust_counters(deltas, session)
+
+
+def register_listeners():
+    """Attach `track_notification_changes` to every session's before_flush; called by create_app"""
+    if not event.contains(Session, 'before_flush', track_notification_changes):
+        event.listen(Session, 'before_flush', track_notification_changes)
+
+
+def unread_counts(user_id):
+    """Return (unread_total, unread_by_type) from the counter cache"""
+    rows = db.session.execute(
+        select(NotificationCounter.notification_type, NotificationCounter.unread_count).where(
+            NotificationCounter.user_id == user_id
+        )
+    ).all()
+    by_type = {notification_type: count for notification_type, count in rows}
+    return sum(by_type.values()), by_type
+
+
+def notification_statistics(user_id, notification_types, recent_days=7):
+    """
+    Total, unread, read, per-type and recent counts for a user in one aggregate
+    query (conditional aggregation grouped by notification type).
+    """
+    recent_since = datetime.utcnow() - timedelta(days=recent_days)
+    rows = db.session.execute(
+        select(
+            Notification.notification_type,
+            func.count(Notification.id),
+            func.sum(case((Notification.is_read == False, 1), else_=0)),
+            func.sum(case((Notification.is_read == True, 1), else_=0)),
+            func.sum(case((Notification.created_at >= recent_since, 1), else_=0))
+        ).where(
+            Notification.user_id == user_id
+        ).group_by(Notification.notification_type)
+    ).all()
+
+    by_type = dict.fromkeys(notification_types, 0)
+    for notification_type, total, _, _, _ in rows:
+        if notification_type in by_type:
+            by_type[notification_type] = total
+
+    return {
+        'total_notifications': sum(row[1] for row in rows),
+        'unread_count': sum(row[2] or 0 for row in rows),
+        'read_count': sum(row[3] or 0 for row in rows),
+        'notifications_by_type': by_type,
+        'recent_count': sum(row[4] or 0 for row in rows)
+    }
+
+
+def rebuild_counters(user_id=None):
+    """Recompute the counter cache from the notifications table (one user or everyone)"""
+    clear = delete(NotificationCounter)
+    source = select(
+        Notification.user_id,
+        Notification.notification_type,
+        func.count(Notification.id),
+        func.sum(case((Notification.is_read == False, 1), else_=0))
+    ).group_by(Notification.user_id, Notification.notification_type)
+    if user_id is not None:
+        clear = clear.where(NotificationCounter.user_id == user_id)
+        source = source.where(Notification.user_id == user_id)
+
+    db.session.execute(clear)
+    db.session.execute(
+        insert(NotificationCounter).from_select(
+            ['user_id', 'notification_type', 'total_count', 'unread_count'], source
+        )
+    )
+
+
+def segment_conditions(segment):
+    """Translate a segment dict into SQL conditions; raises ValueError for unknown keys"""
+    unknown = set(segment) - set(SEGMENT_FILTERS)
+    if unknown:
+        raise ValueError(f"Unknown segment filter(s): {', '.join(sorted(unknown))}")
+    return [SEGMENT_FILTERS[name](value) for name, value in segment.items()]
+
+
+def recipient_condition(user_ids):
+    """`users.id = ANY(:ids)`: one array parameter however many recipients"""
+    return User.id == any_(bindparam('recipient_ids', value=list(user_ids), type_=postgresql.ARRAY(db.Integer)))
+
+
+def insert_for_recipients(conditions, notification_type, title, message, created_at):
+    """
+    INSERT ... SELECT one notification per user matching the conditions and
+    bump their counters; returns the number of notifications created.
+    """
+    table = Notification.__table__
+    recipients = select(
+        User.id,
+        literal(notification_type, String),
+        literal(title, String),
+        literal(message, String),
+        literal(False, Boolean),
+        literal(created_at, DateTime)
+    ).select_from(User).outerjoin(
+        UserProfile, UserProfile.user_id == User.id
+    ).where(*conditions)
+
+    created_for = db.session.execute(
+        insert(table).from_select(
+            ['user_id', 'notification_type', 'title', 'message', 'is_read', 'created_at'], recipients
+        ).returning(table.c.user_id)
+    ).scalars().all()
+
+    adjust_counters((user_id, notification_type, 1, 1) for user_id in created_for)
+    return len(created_for)
+
+
+def send_bulk(notification_type, title, message, user_ids=None, segment=None, chunk_size=FANOUT_CHUNK_SIZE):
+    """
+    Send one notification to every recipient and return (created_count, failed_count).
+
+    Recipients are either explicit user ids (checked against users inside the
+    INSERT ... SELECT, so unknown or repeated ids count as failed) or a segment
+    resolved in SQL, walked in user id ranges. Each chunk is committed on its
+    own, so memory and transaction size stay bounded for very large campaigns.
+    """
+    created_at = datetime.utcnow()
+    created_count = 0
+
+    if user_ids is not None:
+        for start in range(0, len(user_ids), chunk_size):
+            chunk = user_ids[start:start + chunk_size]
+            created_count += insert_for_recipients(
+                [recipient_condition(chunk)], notification_type, title, message, created_at
+            )
+            db.session.commit()
+        return created_count, len(user_ids) - created_count
+
+    conditions = segment_conditions(segment or {})
+    first_id, last_id = db.session.execute(select(func.min(User.id), func.max(User.id))).one()
+    if first_id is None:
+        return 0, 0
+    for start in range(first_id, last_id + 1, chunk_size):
+        created_count += insert_for_recipients(
+            conditions + [User.id >= start, User.id < start + chunk_size],
+            notification_type, title, message, created_at
+        )
+        db.session.commit()
+    return created_count, 0
+
+
+def mark_all_read(user_id):
+    """Mark every unread notification of a user as read with one UPDATE; returns the count"""
+    read_types = db.session.execute(
+        update(Notification).where(
+            Notification.user_id == user_id,
+            Notification.is_read == False
+        ).values(
+            is_read=True,
+            read_at=datetime.utcnow()
+        ).returning(Notification.notification_type).execution_options(synchronize_session=False)
+    ).scalars().all()
+
+    adjust_counters(
+        (user_id, notification_type, 0, -count)
+        for notification_type, count in Counter(read_types).items()
+    )
+    return len(read_types)
+
+
+def delete_read(user_id, older_than=None):
+    """
+    Delete a user's read notifications (optionally only those created before
+    `older_than`) with one DELETE; returns the count.
+    """
+    statement = delete(Notification).where(
+        Notification.user_id == user_id,
+        Notification.is_read == True
+    )
+    if older_than is not None:
+        statement = statement.where(Notification.created_at < older_than)
+
+    deleted_types = db.session.execute(
+        statement.returning(Notification.notification_type).execution_options(synchronize_session=False)
+    ).scalars().all()
+
+    adjust_counters(
+        (user_id, notification_type, -count, 0)
+        for notification_type, count in Counter(deleted_types).items()
+    )
+    return len(deleted_types)
+
+
+def purge_read_notifications(older_than_days, batch_size=PURGE_BATCH_SIZE, pause_seconds=0.0):
+    """
+    Retention job: delete read notifications older than `older_than_days` for
+    every user and return how many were removed.
+
+    Works in batches of `batch_size` rows, each its own short transaction, so
+    no single statement holds locks on a large part of the table. On
+    PostgreSQL rows locked by a concurrent request are skipped (FOR UPDATE
+    SKIP LOCKED) and picked up by the next run.
+    """
+    cutoff = datetime.utcnow() - timedelta(days=older_than_days)
+    purged = 0
+    while True:
+        batch = select(Notification.id).where(
+            Notification.is_read == True,
+            Notification.created_at < cutoff
+        ).limit(batch_size).with_for_update(skip_locked=True)
+
+        deleted = db.session.execute(
+            delete(Notification).where(
+                Notification.id.in_(batch.scalar_subquery())
+            ).returning(
+                Notification.user_id, Notification.notification_type
+            ).execution_options(synchronize_session=False)
+        ).all()
+
+        adjust_counters(
+            (user_id, notification_type, -count, 0)
+            for (user_id, notification_type), count in Counter(deleted).items()
+        )
+        db.session.commit()
+
+        purged += len(deleted)
+        if len(deleted) < batch_size:
+            return purged
+        if pause_seconds:
+            time.sleep(pause_seconds)
@@ -0,0 +1,194 @@
+"""
+Streak and savings counters derived from the check-in series.
+
+`UserProfile.current_streak_days`, `longest_streak_days`,
+`total_cigarettes_avoided` and `total_money_saved` are a function of the
+user's smoking records:
+
+- a streak is a run of consecutive calendar days whose check-ins are all
+  smoke-free; the current streak is the run ending on the latest check-in day
+  and the longest streak the longest run;
+- every check-in avoids max(cigarettes_per_day - cigarettes_smoked, 0)
+  cigarettes, each worth CIGARETTE_PRICE.
+
+`update_progress` applies a batch of record changes to a profile. Savings
+move by the exact per-record delta; streaks are recomputed only over the
+suffix of days that the change can affect (no run can be longer than the
+stored longest streak, so nothing earlier can be reached). Changes that can
+shorten a run - a smoke-free day removed or turned into a smoking one - fall
+back to `recompute_progress` for that user. Writers take the profile row
+lock first (`locked_profile`), which serializes one user's check-ins.
+
+`recompute_progress` recomputes the counters of many users (or everyone) with
+one UPDATE driven by a window-function query: smoke-free days are grouped
+into islands by record_date - ROW_NUMBER() (gaps-and-islands).
+"""
+from datetime import timedelta
+from sqlalchemy import Integer, case, cast, func, select, update
+from app.extensions import db
+from app.models.tracking import SmokingRecord
+from app.models.user import UserProfile
+from app.utils.constants import CIGARETTE_PRICE
+
+
+def avoided(cigarettes_per_day, cigarettes_smoked):
+    if cigarettes_smoked is None:
+        return 0
+    return max((cigarettes_per_day or 0) - cigarettes_smoked, 0)
+
+
+def streak_runs(day_totals):
+    """
+    (current, longest) run of consecutive smoke-free days over
+    [(record_date, cigarettes)] sorted by date.
+    """
+    current = longest = 0
+    previous = None
+    for record_date, cigarettes in day_totals:
+        if cigarettes:
+            current = 0
+        elif previous is not None and record_date - previous == timedelta(days=1) and current:
+            current += 1
+        else:
+            current = 1
+        longest = max(longest, current)
+        previous = record_date
+    return current, longest
+
+
+def locked_profile(user_id):
+    """
+    The user's profile (added if missing), locked FOR UPDATE until commit so
+    that concurrent check-ins of one user apply their changes one at a time.
+    """
+    profile = UserProfile.query.filter_by(user_id=user_id).with_for_update().populate_existing().first()
+    if not profile:
+        profile = UserProfile(user_id=user_id)
+        db.session.add(profile)
+    return profile
+
+
+def update_progress(profile, changes):
+    """
+    Apply record changes to a profile's streak and savings counters.
+
+    `changes` holds (record_date, old_cigarettes, new_cigarettes) tuples; None
+    stands for "no record" (insert: old is None, delete: new is None). The
+    records themselves must already be added to / deleted from the session.
+    """
+    changes = list(changes)
+    if not changes:
+        return
+
+    delta = sum(
+        avoided(profile.cigarettes_per_day, new) - avoided(profile.cigarettes_per_day, old)
+        for _, old, new in changes
+    )
+    profile.total_cigarettes_avoided = (profile.total_cigarettes_avoided or 0) + delta
+    profile.total_money_saved = (profile.total_money_saved or 0) + delta * CIGARETTE_PRICE
+
+    if any(old == 0 or new is None for _, old, new in changes):
+        recompute_progress([profile.user_id])
+        return
+
+    longest = profile.longest_streak_days or 0
+    window_start = min(record_date for record_date, _, _ in changes) - timedelta(days=longest + 1)
+    rows = db.session.execute(
+        select(
+            SmokingRecord.record_date,
+            func.sum(SmokingRecord.cigarettes_smoked),
+            func.count(SmokingRecord.id)
+        ).where(
+            SmokingRecord.user_id == profile.user_id,
+            SmokingRecord.record_date >= window_start
+        ).group_by(SmokingRecord.record_date).order_by(SmokingRecord.record_date)
+    ).all()
+
+    # A smoking check-in added to a day that already has a smoke-free one can split a run
+    shared_days = {record_date for record_date, _, count in rows if count > 1}
+    if any(new and record_date in shared_days for record_date, _, new in changes):
+        recompute_progress([profile.user_id])
+        return
+
+    current, window_longest = streak_runs([(record_date, cigarettes) for record_date, cigarettes, _ in rows])
+    profile.current_streak_days = current
+    profile.longest_streak_days = max(longest, window_longest)
+
+
+def island_key(record_date, row_number):
+    """record_date - ROW_NUMBER(): constant within a run of consecutive days"""
+    return record_date - cast(row_number, Integer)
+
+
+def progress_statement(user_ids=None):
+    """UPDATE user_profiles with counters recomputed from smoking_records (all users or user_ids)"""
+    scope = [SmokingRecord.user_id.in_(user_ids)] if user_ids is not None else []
+
+    day_totals = select(
+        SmokingRecord.user_id,
+        SmokingRecord.record_date,
+        func.sum(SmokingRecord.cigarettes_smoked).label('cigarettes')
+    ).where(*scope).group_by(SmokingRecord.user_id, SmokingRecord.record_date).cte('day_totals')
+
+    smoke_free = select(
+        day_totals.c.user_id,
+        day_totals.c.record_date,
+        func.row_number().over(
+            partition_by=day_totals.c.user_id, order_by=day_totals.c.record_date
+        ).label('row_number')
+    ).where(day_totals.c.cigarettes == 0).cte('smoke_free')
+
+    islands = select(
+        smoke_free.c.user_id,
+        func.max(smoke_free.c.record_date).label('last_day'),
+        func.count().label('length')
+    ).group_by(
+        smoke_free.c.user_id, island_key(smoke_free.c.record_date, smoke_free.c.row_number)
+    ).cte('islands')
+
+    latest = select(
+        day_totals.c.user_id,
+        func.max(day_totals.c.record_date).label('latest_day')
+    ).group_by(day_totals.c.user_id).cte('latest')
+
+    streaks = select(
+        islands.c.user_id,
+        func.max(islands.c.length).label('longest'),
+        func.max(case((islands.c.last_day == latest.c.latest_day, islands.c.length), else_=0)).label('current')
+    ).join(latest, latest.c.user_id == islands.c.user_id).group_by(islands.c.user_id).cte('streaks')
+
+    avoided_per_record = UserProfile.cigarettes_per_day - SmokingRecord.cigarettes_smoked
+    savings = select(
+        SmokingRecord.user_id,
+        func.sum(case((avoided_per_record > 0, avoided_per_record), else_=0)).label('avoided')
+    ).join(
+        UserProfile, UserProfile.user_id == SmokingRecord.user_id
+    ).where(*scope).group_by(SmokingRecord.user_id).cte('savings')
+
+    def for_profile(column):
+        return func.coalesce(
+            select(column).where(column.table.c.user_id == UserProfile.user_id).scalar_subquery(), 0
+        )
+
+    statement = update(UserProfile).values(
+        current_streak_days=for_profile(streaks.c.current),
+        longest_streak_days=for_profile(streaks.c.longest),
+        total_cigarettes_avoided=for_profile(savings.c.avoided),
+        total_money_saved=for_profile(savings.c.avoided) * CIGARETTE_PRICE
+    )
+    if user_ids is not None:
+        statement = statement.where(UserProfile.user_id.in_(user_ids))
+    return statement.execution_options(synchronize_session=False)
+
+
+def recompute_progress(user_ids=None):
+    """Recompute streak and savings counters from the records; returns the number of profiles updated"""
+    db.session.flush()
+    result = db.session.execute(progress_statement(user_ids))
+    # Reload the recomputed values into profiles already in the session
+    for obj in db.session.identity_map.values():
+        if isinstance(obj, UserProfile) and (user_ids is None or obj.user_id in user_ids):
+            db.session.expire(obj, [
+                'current_streak_days', 'longest_streak_days', 'total_cigarettes_avoided', 'total_money_saved'
+            ])
+    return result.rowcount
@@ -0,0 +1,262 @@
+"""
+Check-in statistics computed in the database, and normalized trigger storage.
+
+`record_statistics` returns the totals, smoke-free days and the most common
+mood and trigger for a date window from one aggregate query. `daily_series`
+streams the per-day columns the charts need without building ORM objects.
+
+The free-text `SmokingRecord.triggers` column stays the API's source of truth;
+its comma-separated names are mirrored into the `triggers` dictionary and the
+`record_triggers` join table by an after_flush listener, so trigger analytics
+are indexed joins instead of string parsing.
+
+Check-ins are written with INSERT ... ON CONFLICT (user_id, record_date):
+`insert_check_in` adds a single day in one round-trip and `ingest_records`
+upserts a batch of days (offline sync) in one statement.
+"""
+from datetime import datetime
+from sqlalchemy import case, delete, event, func, inspect, insert, select
+from sqlalchemy.dialects import postgresql
+from sqlalchemy.orm import Session
+from app.extensions import db
+from app.models.tracking import RecordTrigger, SmokingRecord, Trigger
+from app.services.user_service import SummaryDelta, apply_summary_deltas, rebuild_summaries
+
+DAILY_SERIES_BATCH = 1000
+RECORD_FIELDS = ('cigarettes_smoked', 'cravings_count', 'mood', 'triggers', 'notes')
+RECORD_DEFAULTS = {'cravings_count': 0, 'mood': None, 'triggers': None, 'notes': None}
+TRIGGER_NAME_LENGTH = Trigger.__table__.c.name.type.length
+
+
+def parse_triggers(text):
+    """Split a comma-separated trigger list into unique, whitespace-normalized names"""
+    names = []
+    for part in (text or '').split(','):
+        name = ' '.join(part.split())[:TRIGGER_NAME_LENGTH]
+        if name and name not in names:
+            names.append(name)
+    return names
+
+
+def trigger_ids(connection, names):
+    """Return {name: id}, adding names missing from the dictionary"""
+    if not names:
+        return {}
+    table = Trigger.__table__
+    connection.execute(
+        postgresql.insert(table).on_conflict_do_nothing(index_elements=[table.c.name]),
+        [{'name': name} for name in names]
+    )
+    return dict(connection.execute(select(table.c.name, table.c.id).where(table.c.name.in_(names))).all())
+
+
+def replace_record_triggers(connection, record_triggers):
+    """Rewrite the record_triggers rows of {record_id: [names]}"""
+    if not record_triggers:
+        return
+    connection.execute(delete(RecordTrigger).where(RecordTrigger.record_id.in_(list(record_triggers))))
+    ids = trigger_ids(connection, sorted({name for names in record_triggers.values() for name in names}))
+    rows = [
+        {'record_id': record_id, 'trigger_id': ids[name]}
+        for record_id, names in record_triggers.items() for name in names
+    ]
+    if rows:
+        connection.execute(insert(RecordTrigger), rows)
+
+
+def sync_record_triggers(session, flush_context):
+    """Mirror new or edited SmokingRecord.triggers into record_triggers"""
+    changed = {
+        obj.id: parse_triggers(obj.triggers)
+        for obj in list(session.new) + list(session.dirty)
+        if isinstance(obj, SmokingRecord) and (obj in session.new or inspect(obj).attrs.triggers.history.has_changes())
+    }
+    # Deleted records lose their rows through ON DELETE CASCADE
+    replace_record_triggers(session.connection(), changed)
+
+
+def register_listeners():
+    """Attach `sync_record_triggers` to every session's after_flush; called by create_app"""
+    if not event.contains(Session, 'after_flush', sync_record_triggers):
+        event.listen(Session, 'after_flush', sync_record_triggers)
+
+
+def window_conditions(user_id, start_date):
+    return [SmokingRecord.user_id == user_id, SmokingRecord.record_date >= start_date]
+
+
+def most_common_mood(conditions):
+    """Scalar subquery: the mood logged most often (ties broken alphabetically)"""
+    return select(SmokingRecord.mood).where(
+        *conditions,
+        SmokingRecord.mood.is_not(None),
+        SmokingRecord.mood != ''
+    ).group_by(SmokingRecord.mood).order_by(
+        func.count().desc(), SmokingRecord.mood
+    ).limit(1).correlate(None).scalar_subquery()
+
+
+def most_common_trigger(conditions):
+    """Scalar subquery: the trigger linked to the most check-ins (ties broken alphabetically)"""
+    return select(Trigger.name).select_from(SmokingRecord).join(
+        RecordTrigger, RecordTrigger.record_id == SmokingRecord.id
+    ).join(
+        Trigger, Trigger.id == RecordTrigger.trigger_id
+    ).where(*conditions).group_by(Trigger.name).order_by(
+        func.count().desc(), Trigger.name
+    ).limit(1).correlate(None).scalar_subquery()
+
+
+def record_statistics(user_id, start_date):
+    """Aggregate a user's check-ins from start_date on; returns a dict of plain numbers"""
+    conditions = window_conditions(user_id, start_date)
+
+    row = db.session.execute(
+        select(
+            func.count(SmokingRecord.id),
+            func.coalesce(func.sum(SmokingRecord.cigarettes_smoked), 0),
+            func.coalesce(func.sum(SmokingRecord.cravings_count), 0),
+            func.coalesce(func.sum(case((SmokingRecord.cigarettes_smoked == 0, 1), else_=0)), 0),
+            most_common_mood(conditions),
+            most_common_trigger(conditions)
+        ).where(*conditions)
+    ).one()
+
+    total_records, total_cigarettes, total_cravings, smoke_free_days, mood, trigger = row
+
+    return {
+        'total_records': total_records,
+        'total_cigarettes': total_cigarettes,
+        'total_cravings': total_cravings,
+        'smoke_free_days': smoke_free_days,
+        'most_common_mood': mood,
+        'most_common_trigger': trigger
+    }
+
+
+def daily_series(user_id, start_date):
+    """Per-day chart data as plain dicts, fetched as a column projection in batches"""
+    rows = db.session.execute(
+        select(
+            SmokingRecord.record_date,
+            SmokingRecord.cigarettes_smoked,
+            SmokingRecord.cravings_count,
+            SmokingRecord.mood
+        ).where(
+            *window_conditions(user_id, start_date)
+        ).order_by(SmokingRecord.record_date).execution_options(yield_per=DAILY_SERIES_BATCH)
+    )
+    return [
+        {
+            'date': record_date.isoformat(),
+            'cigarettes': cigarettes,
+            'cravings': cravings,
+            'mood': mood
+        } for record_date, cigarettes, cravings, mood in rows
+    ]
+
+
+def parse_check_in(item):
+    """Validate one batch item; returns (values, error)"""
+    if not isinstance(item, dict) or not item.get('record_date') or item.get('cigarettes_smoked') is None:
+        return None, 'record_date and cigarettes_smoked are required'
+    try:
+        record_date = datetime.strptime(item['record_date'], '%Y-%m-%d').date()
+    except (TypeError, ValueError):
+        return None, 'Invalid date format. Use YYYY-MM-DD'
+    if not isinstance(item['cigarettes_smoked'], int) or item['cigarettes_smoked'] < 0:
+        return None, 'cigarettes_smoked must be a non-negative integer'
+    values = {field: item[field] for field in RECORD_FIELDS if field in item}
+    values['record_date'] = record_date
+    return values, None
+
+
+def upsert_statement(on_conflict_update):
+    """INSERT INTO smoking_records ... ON CONFLICT (user_id, record_date) ... RETURNING id, record_date"""
+    table = SmokingRecord.__table__
+    statement = postgresql.insert(table)
+    conflict = [table.c.user_id, table.c.record_date]
+    if on_conflict_update:
+        statement = statement.on_conflict_do_update(
+            index_elements=conflict, set_={field: statement.excluded[field] for field in RECORD_FIELDS}
+        )
+    else:
+        statement = statement.on_conflict_do_nothing(index_elements=conflict)
+    return statement.returning(table.c.id, table.c.record_date)
+
+
+def insert_check_in(user_id, values):
+    """
+    Add one check-in in a single round-trip, or return None if the day is
+    already logged.
+
+    The unique (user_id, record_date) constraint arbitrates: a retried or
+    double-tapped check-in waits for the first one and then hits the
+    conflict, so it can never create a second row for the day.
+    """
+    row = db.session.execute(
+        upsert_statement(on_conflict_update=False).values(user_id=user_id, **{**RECORD_DEFAULTS, **values})
+    ).first()
+    if row is None:
+        return None
+    record_id = row[0]
+
+    # The Core insert bypasses the flush listeners
+    delta = SummaryDelta()
+    delta.add_record(values['record_date'], values['cigarettes_smoked'], 1)
+    apply_summary_deltas(db.session, {user_id: delta})
+    if values.get('triggers'):
+        replace_record_triggers(db.session.connection(), {record_id: parse_triggers(values['triggers'])})
+    return db.session.get(SmokingRecord, record_id)
+
+
+def ingest_records(user_id, items):
+    """
+    Upsert a batch of one user's daily check-ins without committing.
+
+    Every valid item replaces the user's record for its day (fields it leaves
+    out fall back to their defaults) through one INSERT ... ON CONFLICT
+    (user_id, record_date) DO UPDATE. Returns (results, changes): one result
+    per item ('created', 'updated' or 'error') and the (record_date,
+    old_cigarettes, new_cigarettes) changes for progress_service.update_progress.
+    Call with the profile locked (progress_service.locked_profile) so the old
+    values read here stay current.
+
+    The statement bypasses the flush listeners, so record_triggers and the
+    dashboard summary are brought up to date here, once for the whole batch.
+    """
+    results = [{'index': index} for index in range(len(items))]
+    batch = {}
+    for result, item in zip(results, items):
+        values, error = parse_check_in(item)
+        if not error and values['record_date'] in batch:
+            error = 'Duplicate record_date in batch'
+        if error:
+            result.update(status='error', error=error)
+            continue
+        result['record_date'] = values['record_date'].isoformat()
+        batch[values['record_date']] = (result, values)
+    if not batch:
+        return results, []
+
+    existing = dict(db.session.execute(
+        select(SmokingRecord.record_date, SmokingRecord.cigarettes_smoked).where(
+            SmokingRecord.user_id == user_id,
+            SmokingRecord.record_date.in_(list(batch))
+        )
+    ).all())
+
+    rows = [{'user_id': user_id, **RECORD_DEFAULTS, **values} for _, values in batch.values()]
+    record_triggers = {}
+    for record_id, record_date in db.session.execute(upsert_statement(on_conflict_update=True), rows):
+        result, values = batch[record_date]
+        result.update(status='updated' if record_date in existing else 'created', record_id=record_id)
+        record_triggers[record_id] = parse_triggers(values.get('triggers'))
+
+    replace_record_triggers(db.session.connection(), record_triggers)
+    rebuild_summaries(user_id)
+    changes = [
+        (record_date, existing.get(record_date), values['cigarettes_smoked'])
+        for record_date, (_, values) in batch.items()
+    ]
+    return results, changes
@@ -0,0 +1,225 @@
+"""
+Vectorized trend engine for a user's check-in series.
+
+A user's (record_date, cigarettes_smoked, cravings_count) columns for a date
+range are laid onto a dense day axis with NumPy, leaving missing days as NaN.
+Calendar-aligned weekly (Monday start) and monthly rollups, a gap-aware
+7-day rolling mean and a least-squares slope over the logged days are all
+computed from that axis in one pass, so any range (30, 90, 365 days) costs
+the same handful of array operations.
+
+`compute_all_trends` runs the same engine for every user, one user id chunk
+and one query at a time, and stores the payloads in `user_trends`; the
+trends endpoint serves a stored payload while it is newer than the user's
+last check-in or goal change.
+"""
+from datetime import datetime, timedelta
+import numpy as np
+from sqlalchemy import select
+from sqlalchemy.dialects import postgresql
+from app.extensions import db
+from app.models.tracking import SmokingRecord, UserTrend
+from app.models.user import User, UserSummary
+
+ROLLING_WINDOW_DAYS = 7
+# Slope (cigarettes per day) below which the trend is reported as stable
+STABLE_SLOPE = 0.05
+TREND_WINDOWS = (30, 90, 365)
+BATCH_CHUNK_SIZE = 500
+
+
+def _rounded(values, digits=2):
+    """NaN-aware rounding into a JSON-friendly list"""
+    return [None if np.isnan(value) else round(float(value), digits) for value in values]
+
+
+def _fit(days, values):
+    """Least-squares slope and intercept of values over day offsets"""
+    x = days - days.mean()
+    slope = float((x * (values - values.mean())).sum() / (x * x).sum())
+    return slope, float(values.mean() - slope * days.mean())
+
+
+def _rollup(keys, observed, values):
+    """Per-key mean and logged-day count of the observed values (keys are 0..n-1 ints)"""
+    size = int(keys.max()) + 1
+    counts = np.bincount(keys[observed], minlength=size)
+    sums = np.bincount(keys[observed], weights=values[observed], minlength=size)
+    with np.errstate(invalid='ignore', divide='ignore'):
+        return np.where(counts > 0, sums / counts, np.nan), counts
+
+
+def analyze_series(record_dates, cigarettes, cravings, start_date, end_date):
+    """
+    Trend payload for one user's check-ins between start_date and end_date
+    (inclusive). Inputs are parallel sequences; several check-ins on the same
+    day are averaged.
+    """
+    span = (end_date - start_date).days + 1
+    offsets = (np.asarray(record_dates, dtype='datetime64[D]') - np.datetime64(start_date, 'D')).astype(np.int64)
+    cigarettes = np.asarray(cigarettes, dtype=np.float64)
+    cravings = np.nan_to_num(np.asarray(cravings, dtype=np.float64))
+    in_range = (offsets >= 0) & (offsets < span)
+    offsets, cigarettes, cravings = offsets[in_range], cigarettes[in_range], cravings[in_range]
+
+    if np.unique(offsets).size < 2:
+        return {'trend': 'insufficient_data', 'days_logged': int(np.unique(offsets).size), 'days_analyzed': span}
+
+    # Dense day axis: per-day means, NaN where nothing was logged
+    per_day = np.bincount(offsets, minlength=span)
+    observed = per_day > 0
+    with np.errstate(invalid='ignore', divide='ignore'):
+        daily = np.bincount(offsets, weights=cigarettes, minlength=span) / per_day
+        daily_cravings = np.bincount(offsets, weights=cravings, minlength=span) / per_day
+
+    days = np.arange(span)
+    axis = np.datetime64(start_date, 'D') + days
+
+    # Calendar weeks (Monday start) and months
+    weekday_offset = start_date.weekday()
+    week_keys = (days + weekday_offset) // 7
+    weekly, weekly_counts = _rollup(week_keys, observed, daily)
+    week_starts = np.datetime64(start_date, 'D') - weekday_offset + 7 * np.arange(weekly.size)
+
+    month_axis = axis.astype('datetime64[M]')
+    month_keys = (month_axis - month_axis[0]).astype(np.int64)
+    monthly, monthly_counts = _rollup(month_keys, observed, daily)
+    months = month_axis[0] + np.arange(monthly.size)
+
+    # Rolling mean over the last ROLLING_WINDOW_DAYS days, skipping gaps
+    filled = np.where(observed, daily, 0.0)
+    window_sums = np.convolve(filled, np.ones(ROLLING_WINDOW_DAYS))[:span]
+    window_counts = np.convolve(observed.astype(np.float64), np.ones(ROLLING_WINDOW_DAYS))[:span]
+    with np.errstate(invalid='ignore', divide='ignore'):
+        rolling = np.where(window_counts > 0, window_sums / window_counts, np.nan)
+
+    slope, intercept = _fit(days[observed].astype(np.float64), daily[observed])
+    craving_slope, _ = _fit(days[observed].astype(np.float64), daily_cravings[observed])
+    first_logged, last_logged = days[observed][0], days[observed][-1]
+    # A count cannot go below zero, so neither can the fitted line's endpoints
+    fitted_start = max(intercept + slope * first_logged, 0.0)
+    fitted_end = max(intercept + slope * last_logged, 0.0)
+
+    trend = 'stable'
+    if slope <= -STABLE_SLOPE:
+        trend = 'improving'
+    elif slope >= STABLE_SLOPE:
+        trend = 'worsening'
+    change = round(abs(fitted_end - fitted_start) / fitted_start * 100, 1) if fitted_start > 0 and trend != 'stable' else 0
+
+    logged_weeks = weekly_counts > 0
+    return {
+        'trend': trend,
+        'change_percentage': change,
+        'slope_per_day': round(slope, 4),
+        'cravings_slope_per_day': round(craving_slope, 4),
+        'weekly_averages': _rounded(weekly[logged_weeks], 1),
+        'total_weeks_analyzed': int(logged_weeks.sum()),
+        'weekly': [
+            {'week_start': str(week_start), 'average': average, 'days_logged': int(count)}
+            for week_start, average, count in zip(week_starts, _rounded(weekly), weekly_counts)
+        ],
+        'monthly': [
+            {'month': str(month), 'average': average, 'days_logged': int(count)}
+            for month, average, count in zip(months, _rounded(monthly), monthly_counts)
+        ],
+        'rolling_mean_7d': _rounded(rolling),
+        'days_logged': int(observed.sum()),
+        'missing_days': int(span - observed.sum()),
+        'days_analyzed': span,
+        'start_date': start_date.isoformat(),
+        'end_date': end_date.isoformat()
+    }
+
+
+def trend_window(days, today=None):
+    end_date = today or datetime.utcnow().date()
+    return end_date - timedelta(days=days - 1), end_date
+
+
+def user_trends(user_id, days):
+    """Compute a user's trend payload for the last `days` days from the database"""
+    start_date, end_date = trend_window(days)
+    rows = db.session.execute(
+        select(SmokingRecord.record_date, SmokingRecord.cigarettes_smoked, SmokingRecord.cravings_count).where(
+            SmokingRecord.user_id == user_id,
+            SmokingRecord.record_date.between(start_date, end_date)
+        )
+    ).all()
+    record_dates, cigarettes, cravings = zip(*rows) if rows else ((), (), ())
+    return analyze_series(record_dates, cigarettes, cravings, start_date, end_date)
+
+
+def stored_trends(user_id, days):
+    """Precomputed payload if it is from today and newer than the user's last write, else None"""
+    row = db.session.execute(
+        select(UserTrend.payload, UserTrend.computed_at, UserSummary.updated_at).outerjoin(
+            UserSummary, UserSummary.user_id == UserTrend.user_id
+        ).where(
+            UserTrend.user_id == user_id,
+            UserTrend.window_days == days
+        )
+    ).first()
+    if not row:
+        return None
+    payload, computed_at, changed_at = row
+    if computed_at.date() != datetime.utcnow().date() or (changed_at and changed_at > computed_at):
+        return None
+    return payload
+
+
+def compute_trend_chunk(first_id, last_id, windows=TREND_WINDOWS):
+    """Compute and store the trends of users first_id..last_id with one query per chunk"""
+    longest = max(windows)
+    today = datetime.utcnow().date()
+    rows = db.session.execute(
+        select(
+            SmokingRecord.user_id, SmokingRecord.record_date,
+            SmokingRecord.cigarettes_smoked, SmokingRecord.cravings_count
+        ).where(
+            SmokingRecord.user_id.between(first_id, last_id),
+            SmokingRecord.record_date.between(trend_window(longest, today)[0], today)
+        ).order_by(SmokingRecord.user_id)
+    ).all()
+    if not rows:
+        return 0
+
+    user_ids, record_dates, cigarettes, cravings = (np.asarray(column) for column in zip(*rows))
+    # Rows are ordered by user, so each user's check-ins are one contiguous slice
+    users, starts = np.unique(user_ids, return_index=True)
+    ends = np.append(starts[1:], len(user_ids))
+
+    computed_at = datetime.utcnow()
+    payloads = []
+    for user_id, start, end in zip(users, starts, ends):
+        for days in windows:
+            start_date, end_date = trend_window(days, today)
+            payloads.append({
+                'user_id': int(user_id),
+                'window_days': days,
+                'payload': analyze_series(record_dates[start:end], cigarettes[start:end], cravings[start:end], start_date, end_date),
+                'computed_at': computed_at
+            })
+
+    table = UserTrend.__table__
+    statement = postgresql.insert(table)
+    db.session.execute(
+        statement.on_conflict_do_update(
+            index_elements=[table.c.user_id, table.c.window_days],
+            set_={'payload': statement.excluded.payload, 'computed_at': statement.excluded.computed_at}
+        ),
+        payloads
+    )
+    return len(users)
+
+
+def compute_all_trends(windows=TREND_WINDOWS, chunk_size=BATCH_CHUNK_SIZE):
+    """Nightly batch: precompute every user's trends, one committed user id chunk at a time"""
+    first_id, last_id = db.session.execute(select(db.func.min(User.id), db.func.max(User.id))).one()
+    computed = 0
+    if first_id is None:
+        return computed
+    for start in range(first_id, last_id + 1, chunk_size):
+        computed += compute_trend_chunk(start, start + chunk_size - 1, windows)
+        db.session.commit()
+    return computed
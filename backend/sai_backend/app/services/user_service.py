@@ -0,0 +1,322 @@
+"""
+Incrementally maintained dashboard summary (`user_summaries`).
+
+One row per user holds the aggregates the home screen shows: total records and
+cigarettes, the per-day totals of the rolling 7-day window and the active /
+completed goal counts. It is updated in the same transaction as the records
+and goals themselves:
+
+- ORM inserts, updates and deletes of SmokingRecord and Goal objects are
+  turned into deltas by a before_flush listener, which locks the affected
+  summary rows (SELECT ... FOR UPDATE) and applies them;
+- Core / bulk statements that bypass the unit of work must call
+  `rebuild_summaries` for the users they touched.
+
+Streaks, money saved and cigarettes avoided already live on user_profiles and
+are read in the same row as the summary.
+
+`rebuild_all_summaries` recomputes every summary from the raw tables in
+parallel user id chunks and `check_summaries` reports rows that drifted.
+"""
+from collections import Counter, defaultdict
+from concurrent.futures import ThreadPoolExecutor
+from datetime import datetime, timedelta
+from sqlalchemy import case, event, func, inspect, select
+from sqlalchemy.dialects import postgresql
+from sqlalchemy.orm import Session
+from app.extensions import db
+from app.models.goal import Goal
+from app.models.tracking import SmokingRecord
+from app.models.user import User, UserProfile, UserSummary
+from app.utils.constants import GOAL_STATUS_ACTIVE, GOAL_STATUS_COMPLETED
+
+# Dashboard average covers record_date >= today - WINDOW_DAYS
+WINDOW_DAYS = 7
+REBUILD_CHUNK_SIZE = 1000
+
+GOAL_COUNT_COLUMNS = {
+    GOAL_STATUS_ACTIVE: 'active_goals',
+    GOAL_STATUS_COMPLETED: 'completed_goals'
+}
+
+
+def window_start(today=None):
+    return (today or datetime.utcnow().date()) - timedelta(days=WINDOW_DAYS)
+
+
+def _loaded_value(obj, key):
+    """Attribute value as loaded from the database, ignoring unflushed changes"""
+    history = inspect(obj).attrs[key].history
+    values = history.deleted or history.unchanged
+    return values[0] if values else None
+
+
+def _changed(obj, *keys):
+    return any(inspect(obj).attrs[key].history.has_changes() for key in keys)
+
+
+class SummaryDelta:
+    """Pending changes to one user's summary"""
+
+    def __init__(self):
+        self.records = 0
+        self.cigarettes = 0
+        self.days = defaultdict(lambda: [0, 0])
+        self.goals = Counter()
+
+    def add_record(self, record_date, cigarettes, sign):
+        cigarettes = cigarettes or 0
+        self.records += sign
+        self.cigarettes += sign * cigarettes
+        if record_date is not None and record_date >= window_start():
+            day = self.days[record_date.isoformat()]
+            day[0] += sign
+            day[1] += sign * cigarettes
+
+    def add_goal(self, status, sign):
+        if status in GOAL_COUNT_COLUMNS:
+            self.goals[status] += sign
+
+    def apply(self, summary):
+        summary.total_records = (summary.total_records or 0) + self.records
+        summary.total_cigarettes = (summary.total_cigarettes or 0) + self.cigarettes
+        summary.active_goals = (summary.active_goals or 0) + self.goals[GOAL_STATUS_ACTIVE]
+        summary.completed_goals = (summary.completed_goals or 0) + self.goals[GOAL_STATUS_COMPLETED]
+
+        start = window_start().isoformat()
+        recent_days = {day: totals for day, totals in (summary.recent_days or {}).items() if day >= start}
+        for day, (records, cigarettes) in self.days.items():
+            current = recent_days.get(day, [0, 0])
+            recent_days[day] = [current[0] + records, current[1] + cigarettes]
+            if recent_days[day][0] <= 0:
+                del recent_days[day]
+        # Reassign so the JSON column is flushed
+        summary.recent_days = recent_days
+        # Set explicitly: onupdate only fires when another column changed
+        summary.updated_at = datetime.utcnow()
+
+
+def track_summary_changes(session, flush_context, instances):
+    """Turn pending SmokingRecord / Goal changes into summary updates in the same flush"""
+    deltas = defaultdict(SummaryDelta)
+
+    for obj in session.new:
+        if isinstance(obj, SmokingRecord):
+            deltas[obj.user_id].add_record(obj.record_date, obj.cigarettes_smoked, 1)
+        elif isinstance(obj, Goal):
+            deltas[obj.user_id].add_goal(obj.status or GOAL_STATUS_ACTIVE, 1)
+
+    for obj in session.dirty:
+        if obj in session.deleted:
+            continue
+        if isinstance(obj, SmokingRecord) and session.is_modified(obj):
+            # Any edit moves the summary's updated_at (stored trends also read
+            # cravings), only these two columns move its totals
+            delta = deltas[obj.user_id]
+            if _changed(obj, 'record_date', 'cigarettes_smoked'):
+                delta.add_record(_loaded_value(obj, 'record_date'), _loaded_value(obj, 'cigarettes_smoked'), -1)
+                delta.add_record(obj.record_date, obj.cigarettes_smoked, 1)
+        elif isinstance(obj, Goal) and _changed(obj, 'status'):
+            deltas[obj.user_id].add_goal(_loaded_value(obj, 'status'), -1)
+            deltas[obj.user_id].add_goal(obj.status, 1)
+
+    for obj in session.deleted:
+        if isinstance(obj, SmokingRecord):
+            deltas[obj.user_id].add_record(
+                _loaded_value(obj, 'record_date'), _loaded_value(obj, 'cigarettes_smoked'), -1
+            )
+        elif isinstance(obj, Goal):
+            deltas[obj.user_id].add_goal(_loaded_value(obj, 'status'), -1)
+
+    # Summaries of users being deleted go away with them (ON DELETE CASCADE)
+    for obj in session.deleted:
+        if isinstance(obj, User):
+            deltas.pop(obj.id, None)
+    deltas.pop(None, None)
+
+    if deltas:
+        apply_summary_deltas(session, deltas)
+
+
+def register_listeners():
+    """Attach `track_summary_changes` to every session's before_flush; called by create_app"""
+    if not event.contains(Session, 'before_flush', track_summary_changes):
+        event.listen(Session, 'before_flush', track_summary_changes)
+
+
+def apply_summary_deltas(session, deltas):
+    """Create missing summary rows, lock them and apply {user_id: SummaryDelta}"""
+    table = UserSummary.__table__
+    statement = postgresql.insert(table).on_conflict_do_nothing(
+        index_elements=[table.c.user_id]
+    )
+    session.connection().execute(statement, [{'user_id': user_id} for user_id in deltas])
+
+    summaries = session.execute(
+        select(UserSummary).where(
+            UserSummary.user_id.in_(list(deltas))
+        ).with_for_update().execution_options(populate_existing=True)
+    ).scalars()
+    for summary in summaries:
+        deltas[summary.user_id].apply(summary)
+
+
+def dashboard_row(user_id):
+    """(user_id, profile, summary) in one query, or None if the user does not exist"""
+    return db.session.execute(
+        select(User.id, UserProfile, UserSummary).outerjoin(
+            UserProfile, UserProfile.user_id == User.id
+        ).outerjoin(
+            UserSummary, UserSummary.user_id == User.id
+        ).where(User.id == user_id)
+    ).first()
+
+
+def window_average(summary):
+    """Average cigarettes per record over the rolling window"""
+    if summary is None:
+        return 0
+    start = window_start().isoformat()
+    days = [totals for day, totals in (summary.recent_days or {}).items() if day >= start]
+    records = sum(totals[0] for totals in days)
+    return sum(totals[1] for totals in days) / records if records else 0
+
+
+def compute_summaries(first_id, last_id):
+    """Aggregate the raw tables for users first_id..last_id into {user_id: summary values}"""
+    start = window_start()
+    in_range = lambda column: column.between(first_id, last_id)
+
+    summaries = {
+        user_id: {
+            'total_records': 0, 'total_cigarettes': 0, 'recent_days': {},
+            'active_goals': 0, 'completed_goals': 0
+        }
+        for user_id in db.session.scalars(select(User.id).where(in_range(User.id)))
+    }
+
+    for user_id, records, cigarettes in db.session.execute(
+        select(
+            SmokingRecord.user_id,
+            func.count(SmokingRecord.id),
+            func.coalesce(func.sum(SmokingRecord.cigarettes_smoked), 0)
+        ).where(in_range(SmokingRecord.user_id)).group_by(SmokingRecord.user_id)
+    ):
+        summaries[user_id].update(total_records=records, total_cigarettes=cigarettes)
+
+    for user_id, record_date, records, cigarettes in db.session.execute(
+        select(
+            SmokingRecord.user_id,
+            SmokingRecord.record_date,
+            func.count(SmokingRecord.id),
+            func.coalesce(func.sum(SmokingRecord.cigarettes_smoked), 0)
+        ).where(
+            in_range(SmokingRecord.user_id),
+            SmokingRecord.record_date >= start
+        ).group_by(SmokingRecord.user_id, SmokingRecord.record_date)
+    ):
+        summaries[user_id]['recent_days'][record_date.isoformat()] = [records, cigarettes]
+
+    for user_id, active, completed in db.session.execute(
+        select(
+            Goal.user_id,
+            func.sum(case((Goal.status == GOAL_STATUS_ACTIVE, 1), else_=0)),
+            func.sum(case((Goal.status == GOAL_STATUS_COMPLETED, 1), else_=0))
+        ).where(in_range(Goal.user_id)).group_by(Goal.user_id)
+    ):
+        summaries[user_id].update(active_goals=active or 0, completed_goals=completed or 0)
+
+    return summaries
+
+
+def rebuild_summaries(first_id, last_id=None):
+    """
+    Replace the summaries of users first_id..last_id with freshly computed ones.
+
+    The summary rows are created if missing and locked (SELECT ... FOR UPDATE,
+    in user id order) before the raw tables are read, so a concurrent
+    `apply_summary_deltas` either commits first and is counted, or waits and
+    applies its delta on top of the rebuilt row. The new values are written
+    with one INSERT ... ON CONFLICT DO UPDATE.
+    """
+    last_id = first_id if last_id is None else last_id
+    table = UserSummary.__table__
+    user_ids = db.session.scalars(select(User.id).where(User.id.between(first_id, last_id))).all()
+    if not user_ids:
+        return 0
+    db.session.execute(
+        postgresql.insert(table).on_conflict_do_nothing(index_elements=[table.c.user_id]),
+        [{'user_id': user_id} for user_id in user_ids]
+    )
+    db.session.execute(
+        select(table.c.user_id).where(table.c.user_id.between(first_id, last_id)).order_by(table.c.user_id).with_for_update()
+    )
+
+    summaries = compute_summaries(first_id, last_id)
+    if not summaries:
+        return 0
+    now = datetime.utcnow()
+    statement = postgresql.insert(table)
+    statement = statement.on_conflict_do_update(
+        index_elements=[table.c.user_id],
+        set_={column.name: statement.excluded[column.name] for column in table.columns if column.name != 'user_id'}
+    )
+    db.session.execute(statement, [
+        {'user_id': user_id, 'updated_at': now, **values} for user_id, values in summaries.items()
+    ])
+    return len(summaries)
+
+
+def user_id_chunks(chunk_size):
+    first_id, last_id = db.session.execute(select(func.min(User.id), func.max(User.id))).one()
+    if first_id is None:
+        return []
+    return [(start, min(start + chunk_size - 1, last_id)) for start in range(first_id, last_id + 1, chunk_size)]
+
+
+def _rebuild_chunk(app, first_id, last_id):
+    with app.app_context():
+        try:
+            count = rebuild_summaries(first_id, last_id)
+            db.session.commit()
+            return count
+        except Exception:
+            db.session.rollback()
+            raise
+
+
+def rebuild_all_summaries(app, workers=4, chunk_size=REBUILD_CHUNK_SIZE):
+    """Recompute every summary, one user id chunk per transaction on a worker pool"""
+    with app.app_context():
+        chunks = user_id_chunks(chunk_size)
+        db.session.rollback()
+
+    with ThreadPoolExecutor(max_workers=workers, thread_name_prefix='summary-rebuild') as executor:
+        return sum(executor.map(lambda chunk: _rebuild_chunk(app, *chunk), chunks))
+
+
+def check_summaries(chunk_size=REBUILD_CHUNK_SIZE):
+    """
+    Compare stored summaries with the raw aggregates and return a list of
+    (user_id, field, stored, actual) mismatches. Missing rows count as zeros.
+    """
+    start = window_start().isoformat()
+    mismatches = []
+    for first_id, last_id in user_id_chunks(chunk_size):
+        stored = {
+            summary.user_id: summary
+            for summary in db.session.scalars(
+                select(UserSummary).where(UserSummary.user_id.between(first_id, last_id))
+            )
+        }
+        for user_id, actual in compute_summaries(first_id, last_id).items():
+            summary = stored.get(user_id)
+            for field, value in actual.items():
+                current = getattr(summary, field) if summary else None
+                if field == 'recent_days':
+                    current = {day: list(totals) for day, totals in (current or {}).items() if day >= start}
+                else:
+                    current = current or 0
+                if current != value:
+                    mismatches.append((user_id, field, current, value))
+    return mismatches
@@ -11,6 +11,9 @@ GOAL_STATUS_COMPLETED = 'completed'
 GOAL_STATUS_FAILED = 'failed'
 GOAL_STATUS_STOPPED = 'stopped'
 
+# Price of one cigarette, used for money saved
+CIGARETTE_PRICE = 25
+
 SENDER_USER = 'user'
 SENDER_ASSISTANT = 'assistant'
 
@@ -57,6 +60,7 @@ CONTENT_SUCCESS_STORIES = [
 
 NOTIF_ACHIEVEMENT_EARNED = "achievement_earned"
 NOTIF_GOAL_COMPLETED = "goal_completed"
+NOTIF_GOAL_REMINDER = "goal_reminder"
 NOTIF_NEW_MESSAGE = "new_message"
 NOTIF_STREAK_MILESTONE = "streak_milestone"
 NOTIF_MOTIVATIONAL = "motivational"
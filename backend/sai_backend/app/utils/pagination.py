@@ -0,0 +1,92 @@
+"""
+Keyset (cursor) pagination for list endpoints.
+
+`paginate()` runs LIMIT/OFFSET, so page N reads and discards every row of
+pages 1..N-1, and every page also runs a COUNT(*). A keyset page continues
+from the sort key of the last row the client saw instead:
+WHERE (created_at, id) > (:created_at, :id) ORDER BY created_at, id LIMIT n.
+It reads only n + 1 rows from a matching index, however deep the page.
+
+The sort columns must form a unique key (hence the id tie-breaker) and be
+non-null. Cursors are opaque to clients: base64url JSON of the last row's
+sort key. A client sends `?cursor=` for the first page and then the
+`next_cursor` of each response, until it is null. `include_total=false`
+skips the COUNT(*) in both modes; `offset_page()` then fetches one extra row
+to tell whether there is a next page.
+"""
+import base64
+import json
+from datetime import date, datetime
+from sqlalchemy import literal, tuple_
+
+
+class InvalidCursor(ValueError):
+    pass
+
+
+def include_total_arg(args):
+    return args.get('include_total', 'true').strip().lower() not in ('0', 'false', 'no', 'off')
+
+
+def encode_cursor(values):
+    payload = [value.isoformat() if isinstance(value, (date, datetime)) else value for value in values]
+    return base64.urlsafe_b64encode(json.dumps(payload, separators=(',', ':')).encode()).decode().rstrip('=')
+
+
+def decode_cursor(token, columns):
+    """Sort key values of a cursor, converted to the columns' Python types"""
+    try:
+        payload = json.loads(base64.urlsafe_b64decode(token + '=' * (-len(token) % 4)))
+        if not isinstance(payload, list) or len(payload) != len(columns):
+            raise InvalidCursor(token)
+        values = []
+        for column, value in zip(columns, payload):
+            python_type = column.type.python_type
+            if python_type is datetime:
+                values.append(datetime.fromisoformat(value))
+            elif python_type is date:
+                values.append(date.fromisoformat(value))
+            else:
+                values.append(python_type(value))
+        return values
+    except (ValueError, TypeError) as e:
+        raise InvalidCursor(token) from e
+
+
+def offset_page(query, page, per_page, with_total=True):
+    """
+    One LIMIT/OFFSET page of the ordered `query`.
+
+    Returns (items, total, pages, has_next); total and pages are None when
+    with_total is False, and has_next then comes from reading per_page + 1 rows.
+    """
+    if with_total:
+        pagination = query.paginate(page=page, per_page=per_page, error_out=False)
+        return pagination.items, pagination.total, pagination.pages, pagination.has_next
+
+    page, per_page = max(page, 1), max(per_page, 1)
+    items = query.limit(per_page + 1).offset((page - 1) * per_page).all()
+    return items[:per_page], None, None, len(items) > per_page
+
+
+def keyset_page(query, columns, per_page, cursor='', descending=False, with_total=True):
+    """
+    One page of `query` ordered by `columns` (all ascending or all descending),
+    starting after `cursor` ('' for the first page).
+
+    Returns (items, next_cursor, total); next_cursor is None on the last page
+    and total is None when with_total is False.
+    """
+    total = query.order_by(None).count() if with_total else None
+
+    if cursor:
+        key = tuple_(*columns)
+        after = tuple_(*[literal(value, column.type) for column, value in zip(columns, decode_cursor(cursor, columns))])
+        query = query.filter(key < after if descending else key > after)
+    query = query.order_by(*[column.desc() if descending else column.asc() for column in columns])
+
+    items = query.limit(per_page + 1).all()
+    if len(items) <= per_page:
+        return items, None, total
+    items = items[:per_page]
+    return items, encode_cursor([getattr(items[-1], column.key) for column in columns]), total
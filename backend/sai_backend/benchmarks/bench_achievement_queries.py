@@ -0,0 +1,78 @@
+"""
+Per-request query count for POST /api/achievements/check.
+
+Grows the achievement catalogue and shows that the number of SQL statements
+issued by one check stays constant.
+
+Usage:
+    python benchmarks/bench_achievement_queries.py
+"""
+from common import QueryCounter, print_table, timed
+
+from datetime import date, timedelta
+from app import create_app
+from app.extensions import db
+from app.models.achievement import Achievement, UserAchievement
+from app.models.notification import Notification
+from app.models.tracking import SmokingRecord
+from app.models.user import User, UserProfile
+
+CATALOGUE_SIZES = [30, 300, 3000]
+BENCH_PREFIX = 'bench_achievement_'
+
+
+def main():
+    app = create_app()
+    client = app.test_client()
+
+    with app.app_context():
+        user = User(username=f'{BENCH_PREFIX}user', email=f'{BENCH_PREFIX}user@example.com', password_hash='x')
+        db.session.add(user)
+        db.session.flush()
+        db.session.add(UserProfile(user_id=user.id, cigarettes_per_day=10, longest_streak_days=10, total_money_saved=500))
+        for day in range(10):
+            db.session.add(SmokingRecord(user_id=user.id, record_date=date.today() - timedelta(days=day), cigarettes_smoked=0))
+        db.session.commit()
+        user_id = user.id
+
+        rows = []
+        try:
+            for size in CATALOGUE_SIZES:
+                missing = size - Achievement.query.count()
+                # Names are unique: continue numbering after the previous size's rows
+                offset = Achievement.query.filter(Achievement.name.like(f'{BENCH_PREFIX}%')).count()
+                criteria = ['days_smoke_free', 'money_saved', 'goals_completed', 'content_completed', 'total_records']
+                db.session.add_all([
+                    Achievement(
+                        name=f'{BENCH_PREFIX}{i}',
+                        badge_type='bench',
+                        criteria_type=criteria[i % len(criteria)],
+                        criteria_value=i % 20,
+                        points=1
+                    )
+                    for i in range(offset, offset + max(missing, 0))
+                ])
+                UserAchievement.query.filter_by(user_id=user_id).delete()
+                Notification.query.filter_by(user_id=user_id).delete()
+                db.session.commit()
+
+                with QueryCounter(db.engine) as counter, timed() as elapsed:
+                    response = client.post('/api/achievements/check', json={'user_id': user_id})
+
+                rows.append([
+                    Achievement.query.count(),
+                    response.json['count'],
+                    counter.count,
+                    f"{elapsed['seconds'] * 1000:.1f}"
+                ])
+        finally:
+            db.session.rollback()
+            Achievement.query.filter(Achievement.name.like(f'{BENCH_PREFIX}%')).delete(synchronize_session=False)
+            db.session.delete(db.session.get(User, user_id))
+            db.session.commit()
+
+    print_table(['achievements', 'newly_earned', 'queries', 'ms'], rows)
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,97 @@
+"""
+App startup cost: factory time and SQL issued at boot.
+
+Compares three ways of starting a process:
+
+- before: create_app followed by the per-boot work it used to do itself (one
+  SELECT per catalogue achievement, a podcast count, the due-goal scan and a
+  commit), measured in the steady state where everything is already seeded.
+- now: create_app alone, which no longer touches the database.
+- `flask sai bootstrap`: the single-statement seeders plus the goal check,
+  run once per deploy instead of once per worker.
+
+Totals are also shown for --workers processes booting (gunicorn workers,
+`flask db` runs, test sessions).
+
+Usage:
+    python benchmarks/bench_app_startup.py [--runs 20] [--workers 4]
+"""
+from common import QueryCounter, print_table, timed
+
+import argparse
+import statistics
+from datetime import date
+
+from sqlalchemy.engine import Engine
+
+from app import create_app
+from app.achievement_seed import seed_achievements
+from app.extensions import db
+from app.models.achievement import Achievement
+from app.models.content import EducationalContent
+from app.models.goal import Goal
+from app.podcast_seed import seed_podcasts
+from app.scheduler import remind_due_goals
+
+
+def legacy_boot_work(achievement_names):
+    """What create_app ran before: check-then-insert seeding and the goal scan"""
+    for name in achievement_names:
+        Achievement.query.filter_by(name=name).first()
+    db.session.commit()
+    EducationalContent.query.filter_by(category='podcasts').count()
+    Goal.query.filter(Goal.target_date == date.today(), Goal.notification_sent == False).all()
+    db.session.commit()
+
+
+def boot(work=None):
+    """Build an app (and run `work` in its context); returns (seconds, statements)"""
+    with QueryCounter(Engine) as counter, timed() as elapsed:
+        app = create_app()
+        if work:
+            with app.app_context():
+                work()
+                db.session.remove()
+    return elapsed['seconds'], counter.count
+
+
+def main():
+    parser = argparse.ArgumentParser()
+    parser.add_argument('--runs', type=int, default=20)
+    parser.add_argument('--workers', type=int, default=4, help='processes booting per deploy')
+    args = parser.parse_args()
+
+    app = create_app()
+    with app.app_context():
+        dialect = db.engine.dialect.name
+        # Steady state: the catalogue is already there, as it is on every boot after the first
+        seed_achievements()
+        seed_podcasts()
+        achievement_names = [name for (name,) in db.session.query(Achievement.name)]
+
+    scenarios = [
+        ('before: create_app with seeding + goal check', lambda: legacy_boot_work(achievement_names), args.workers),
+        ('now: create_app', None, args.workers),
+        ('now: flask sai bootstrap', lambda: (seed_achievements(), seed_podcasts(), remind_due_goals()), 1)
+    ]
+    rows = []
+    for label, work, per_deploy in scenarios:
+        boot(work)  # warm up imports and the connection pool
+        samples = [boot(work) for _ in range(args.runs)]
+        seconds = statistics.median(s for s, _ in samples)
+        statements = samples[-1][1]
+        rows.append([
+            label,
+            f"{seconds * 1000:.1f}",
+            statements,
+            per_deploy,
+            f"{seconds * per_deploy * 1000:.1f}",
+            statements * per_deploy
+        ])
+
+    print(f"\n{dialect}, median of {args.runs} boots\n")
+    print_table(['startup', 'ms per boot', 'SQL per boot', 'runs per deploy', 'ms per deploy', 'SQL per deploy'], rows)
+
+
+if __name__ == '__main__':
+    main()
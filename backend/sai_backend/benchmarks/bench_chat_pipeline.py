@@ -0,0 +1,139 @@
+"""
+Load test for POST /api/chat/message against a local stub RAG server.
+
+The same burst of chat messages goes through a fixed pool of request
+workers (standing in for WSGI workers), first in the synchronous mode and
+then with "async": true. For each mode it reports how long a request keeps a
+worker busy, overall worker occupancy, end-to-end reply latency and how long
+database connections stay checked out.
+
+Usage:
+    python benchmarks/bench_chat_pipeline.py [--messages 40] [--workers 4] [--rag-delay 1.0]
+"""
+from common import ConnectionHoldTracker, percentile, print_table
+
+import argparse
+import json
+import os
+import threading
+import time
+from concurrent.futures import ThreadPoolExecutor
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+
+STUB_HOST = '127.0.0.1'
+STUB_PORT = 8765
+os.environ['RAG_API_URL'] = f'http://{STUB_HOST}:{STUB_PORT}/query'
+
+from app import create_app
+from app.extensions import db
+from app.models.chat import ChatSession
+from app.models.user import User
+
+BENCH_PREFIX = 'bench_chat_'
+
+
+class StubRagHandler(BaseHTTPRequestHandler):
+    """Answers every /query after a fixed delay, like a slow generate() call"""
+
+    def do_POST(self):
+        length = int(self.headers.get('Content-Length', 0))
+        self.rfile.read(length)
+        time.sleep(self.server.rag_delay)
+        body = json.dumps({'answer': 'جواب تجريبي', 'intent': 'smoking', 'confidence': 0.9}).encode('utf-8')
+        self.send_response(200)
+        self.send_header('Content-Type', 'application/json')
+        self.send_header('Content-Length', str(len(body)))
+        self.end_headers()
+        self.wfile.write(body)
+
+    def log_message(self, *args):
+        pass
+
+
+def run_scenario(app, session_id, use_async, messages, workers):
+    """Send `messages` concurrent chats through `workers` request workers"""
+    request_pool = ThreadPoolExecutor(max_workers=workers)
+    busy_times = []
+    reply_latencies = []
+    lock = threading.Lock()
+
+    def handle(method, url, payload=None):
+        started = time.perf_counter()
+        client = app.test_client()
+        response = client.open(url, method=method, json=payload)
+        with lock:
+            busy_times.append(time.perf_counter() - started)
+        return response
+
+    def chat(i):
+        started = time.perf_counter()
+        payload = {'session_id': session_id, 'message': f'سؤال {i}', 'async': use_async}
+        response = request_pool.submit(handle, 'POST', '/api/chat/message', payload).result()
+        if use_async:
+            reply_url = response.json['reply_url']
+            while request_pool.submit(handle, 'GET', reply_url).result().status_code == 202:
+                time.sleep(0.05)
+        with lock:
+            reply_latencies.append(time.perf_counter() - started)
+
+    with app.app_context(), ConnectionHoldTracker(db.engine) as tracker:
+        started = time.perf_counter()
+        with ThreadPoolExecutor(max_workers=messages) as clients:
+            list(clients.map(chat, range(messages)))
+        wall = time.perf_counter() - started
+
+    request_pool.shutdown()
+    return [
+        'async' if use_async else 'sync',
+        f'{wall:.2f}',
+        f'{sum(busy_times) / len(busy_times) * 1000:.0f}',
+        f'{sum(busy_times) / (workers * wall):.0%}',
+        f'{percentile(reply_latencies, 50):.2f}',
+        f'{percentile(reply_latencies, 95):.2f}',
+        f'{sum(tracker.holds) / len(tracker.holds) * 1000:.1f}',
+        f'{max(tracker.holds) * 1000:.1f}'
+    ]
+
+
+def main():
+    parser = argparse.ArgumentParser()
+    parser.add_argument('--messages', type=int, default=40)
+    parser.add_argument('--workers', type=int, default=4)
+    parser.add_argument('--rag-delay', type=float, default=1.0)
+    args = parser.parse_args()
+
+    stub = ThreadingHTTPServer((STUB_HOST, STUB_PORT), StubRagHandler)
+    stub.rag_delay = args.rag_delay
+    threading.Thread(target=stub.serve_forever, daemon=True).start()
+
+    app = create_app()
+    with app.app_context():
+        user = User(username=f'{BENCH_PREFIX}user', email=f'{BENCH_PREFIX}user@example.com', password_hash='x')
+        db.session.add(user)
+        db.session.flush()
+        session = ChatSession(user_id=user.id, session_title='bench')
+        db.session.add(session)
+        db.session.commit()
+        user_id, session_id = user.id, session.id
+
+    try:
+        rows = [
+            run_scenario(app, session_id, use_async, args.messages, args.workers)
+            for use_async in (False, True)
+        ]
+    finally:
+        stub.shutdown()
+        with app.app_context():
+            db.session.delete(db.session.get(User, user_id))
+            db.session.commit()
+
+    print(f"{args.messages} messages, {args.workers} request workers, "
+          f"{app.config['CHAT_WORKERS']} chat workers, RAG delay {args.rag_delay}s\n")
+    print_table(
+        ['mode', 'wall_s', 'worker_busy_ms', 'occupancy', 'reply_p50_s', 'reply_p95_s', 'conn_hold_ms', 'conn_hold_max_ms'],
+        rows
+    )
+
+
+if __name__ == '__main__':
+    main()
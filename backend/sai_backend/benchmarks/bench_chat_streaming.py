@@ -0,0 +1,142 @@
+"""
+Time-to-first-token benchmark for the chat routes against a local stub RAG server.
+
+The stub emits the answer one token at a time with a fixed per-token delay,
+both as a single JSON body on /query and as server-sent events on
+/query/stream. For POST /api/chat/message and POST /api/chat/message/stream
+it reports time to first token (for the buffered route this is the whole
+response time) and total latency.
+
+Usage:
+    python benchmarks/bench_chat_streaming.py [--messages 20] [--tokens 40] [--token-delay 0.05]
+"""
+from common import percentile, print_table
+
+import argparse
+import json
+import os
+import threading
+import time
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+
+STUB_HOST = '127.0.0.1'
+STUB_PORT = 8766
+os.environ['RAG_API_URL'] = f'http://{STUB_HOST}:{STUB_PORT}/query'
+os.environ['RAG_STREAM_URL'] = f'http://{STUB_HOST}:{STUB_PORT}/query/stream'
+
+from app import create_app
+from app.extensions import db
+from app.models.chat import ChatSession, ChatMessage
+from app.models.user import User
+
+BENCH_PREFIX = 'bench_stream_'
+
+
+class StubRagHandler(BaseHTTPRequestHandler):
+    """Generates `tokens` tokens with a fixed delay each, buffered or streamed"""
+
+    protocol_version = 'HTTP/1.1'
+
+    def do_POST(self):
+        length = int(self.headers.get('Content-Length', 0))
+        self.rfile.read(length)
+        tokens = [f'كلمة{i} ' for i in range(self.server.tokens)]
+
+        if self.path.endswith('/stream'):
+            self.send_response(200)
+            self.send_header('Content-Type', 'text/event-stream')
+            self.send_header('Transfer-Encoding', 'chunked')
+            self.end_headers()
+            self.send_event('meta', {'query_type': 'smoking', 'confidence': 0.9, 'rag_used': True, 'all_documents': []})
+            for token in tokens:
+                time.sleep(self.server.token_delay)
+                self.send_event('token', {'text': token})
+            self.send_event('done', {'answer': ''.join(tokens).strip()})
+            self.wfile.write(b'0\r\n\r\n')
+            return
+
+        time.sleep(self.server.token_delay * len(tokens))
+        body = json.dumps({'answer': ''.join(tokens).strip(), 'intent': 'smoking', 'confidence': 0.9}).encode('utf-8')
+        self.send_response(200)
+        self.send_header('Content-Type', 'application/json')
+        self.send_header('Content-Length', str(len(body)))
+        self.end_headers()
+        self.wfile.write(body)
+
+    def send_event(self, event, data):
+        """Write one event as its own chunk, the way uvicorn sends a StreamingResponse"""
+        payload = f"event: {event}\ndata: {json.dumps(data, ensure_ascii=False)}\n\n".encode('utf-8')
+        self.wfile.write(f'{len(payload):x}\r\n'.encode('ascii') + payload + b'\r\n')
+        self.wfile.flush()
+
+    def log_message(self, *args):
+        pass
+
+
+def measure(app, session_id, url, i):
+    """Return (time_to_first_token, total) for one chat message"""
+    client = app.test_client()
+    started = time.perf_counter()
+    response = client.post(url, json={'session_id': session_id, 'message': f'سؤال {i}'})
+    first_token = None
+    for chunk in response.response:
+        if first_token is None and (b'event: token' in chunk if isinstance(chunk, bytes) else 'event: token' in chunk):
+            first_token = time.perf_counter() - started
+    response.close()
+    total = time.perf_counter() - started
+    return first_token if first_token is not None else total, total
+
+
+def main():
+    parser = argparse.ArgumentParser()
+    parser.add_argument('--messages', type=int, default=20)
+    parser.add_argument('--tokens', type=int, default=40)
+    parser.add_argument('--token-delay', type=float, default=0.05)
+    args = parser.parse_args()
+
+    stub = ThreadingHTTPServer((STUB_HOST, STUB_PORT), StubRagHandler)
+    stub.tokens = args.tokens
+    stub.token_delay = args.token_delay
+    threading.Thread(target=stub.serve_forever, daemon=True).start()
+
+    app = create_app()
+    with app.app_context():
+        user = User(username=f'{BENCH_PREFIX}user', email=f'{BENCH_PREFIX}user@example.com', password_hash='x')
+        db.session.add(user)
+        db.session.flush()
+        session = ChatSession(user_id=user.id, session_title='bench')
+        db.session.add(session)
+        db.session.commit()
+        user_id, session_id = user.id, session.id
+
+    rows = []
+    try:
+        for url in ('/api/chat/message', '/api/chat/message/stream'):
+            ttfts, totals = [], []
+            for i in range(args.messages):
+                ttft, total = measure(app, session_id, url, i)
+                ttfts.append(ttft)
+                totals.append(total)
+            rows.append([
+                url,
+                f'{percentile(ttfts, 50) * 1000:.0f}',
+                f'{percentile(ttfts, 95) * 1000:.0f}',
+                f'{percentile(totals, 50) * 1000:.0f}',
+                f'{percentile(totals, 95) * 1000:.0f}'
+            ])
+
+        with app.app_context():
+            stored = ChatMessage.query.filter_by(session_id=session_id).count()
+    finally:
+        stub.shutdown()
+        with app.app_context():
+            db.session.delete(db.session.get(User, user_id))
+            db.session.commit()
+
+    print(f"{args.messages} messages per route, {args.tokens} tokens at {args.token_delay * 1000:.0f}ms each, "
+          f"{stored} chat messages stored\n")
+    print_table(['route', 'ttft_p50_ms', 'ttft_p95_ms', 'total_p50_ms', 'total_p95_ms'], rows)
+
+
+if __name__ == '__main__':
+    main()
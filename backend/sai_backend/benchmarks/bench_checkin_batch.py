@@ -0,0 +1,123 @@
+"""
+Offline sync: N single check-in requests vs one batch request.
+
+Two users sync the same N days of check-ins (a user coming back after N days
+offline): one through N POST /api/tracking/record calls, the other through a
+single POST /api/tracking/records/batch. Requests go through the Flask test
+client, so the numbers cover the whole route (streaks, savings, summary,
+achievements, commits) but not the network round-trips the batch also saves.
+Reports statements, time and check-ins per second, and whether both
+users end up with the same profile counters and dashboard summary.
+
+Usage:
+    python benchmarks/bench_checkin_batch.py [--days 7] [--repeat 5]
+"""
+from common import QueryCounter, print_table, timed
+
+import argparse
+from datetime import date, timedelta
+
+from app import create_app
+from app.extensions import db
+from app.models.achievement import UserAchievement
+from app.models.notification import Notification, NotificationCounter
+from app.models.tracking import RecordTrigger, SmokingRecord
+from app.models.user import User, UserProfile, UserSummary
+
+BENCH_PREFIX = 'bench_checkin_batch_'
+MOODS = ['calm', 'stressed', 'anxious', 'happy']
+PROFILE_COUNTERS = ['current_streak_days', 'longest_streak_days', 'total_cigarettes_avoided', 'total_money_saved']
+
+
+def create_user(name):
+    user = User(username=f'{BENCH_PREFIX}{name}', email=f'{BENCH_PREFIX}{name}@example.com', password_hash='x')
+    db.session.add(user)
+    db.session.flush()
+    db.session.add(UserProfile(user_id=user.id, cigarettes_per_day=20))
+    db.session.commit()
+    return user.id
+
+
+def cleanup():
+    user_ids = db.session.query(User.id).filter(User.username.like(f'{BENCH_PREFIX}%'))
+    record_ids = db.session.query(SmokingRecord.id).filter(SmokingRecord.user_id.in_(user_ids))
+    RecordTrigger.query.filter(RecordTrigger.record_id.in_(record_ids)).delete(synchronize_session=False)
+    for model in (SmokingRecord, UserAchievement, Notification, NotificationCounter, UserSummary, UserProfile):
+        model.query.filter(model.user_id.in_(user_ids)).delete(synchronize_session=False)
+    User.query.filter(User.username.like(f'{BENCH_PREFIX}%')).delete(synchronize_session=False)
+    db.session.commit()
+
+
+def check_ins(days, offset):
+    """`days` consecutive check-ins ending `offset` days ago, oldest first"""
+    end = date.today() - timedelta(days=offset)
+    return [
+        {
+            'record_date': (end - timedelta(days=day)).isoformat(),
+            'cigarettes_smoked': 0 if day % 4 else 3,
+            'cravings_count': day % 5,
+            'mood': MOODS[day % len(MOODS)],
+            'triggers': 'coffee, stress' if day % 2 else 'after meals'
+        }
+        for day in reversed(range(days))
+    ]
+
+
+def sync_single(client, user_id, items):
+    for item in items:
+        response = client.post('/api/tracking/record', json={'user_id': user_id, **item})
+        assert response.status_code == 201, response.get_json()
+
+
+def sync_batch(client, user_id, items):
+    response = client.post('/api/tracking/records/batch', json={'user_id': user_id, 'records': items})
+    assert response.status_code == 200 and response.get_json()['failed_count'] == 0, response.get_json()
+
+
+def state(user_id):
+    db.session.expire_all()
+    profile = UserProfile.query.filter_by(user_id=user_id).one()
+    summary = db.session.get(UserSummary, user_id)
+    return (
+        [getattr(profile, name) for name in PROFILE_COUNTERS],
+        (summary.total_records, summary.total_cigarettes, summary.recent_days)
+    )
+
+
+def main():
+    parser = argparse.ArgumentParser()
+    parser.add_argument('--days', type=int, default=7, help='check-ins per sync')
+    parser.add_argument('--repeat', type=int, default=5, help='syncs per variant (each for older days)')
+    args = parser.parse_args()
+
+    app = create_app()
+    client = app.test_client()
+    rows, users = [], {}
+    with app.app_context():
+        dialect = db.engine.dialect.name
+        cleanup()
+        try:
+            for name, sync in (('single POST per check-in', sync_single), ('one batch POST', sync_batch)):
+                user_id = users[name] = create_user(name.split()[0])
+                total = args.days * args.repeat
+                with QueryCounter(db.engine) as counter, timed() as elapsed:
+                    for n in range(args.repeat):
+                        sync(client, user_id, check_ins(args.days, offset=(args.repeat - 1 - n) * args.days))
+                rows.append([
+                    name,
+                    counter.count // args.repeat,
+                    f"{elapsed['seconds'] / args.repeat * 1000:.1f}",
+                    f"{total / elapsed['seconds']:.0f}"
+                ])
+            single, batch = (state(user_id) for user_id in users.values())
+        finally:
+            db.session.rollback()
+            cleanup()
+
+    print(f"{args.repeat} syncs of {args.days} check-ins, {dialect}\n")
+    print_table(['variant', 'statements per sync', 'ms per sync', 'check-ins/s'], rows)
+    print(f"\nsame profile counters: {single[0] == batch[0]}, same summary: {single[1] == batch[1]}")
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,170 @@
+"""
+Content search: ILIKE substring scan vs ranked full-text search.
+
+Seeds --docs synthetic Arabic transcripts of --words words in a benchmark
+category. The words come from a smoking-cessation vocabulary and are written
+inconsistently, as real transcripts are: some words carry tashkeel, and
+alef / ta marbuta / alef maqsura forms vary. A few rare terms are planted
+in a known number of documents. Each query is then timed (median of
+--repeat) through both paths:
+
+- ilike:    the previous `%q%` match on title and content_text (sequential scan)
+- fulltext: tsvector @@ sai_search_query(q) via the GIN index, ranked by ts_rank
+
+"hits" is the number of results returned (capped at the search limit), and
+"matching docs" the number of documents the query can match, counted the same
+way each path matches. ILIKE misses spellings that differ from the query;
+full-text search finds them.
+
+Usage:
+    python benchmarks/bench_content_search.py [--docs 50000] [--words 200] [--repeat 5]
+"""
+from common import print_table, timed
+
+import argparse
+import random
+import statistics
+from datetime import datetime, timedelta
+
+from sqlalchemy import desc, func, insert
+
+from app import create_app
+from app.extensions import db
+from app.models.content import EducationalContent
+from app.services.content_service import SEARCH_LIMIT, search_published, search_terms
+
+BENCH_CATEGORY = 'bench_content_search'
+SEED_BATCH = 2000
+
+VOCABULARY = [
+    'التدخين', 'السيجارة', 'النيكوتين', 'الإقلاع', 'الصحة', 'الرئة', 'القلب', 'التنفس', 'الرغبة', 'الانسحاب',
+    'العصبية', 'التوتر', 'النوم', 'الرياضة', 'المشي', 'الماء', 'القهوة', 'العائلة', 'الأصدقاء', 'المال',
+    'الدينار', 'الإرادة', 'الصبر', 'الأمل', 'النجاح', 'التحدي', 'اليوم', 'الأسبوع', 'الشهر', 'السنة',
+    'نحبس', 'نقص', 'نبدا', 'نقدر', 'صعيب', 'ساهل', 'مليح', 'خطير', 'الطبيب', 'الدواء',
+    'اللصقة', 'العلكة', 'الضغط', 'الدم', 'السعال', 'الصدر', 'الطاقة', 'الحياة', 'الأطفال', 'مستشفى'
+]
+# Rare term -> number of documents it is planted in
+PLANTED = {'الإقلاعَ': 40, 'مُدمِن': 25, 'فَترة': 15}
+HARAKAT = ['\u064e', '\u064f', '\u0650', '\u0651', '\u0652']  # fatha, damma, kasra, shadda, sukun
+QUERIES = [
+    ('common word', 'التدخين'),
+    ('two words', 'الرغبة القهوة'),
+    ('rare, vocalised in text', 'مدمن'),
+    ('rare, alef form', 'الاقلاع'),
+    ('ta marbuta form', 'فترة'),
+    ('Darija question', 'كيفاش نحبس التدخين'),
+    ('no match', 'زرافة')
+]
+
+
+def variant(word, rng):
+    """The word as a careless transcript might spell it"""
+    if rng.random() < 0.3 and word[:2] == 'ال' and len(word) > 2 and word[2] in 'اأإ':
+        word = word[:2] + rng.choice('اأإ') + word[3:]
+    if word.endswith('ة') and rng.random() < 0.3:
+        word = word[:-1] + 'ه'
+    if rng.random() < 0.25:
+        word = ''.join(letter + (rng.choice(HARAKAT) if rng.random() < 0.4 else '') for letter in word)
+    return word
+
+
+def ilike_search(query_text):
+    """The search route before full-text search: substring match, newest first"""
+    return EducationalContent.query.filter(
+        EducationalContent.is_published == True,
+        db.or_(
+            EducationalContent.title.ilike(f'%{query_text}%'),
+            EducationalContent.content_text.ilike(f'%{query_text}%')
+        )
+    ).order_by(desc(EducationalContent.created_at)).limit(SEARCH_LIMIT).all()
+
+
+def seed(docs, words, rng):
+    planted_in = {term: set(rng.sample(range(docs), count)) for term, count in PLANTED.items() if count <= docs}
+    start = datetime(2024, 1, 1)
+    rows = []
+    for n in range(docs):
+        text = [variant(rng.choice(VOCABULARY), rng) for _ in range(words)]
+        for term, documents in planted_in.items():
+            if n in documents:
+                text[rng.randrange(words)] = term
+        rows.append({
+            'title': f'{BENCH_CATEGORY} {n} {variant(rng.choice(VOCABULARY), rng)}',
+            'content_type': 'podcast',
+            'content_text': ' '.join(text),
+            'category': BENCH_CATEGORY,
+            'language': 'ar-dz',
+            'is_published': True,
+            'created_at': start + timedelta(minutes=n)
+        })
+        if len(rows) == SEED_BATCH:
+            db.session.execute(insert(EducationalContent), rows)
+            rows = []
+    if rows:
+        db.session.execute(insert(EducationalContent), rows)
+    db.session.commit()
+
+
+def cleanup():
+    EducationalContent.query.filter_by(category=BENCH_CATEGORY).delete(synchronize_session=False)
+    db.session.commit()
+
+
+def median_ms(function, repeat):
+    samples = []
+    for _ in range(repeat):
+        with timed() as elapsed:
+            result = function()
+        samples.append(elapsed['seconds'] * 1000)
+    return statistics.median(samples), result
+
+
+def main():
+    parser = argparse.ArgumentParser()
+    parser.add_argument('--docs', type=int, default=50000)
+    parser.add_argument('--words', type=int, default=200, help='words per transcript')
+    parser.add_argument('--repeat', type=int, default=5)
+    parser.add_argument('--seed', type=int, default=7)
+    args = parser.parse_args()
+
+    app = create_app()
+    rows = []
+    with app.app_context():
+        cleanup()
+        try:
+            with timed() as elapsed:
+                seed(args.docs, args.words, random.Random(args.seed))
+            print(f"Seeded {args.docs} transcripts in {elapsed['seconds']:.1f}s")
+            db.session.execute(db.text('ANALYZE educational_content'))
+            db.session.commit()
+
+            for label, query_text in QUERIES:
+                ilike_ms, ilike_results = median_ms(lambda: ilike_search(query_text), args.repeat)
+                ilike_matching = EducationalContent.query.filter(
+                    EducationalContent.category == BENCH_CATEGORY,
+                    EducationalContent.content_text.ilike(f'%{query_text}%')
+                ).count()
+                fulltext_ms, fulltext_results = median_ms(lambda: search_published(query_text), args.repeat)
+                terms = ' '.join(search_terms(query_text))
+                fulltext_matching = EducationalContent.query.filter(
+                    EducationalContent.category == BENCH_CATEGORY,
+                    EducationalContent.search_vector.op('@@')(func.sai_search_query(terms))
+                ).count()
+                rows.append([
+                    label, query_text, f"{ilike_ms:.1f}", len(ilike_results), ilike_matching,
+                    f"{fulltext_ms:.1f}", len(fulltext_results), fulltext_matching
+                ])
+        finally:
+            db.session.rollback()
+            cleanup()
+
+    print(f"\n{args.docs} transcripts x {args.words} words, median of {args.repeat}\n")
+    print_table(
+        ['query', 'text', 'ilike ms', 'ilike hits', 'ilike matching docs', 'fulltext ms', 'fulltext hits', 'fulltext matching docs'],
+        rows
+    )
+    print(f"\nPlanted: {', '.join(f'{term} in {count} docs' for term, count in PLANTED.items())}")
+
+
+if __name__ == '__main__':
+    main()
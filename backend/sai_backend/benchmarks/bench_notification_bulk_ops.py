@@ -0,0 +1,158 @@
+"""
+Legacy vs set-based mark-all-read, delete-read and clear-old.
+
+Seeds one user with a long notification history (half of it read, spread
+over the last years), then runs each operation twice on a fresh copy of that
+history: the previous load-every-row ORM loop, and the notification service's
+single UPDATE / DELETE ... RETURNING. Reports SQL statements issued (and
+per-row executions inside executemany batches), rows loaded into Python and
+wall time.
+
+Usage:
+    python benchmarks/bench_notification_bulk_ops.py [--notifications 10000] [--days 30]
+"""
+from common import QueryCounter, print_table, timed
+
+import argparse
+from datetime import datetime, timedelta
+
+from sqlalchemy import insert
+
+from app import create_app
+from app.extensions import db
+from app.models.notification import Notification, NotificationCounter
+from app.models.user import User
+from app.services.notification_service import delete_read, mark_all_read, rebuild_counters
+from app.utils.constants import NOTIF_DAILY_REMINDER, NOTIF_MOTIVATIONAL
+
+BENCH_PREFIX = 'bench_bulk_ops_'
+INSERT_BATCH = 10000
+
+
+def seed_user():
+    user = User(username=f'{BENCH_PREFIX}user', email=f'{BENCH_PREFIX}user@example.com', password_hash='x')
+    db.session.add(user)
+    db.session.commit()
+    return user.id
+
+
+def seed_notifications(user_id, count):
+    now = datetime.utcnow()
+    rows = [
+        {
+            'user_id': user_id,
+            'notification_type': NOTIF_DAILY_REMINDER if n % 3 else NOTIF_MOTIVATIONAL,
+            'title': 'bench',
+            'message': 'bench',
+            'is_read': n % 2 == 0,
+            'created_at': now - timedelta(hours=n * 4)
+        }
+        for n in range(count)
+    ]
+    for start in range(0, len(rows), INSERT_BATCH):
+        db.session.execute(insert(Notification), rows[start:start + INSERT_BATCH])
+    rebuild_counters(user_id)
+    db.session.commit()
+
+
+def clear_notifications(user_id):
+    Notification.query.filter_by(user_id=user_id).delete(synchronize_session=False)
+    NotificationCounter.query.filter_by(user_id=user_id).delete(synchronize_session=False)
+    db.session.commit()
+
+
+def cleanup():
+    user_ids = db.session.query(User.id).filter(User.username.like(f'{BENCH_PREFIX}%'))
+    Notification.query.filter(Notification.user_id.in_(user_ids)).delete(synchronize_session=False)
+    NotificationCounter.query.filter(NotificationCounter.user_id.in_(user_ids)).delete(synchronize_session=False)
+    User.query.filter(User.username.like(f'{BENCH_PREFIX}%')).delete(synchronize_session=False)
+    db.session.commit()
+
+
+# The route bodies before the set-based rewrite
+
+def legacy_mark_all_read(user_id, days):
+    unread_notifications = Notification.query.filter_by(user_id=user_id, is_read=False).all()
+    for notification in unread_notifications:
+        notification.is_read = True
+        notification.read_at = datetime.utcnow()
+    db.session.commit()
+    return len(unread_notifications)
+
+
+def legacy_delete_read(user_id, days):
+    read_notifications = Notification.query.filter_by(user_id=user_id, is_read=True).all()
+    for notification in read_notifications:
+        db.session.delete(notification)
+    db.session.commit()
+    return len(read_notifications)
+
+
+def legacy_clear_old(user_id, days):
+    old_notifications = Notification.query.filter(
+        Notification.user_id == user_id,
+        Notification.is_read == True,
+        Notification.created_at < datetime.utcnow() - timedelta(days=days)
+    ).all()
+    for notification in old_notifications:
+        db.session.delete(notification)
+    db.session.commit()
+    return len(old_notifications)
+
+
+def set_mark_all_read(user_id, days):
+    count = mark_all_read(user_id)
+    db.session.commit()
+    return count
+
+
+def set_delete_read(user_id, days):
+    count = delete_read(user_id)
+    db.session.commit()
+    return count
+
+
+def set_clear_old(user_id, days):
+    count = delete_read(user_id, older_than=datetime.utcnow() - timedelta(days=days))
+    db.session.commit()
+    return count
+
+
+OPERATIONS = [
+    ('read-all', legacy_mark_all_read, set_mark_all_read),
+    ('delete-read', legacy_delete_read, set_delete_read),
+    ('clear-old', legacy_clear_old, set_clear_old),
+]
+
+
+def main():
+    parser = argparse.ArgumentParser()
+    parser.add_argument('--notifications', type=int, default=10000)
+    parser.add_argument('--days', type=int, default=30, help='clear-old retention window')
+    args = parser.parse_args()
+
+    app = create_app()
+    rows = []
+    with app.app_context():
+        cleanup()
+        try:
+            user_id = seed_user()
+            for name, legacy, set_based in OPERATIONS:
+                for variant, operation in (('legacy loop', legacy), ('set-based', set_based)):
+                    seed_notifications(user_id, args.notifications)
+                    db.session.expunge_all()
+                    with QueryCounter(db.engine) as counter, timed() as elapsed:
+                        count = operation(user_id, args.days)
+                    loaded = count if variant == 'legacy loop' else 0
+                    rows.append([name, variant, count, counter.count, counter.executions, loaded, f"{elapsed['seconds'] * 1000:.1f}"])
+                    clear_notifications(user_id)
+        finally:
+            db.session.rollback()
+            cleanup()
+
+    print(f"{args.notifications} notifications for one user\n")
+    print_table(['operation', 'variant', 'rows changed', 'statements', 'executions', 'rows loaded', 'ms'], rows)
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,170 @@
+"""
+Throughput and memory of POST /api/notifications/send-bulk style fan-out.
+
+For each recipient count the script seeds that many users, then sends one
+campaign per mode and reports rows/sec and the peak RSS of the process that
+did the sending:
+
+- ids:     explicit recipient list, validated with users.id = ANY(...) and
+           inserted with INSERT ... SELECT per chunk (send_bulk)
+- segment: recipients resolved in SQL from user_profiles (send_bulk)
+- legacy:  the previous per-recipient User.query.get + ORM add loop, only for
+           sizes up to --legacy-max
+
+Every measurement runs in a fresh child process so its peak RSS is its own.
+
+Usage:
+    python benchmarks/bench_notification_fanout.py [--sizes 10000 100000 1000000] [--legacy-max 10000]
+"""
+from common import print_table
+
+import argparse
+import json
+import resource
+import subprocess
+import sys
+import time
+
+from sqlalchemy import insert, select
+
+from app import create_app
+from app.extensions import db
+from app.models.notification import Notification, NotificationCounter
+from app.models.user import User, UserProfile
+from app.services.notification_service import send_bulk
+from app.utils.constants import NOTIF_MOTIVATIONAL
+
+BENCH_PREFIX = 'bench_fanout_'
+BENCH_TITLE = f'{BENCH_PREFIX}campaign'
+# Streak no real user has, so the segment selects exactly the seeded users
+BENCH_STREAK = 1000000
+SEED_BATCH = 10000
+RESULT_MARKER = 'RESULT '
+
+
+def bench_user_ids():
+    return select(User.id).where(User.username.like(f'{BENCH_PREFIX}%'))
+
+
+def seed(size):
+    for start in range(0, size, SEED_BATCH):
+        db.session.execute(insert(User), [
+            {'username': f'{BENCH_PREFIX}{i}', 'email': f'{BENCH_PREFIX}{i}@example.com', 'password_hash': 'x'}
+            for i in range(start, min(start + SEED_BATCH, size))
+        ])
+    db.session.execute(
+        insert(UserProfile).from_select(
+            ['user_id', 'current_streak_days'],
+            select(User.id, db.literal(BENCH_STREAK)).where(User.username.like(f'{BENCH_PREFIX}%'))
+        )
+    )
+    db.session.commit()
+
+
+def clear_campaign():
+    Notification.query.filter(Notification.title == BENCH_TITLE).delete(synchronize_session=False)
+    NotificationCounter.query.filter(NotificationCounter.user_id.in_(bench_user_ids())).delete(synchronize_session=False)
+    db.session.commit()
+
+
+def cleanup():
+    clear_campaign()
+    UserProfile.query.filter(UserProfile.user_id.in_(bench_user_ids())).delete(synchronize_session=False)
+    User.query.filter(User.username.like(f'{BENCH_PREFIX}%')).delete(synchronize_session=False)
+    db.session.commit()
+
+
+def legacy_send(user_ids):
+    """The per-recipient loop send-bulk used before the set-based engine"""
+    created_count = failed_count = 0
+    for user_id in user_ids:
+        user = User.query.get(user_id)
+        if not user:
+            failed_count += 1
+            continue
+        db.session.add(Notification(
+            user_id=user_id,
+            notification_type=NOTIF_MOTIVATIONAL,
+            title=BENCH_TITLE,
+            message='bench'
+        ))
+        created_count += 1
+    db.session.commit()
+    return created_count, failed_count
+
+
+def run_child(mode):
+    """Send one campaign in this process and print its result line"""
+    app = create_app()
+    with app.app_context():
+        user_ids = db.session.scalars(bench_user_ids()).all() if mode in ('ids', 'legacy') else None
+        db.session.rollback()
+
+        started = time.perf_counter()
+        if mode == 'legacy':
+            created_count, _ = legacy_send(user_ids)
+        elif mode == 'ids':
+            created_count, _ = send_bulk(NOTIF_MOTIVATIONAL, BENCH_TITLE, 'bench', user_ids=user_ids)
+        else:
+            created_count, _ = send_bulk(
+                NOTIF_MOTIVATIONAL, BENCH_TITLE, 'bench', segment={'min_streak_days': BENCH_STREAK}
+            )
+        seconds = time.perf_counter() - started
+
+    print(RESULT_MARKER + json.dumps({
+        'created': created_count,
+        'seconds': seconds,
+        # ru_maxrss is in kilobytes on Linux
+        'peak_rss_mb': resource.getrusage(resource.RUSAGE_SELF).ru_maxrss / 1024
+    }))
+
+
+def measure(mode):
+    output = subprocess.run(
+        [sys.executable, __file__, '--child', mode],
+        capture_output=True, text=True, check=True
+    ).stdout
+    line = next(line for line in output.splitlines() if line.startswith(RESULT_MARKER))
+    return json.loads(line[len(RESULT_MARKER):])
+
+
+def main():
+    parser = argparse.ArgumentParser()
+    parser.add_argument('--sizes', type=int, nargs='+', default=[10000, 100000, 1000000])
+    parser.add_argument('--legacy-max', type=int, default=10000)
+    parser.add_argument('--child', choices=['ids', 'segment', 'legacy'], help=argparse.SUPPRESS)
+    args = parser.parse_args()
+
+    if args.child:
+        run_child(args.child)
+        return
+
+    app = create_app()
+    rows = []
+    with app.app_context():
+        cleanup()
+        try:
+            for size in args.sizes:
+                seed(size)
+                modes = ['ids', 'segment'] + (['legacy'] if size <= args.legacy_max else [])
+                for mode in modes:
+                    result = measure(mode)
+                    clear_campaign()
+                    rows.append([
+                        size,
+                        mode,
+                        result['created'],
+                        f"{result['seconds']:.2f}",
+                        f"{result['created'] / result['seconds']:,.0f}",
+                        f"{result['peak_rss_mb']:.0f}"
+                    ])
+                cleanup()
+        finally:
+            db.session.rollback()
+            cleanup()
+
+    print_table(['recipients', 'mode', 'created', 'seconds', 'rows_per_sec', 'peak_rss_mb'], rows)
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,161 @@
+"""
+OFFSET vs keyset pagination, page 1 to --pages.
+
+Seeds one user with enough notifications, chat messages and tracking records
+(and a catalogue of published content) for --pages pages of --per-page
+items. Several rows share each timestamp, so the id tie-breaker matters.
+Then every list endpoint is walked page by page in four modes:
+
+- offset:          ?page=N (OFFSET plus COUNT(*) on every page)
+- offset, no count ?page=N&include_total=false
+- keyset:          ?cursor=<next_cursor> (COUNT(*) on every page)
+- keyset, no count ?cursor=<next_cursor>&include_total=false
+
+It reports latency at the first, middle and last page, the whole walk, and the
+SQL statements per page. Every keyset walk must return each row exactly once.
+Point DATABASE_URL at PostgreSQL for representative numbers.
+
+Usage:
+    python benchmarks/bench_pagination.py [--pages 500] [--per-page 20]
+"""
+from common import QueryCounter, print_table, timed
+
+import argparse
+from datetime import date, datetime, timedelta
+
+from sqlalchemy import insert
+
+from app import create_app
+from app.extensions import db
+from app.models.chat import ChatMessage, ChatSession
+from app.models.content import EducationalContent
+from app.models.notification import Notification, NotificationCounter
+from app.models.tracking import SmokingRecord
+from app.models.user import User
+
+BENCH_PREFIX = 'bench_pagination_'
+SEED_BATCH = 10000
+# Rows sharing one created_at value
+TIES = 3
+
+
+def cleanup():
+    user_ids = db.session.query(User.id).filter(User.username.like(f'{BENCH_PREFIX}%'))
+    session_ids = db.session.query(ChatSession.id).filter(ChatSession.user_id.in_(user_ids))
+    ChatMessage.query.filter(ChatMessage.session_id.in_(session_ids)).delete(synchronize_session=False)
+    for model in (ChatSession, Notification, NotificationCounter, SmokingRecord):
+        model.query.filter(model.user_id.in_(user_ids)).delete(synchronize_session=False)
+    EducationalContent.query.filter(EducationalContent.category == f'{BENCH_PREFIX}category').delete(synchronize_session=False)
+    User.query.filter(User.username.like(f'{BENCH_PREFIX}%')).delete(synchronize_session=False)
+    db.session.commit()
+
+
+def bulk_insert(model, rows):
+    for start in range(0, len(rows), SEED_BATCH):
+        db.session.execute(insert(model), rows[start:start + SEED_BATCH])
+
+
+def seed(count):
+    user = User(username=f'{BENCH_PREFIX}user', email=f'{BENCH_PREFIX}user@example.com', password_hash='x')
+    db.session.add(user)
+    db.session.flush()
+    session = ChatSession(user_id=user.id, session_title=f'{BENCH_PREFIX}session')
+    db.session.add(session)
+    db.session.flush()
+
+    start = datetime(2024, 1, 1)
+    bulk_insert(Notification, [
+        {'user_id': user.id, 'notification_type': 'motivational', 'title': f'n{i}', 'message': 'x',
+         'is_read': i % 2 == 0, 'created_at': start + timedelta(minutes=i // TIES)}
+        for i in range(count)
+    ])
+    bulk_insert(ChatMessage, [
+        {'session_id': session.id, 'sender_type': 'user' if i % 2 else 'assistant', 'message_text': f'm{i}',
+         'created_at': start + timedelta(seconds=i // TIES)}
+        for i in range(count)
+    ])
+    bulk_insert(SmokingRecord, [
+        {'user_id': user.id, 'record_date': date.today() - timedelta(days=i), 'cigarettes_smoked': i % 5}
+        for i in range(count)
+    ])
+    bulk_insert(EducationalContent, [
+        {'title': f'{BENCH_PREFIX}{i}', 'content_type': 'article', 'content_text': 'x', 'category': f'{BENCH_PREFIX}category',
+         'language': 'ar-dz', 'is_published': True, 'created_at': start + timedelta(minutes=i // TIES)}
+        for i in range(count)
+    ])
+    db.session.commit()
+    return user.id, session.id
+
+
+def walk(client, engine, url, items_key, pages, keyset, include_total):
+    """Request pages 1..pages; returns (per-page ms, statements of the last page, ids seen)"""
+    latencies, seen, cursor = [], [], ''
+    separator = '&' if '?' in url else '?'
+    for page in range(1, pages + 1):
+        params = f'cursor={cursor}' if keyset else f'page={page}'
+        if not include_total:
+            params += '&include_total=false'
+        with QueryCounter(engine) as counter, timed() as elapsed:
+            response = client.get(f'{url}{separator}{params}')
+        body = response.get_json()
+        if response.status_code != 200:
+            raise RuntimeError(f'{url}: {response.status_code} {body}')
+        latencies.append(elapsed['seconds'] * 1000)
+        seen.extend(item['id'] for item in body[items_key])
+        if keyset:
+            cursor = body['next_cursor']
+            if cursor is None:
+                break
+    return latencies, counter.count, seen
+
+
+def main():
+    parser = argparse.ArgumentParser()
+    parser.add_argument('--pages', type=int, default=500)
+    parser.add_argument('--per-page', type=int, default=20)
+    args = parser.parse_args()
+
+    app = create_app()
+    client = app.test_client()
+    count = args.pages * args.per_page
+    rows, failures = [], []
+    with app.app_context():
+        dialect = db.engine.dialect.name
+        cleanup()
+        try:
+            user_id, session_id = seed(count)
+            endpoints = [
+                ('notifications', f'/api/notifications/?user_id={user_id}&per_page={args.per_page}', 'notifications'),
+                ('chat messages', f'/api/chat/sessions/{session_id}/messages?per_page={args.per_page}', 'messages'),
+                ('tracking records', f'/api/tracking/records/{user_id}?per_page={args.per_page}', 'records'),
+                ('content', f'/api/content/?category={BENCH_PREFIX}category&per_page={args.per_page}', 'content')
+            ]
+            modes = [('offset', False, True), ('offset, no count', False, False), ('keyset', True, True), ('keyset, no count', True, False)]
+            middle = args.pages // 2
+            for name, url, items_key in endpoints:
+                for mode, keyset, include_total in modes:
+                    latencies, statements, seen = walk(client, db.engine, url, items_key, args.pages, keyset, include_total)
+                    rows.append([
+                        name, mode,
+                        f"{latencies[0]:.1f}", f"{latencies[middle - 1]:.1f}", f"{latencies[-1]:.1f}",
+                        f"{sum(latencies) / 1000:.2f}", statements
+                    ])
+                    if keyset and (len(seen) != count or len(set(seen)) != count):
+                        failures.append(f"{name} {mode}: {len(seen)} rows returned, {len(set(seen))} distinct, expected {count}")
+        finally:
+            db.session.rollback()
+            cleanup()
+
+    print(f"\n{dialect}, {args.pages} pages x {args.per_page}\n")
+    print_table(
+        ['endpoint', 'mode', 'page 1 ms', f'page {args.pages // 2} ms', f'page {args.pages} ms', 'walk s', 'SQL per page'],
+        rows
+    )
+    for failure in failures:
+        print(f"❌ {failure}")
+    if failures:
+        raise SystemExit(1)
+
+
+if __name__ == '__main__':
+    main()
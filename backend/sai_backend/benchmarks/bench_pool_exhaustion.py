@@ -0,0 +1,96 @@
+"""
+Connection pool exhaustion scenario.
+
+Builds the app with a deliberately small pool (default 4 + 2 overflow, 1 s
+pool timeout) and runs increasing numbers of worker threads that each check
+out a connection and hold it for a query of --hold-ms (pg_sleep on
+PostgreSQL). The pool keeps up while workers <= size + overflow; past that,
+checkouts queue, wait times grow towards pool_timeout and then fail with
+TimeoutError. Reports per level what InstrumentedQueuePool recorded.
+Point DATABASE_URL at a local PostgreSQL to see realistic numbers.
+
+Usage:
+    python benchmarks/bench_pool_exhaustion.py [--pool-size 4] [--max-overflow 2] [--timeout 1] [--hold-ms 200] [--requests 5]
+"""
+from common import print_table, timed
+
+import argparse
+from concurrent.futures import ThreadPoolExecutor
+
+from sqlalchemy import exc, text
+
+from app import create_app
+from app.config.config import Config
+from app.extensions import db
+from app.db_pool import PoolMetrics, pool_snapshot
+
+
+def worker(engine, hold_seconds, requests):
+    """Check out, hold and return a connection `requests` times; returns (ok, timed_out)"""
+    ok = timed_out = 0
+    for _ in range(requests):
+        try:
+            with engine.connect() as connection:
+                connection.execute(text('SELECT pg_sleep(:seconds)'), {'seconds': hold_seconds})
+            ok += 1
+        except exc.TimeoutError:
+            timed_out += 1
+    return ok, timed_out
+
+
+def main():
+    parser = argparse.ArgumentParser()
+    parser.add_argument('--pool-size', type=int, default=4)
+    parser.add_argument('--max-overflow', type=int, default=2)
+    parser.add_argument('--timeout', type=float, default=1.0, help='pool_timeout in seconds')
+    parser.add_argument('--hold-ms', type=int, default=200, help='how long each checkout holds its connection')
+    parser.add_argument('--requests', type=int, default=5, help='checkouts per worker')
+    args = parser.parse_args()
+
+    class PoolConfig(Config):
+        SQLALCHEMY_ECHO = False
+        SQLALCHEMY_ENGINE_OPTIONS = {
+            **Config.SQLALCHEMY_ENGINE_OPTIONS,
+            'pool_size': args.pool_size,
+            'max_overflow': args.max_overflow,
+            'pool_timeout': args.timeout
+        }
+
+    app = create_app(PoolConfig)
+    capacity = args.pool_size + args.max_overflow
+    levels = sorted({args.pool_size, capacity, capacity * 2, capacity * 4})
+    rows = []
+    with app.app_context():
+        engine = db.engine
+        dialect = engine.dialect.name
+        for workers in levels:
+            engine.pool.metrics = PoolMetrics()
+            with ThreadPoolExecutor(max_workers=workers) as pool, timed() as elapsed:
+                results = list(pool.map(
+                    lambda _: worker(engine, args.hold_ms / 1000, args.requests), range(workers)
+                ))
+            snapshot = pool_snapshot(engine)
+            rows.append([
+                workers,
+                sum(ok for ok, _ in results),
+                sum(timed_out for _, timed_out in results),
+                snapshot['peak_in_use'],
+                snapshot['overflow_checkouts'],
+                snapshot['wait_ms_avg'],
+                snapshot['wait_ms_p95'],
+                snapshot['wait_ms_max'],
+                f"{elapsed['seconds']:.2f}"
+            ])
+        final = app.test_client().get('/api/metrics/pool').get_json()
+
+    print(f"pool_size={args.pool_size} max_overflow={args.max_overflow} pool_timeout={args.timeout}s "
+          f"hold={args.hold_ms}ms x {args.requests} per worker, {dialect}\n")
+    print_table(
+        ['workers', 'ok', 'timeouts', 'peak in use', 'overflow checkouts', 'wait avg ms', 'wait p95 ms', 'wait max ms', 'seconds'],
+        rows
+    )
+    print(f"\nGET /api/metrics/pool after the last level:\n{final}")
+
+
+if __name__ == '__main__':
+    main()
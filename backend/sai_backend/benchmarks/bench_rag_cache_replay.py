@@ -0,0 +1,80 @@
+"""
+Replay logged user chat messages against the RAG API and report cache behaviour.
+
+User ChatMessage texts are read from the database in the order they were
+sent and posted to /query one after another. The script reports latency per
+cache tier (the "cache" field of the response; absent means a miss) and the
+response cache counters the API exposes on /info before and after the replay.
+
+Usage:
+    python benchmarks/bench_rag_cache_replay.py [--limit 500] [--passes 1] [--rag-url http://localhost:8000]
+"""
+from common import percentile, print_table
+
+import argparse
+import time
+
+import requests
+
+from app import create_app
+from app.models.chat import ChatMessage
+from app.services.llm_service import RAG_API_URL, RAG_TIMEOUT
+from app.utils.constants import SENDER_USER
+
+
+def cache_counters(rag_url):
+    return requests.get(f'{rag_url}/info', timeout=RAG_TIMEOUT).json().get('response_cache', {})
+
+
+def main():
+    parser = argparse.ArgumentParser()
+    parser.add_argument('--limit', type=int, default=500)
+    parser.add_argument('--passes', type=int, default=1)
+    parser.add_argument('--rag-url', default=RAG_API_URL.rsplit('/query', 1)[0])
+    args = parser.parse_args()
+
+    app = create_app()
+    with app.app_context():
+        texts = [
+            message.message_text for message in ChatMessage.query.filter_by(
+                sender_type=SENDER_USER
+            ).order_by(ChatMessage.created_at).limit(args.limit)
+        ]
+    if not texts:
+        print('No logged user messages to replay')
+        return
+
+    before = cache_counters(args.rag_url)
+    latencies = {}
+    started = time.perf_counter()
+    for _ in range(args.passes):
+        for text in texts:
+            request_started = time.perf_counter()
+            response = requests.post(f'{args.rag_url}/query', json={'query': text}, timeout=RAG_TIMEOUT)
+            tier = response.json().get('cache') or 'miss'
+            latencies.setdefault(tier, []).append(time.perf_counter() - request_started)
+    wall = time.perf_counter() - started
+    after = cache_counters(args.rag_url)
+
+    total = sum(len(values) for values in latencies.values())
+    print(f"{len(texts)} logged messages x {args.passes} pass(es), {total} queries in {wall:.1f}s\n")
+    print_table(
+        ['tier', 'queries', 'share', 'p50_ms', 'p95_ms'],
+        [
+            [tier, len(values), f'{len(values) / total:.0%}',
+             f'{percentile(values, 50) * 1000:.0f}', f'{percentile(values, 95) * 1000:.0f}']
+            for tier, values in sorted(latencies.items())
+        ]
+    )
+
+    print()
+    counters = ['exact_hits', 'semantic_hits', 'misses', 'evictions', 'expirations']
+    print_table(
+        ['counter', 'before', 'after', 'delta'],
+        [[name, before.get(name, 0), after.get(name, 0), after.get(name, 0) - before.get(name, 0)] for name in counters]
+        + [['hit_rate', before.get('hit_rate', 0), after.get('hit_rate', 0), '']]
+    )
+
+
+if __name__ == '__main__':
+    main()
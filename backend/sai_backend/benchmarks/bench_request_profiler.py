@@ -0,0 +1,99 @@
+"""
+Overhead of the request profiler.
+
+Times the same dashboard requests (GET /api/user/statistics and
+GET /api/tracking/statistics for a user with a year of check-ins) with the
+profiler's request hooks registered, with them removed, and with the
+X-Debug-Profile stack sampler on, then prints what GET /api/metrics/endpoints
+collected.
+
+Usage:
+    python benchmarks/bench_request_profiler.py [--requests 200]
+"""
+from common import print_table, timed
+
+import argparse
+import json
+from datetime import date, timedelta
+
+from sqlalchemy import insert
+
+from app import create_app
+from app.extensions import db
+from app.models.tracking import SmokingRecord
+from app.models.user import User, UserProfile, UserSummary
+from app.services.metrics_service import request_profiler
+from app.services.user_service import rebuild_summaries
+
+BENCH_PREFIX = 'bench_request_profiler_'
+
+
+def seed():
+    user = User(username=f'{BENCH_PREFIX}user', email=f'{BENCH_PREFIX}user@example.com', password_hash='x')
+    db.session.add(user)
+    db.session.flush()
+    db.session.add(UserProfile(user_id=user.id, cigarettes_per_day=15))
+    db.session.execute(insert(SmokingRecord), [
+        {'user_id': user.id, 'record_date': date.today() - timedelta(days=day), 'cigarettes_smoked': day % 6, 'cravings_count': day % 4}
+        for day in range(365)
+    ])
+    rebuild_summaries(user.id)
+    db.session.commit()
+    return user.id
+
+
+def cleanup():
+    user_ids = db.session.query(User.id).filter(User.username.like(f'{BENCH_PREFIX}%'))
+    for model in (SmokingRecord, UserSummary, UserProfile):
+        model.query.filter(model.user_id.in_(user_ids)).delete(synchronize_session=False)
+    User.query.filter(User.username.like(f'{BENCH_PREFIX}%')).delete(synchronize_session=False)
+    db.session.commit()
+
+
+def run(client, user_id, requests, headers=None):
+    with timed() as elapsed:
+        for n in range(requests):
+            url = f'/api/user/statistics/{user_id}' if n % 2 else f'/api/tracking/statistics/{user_id}'
+            assert client.get(url, headers=headers or {}).status_code == 200
+    return elapsed['seconds'] / requests * 1000
+
+
+def main():
+    parser = argparse.ArgumentParser()
+    parser.add_argument('--requests', type=int, default=200)
+    args = parser.parse_args()
+
+    app = create_app()
+    client = app.test_client()
+    hooks = (
+        (app.before_request_funcs[None], request_profiler.start_request),
+        (app.after_request_funcs[None], request_profiler.finish_request)
+    )
+    rows = []
+    with app.app_context():
+        dialect = db.engine.dialect.name
+        cleanup()
+        try:
+            user_id = seed()
+            run(client, user_id, 20)  # warm up
+            rows.append(['profiler on', f"{run(client, user_id, args.requests):.3f}"])
+            for functions, hook in hooks:
+                functions.remove(hook)
+            rows.append(['profiler off', f"{run(client, user_id, args.requests):.3f}"])
+            for functions, hook in hooks:
+                functions.append(hook)
+            app.config['PROFILER_DEBUG_HEADER'] = True
+            rows.append(['profiler on + X-Debug-Profile', f"{run(client, user_id, args.requests // 10, {'X-Debug-Profile': '1'}):.3f}"])
+            collected = client.get('/api/metrics/endpoints').get_json()['endpoints']
+        finally:
+            db.session.rollback()
+            cleanup()
+
+    print(f"{args.requests} dashboard requests, {dialect}\n")
+    print_table(['variant', 'ms per request'], rows)
+    print("\nGET /api/metrics/endpoints:")
+    print(json.dumps({name: stats for name, stats in collected.items() if name.endswith('get_statistics')}, indent=2))
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,135 @@
+"""
+Legacy vs SQL-side aggregation for GET /api/tracking/statistics.
+
+Seeds one user with a year of daily check-ins, each carrying a long
+comma-separated trigger list, and computes the 365-day statistics both ways:
+the previous ORM load + Python sum / max(set(...), key=list.count) version and
+tracking_service.record_statistics (trigger mode over record_triggers) +
+daily_series. Reports statements, time per call and whether both produce the
+same numbers.
+
+Usage:
+    python benchmarks/bench_tracking_statistics.py [--days 365] [--triggers 40] [--repeat 20]
+"""
+from common import QueryCounter, print_table, timed
+
+import argparse
+from datetime import date, timedelta
+
+from sqlalchemy import insert, select
+
+from app import create_app
+from app.extensions import db
+from app.models.tracking import RecordTrigger, SmokingRecord
+from app.models.user import User
+from app.services.tracking_service import daily_series, parse_triggers, record_statistics, replace_record_triggers
+
+BENCH_PREFIX = 'bench_tracking_stats_'
+MOODS = ['calm', 'stressed', 'anxious', 'happy', 'bored', 'tired']
+TRIGGER_VOCABULARY = [f'trigger_{n}' for n in range(80)]
+
+
+def seed(days, triggers_per_day):
+    user = User(username=f'{BENCH_PREFIX}user', email=f'{BENCH_PREFIX}user@example.com', password_hash='x')
+    db.session.add(user)
+    db.session.flush()
+    today = date.today()
+    db.session.execute(insert(SmokingRecord), [
+        {
+            'user_id': user.id,
+            'record_date': today - timedelta(days=day),
+            'cigarettes_smoked': day % 9,
+            'cravings_count': day % 5,
+            # One mood and one trigger clearly dominate so both versions agree on the mode
+            'mood': MOODS[0] if day % 3 == 0 else MOODS[day % len(MOODS)],
+            'triggers': ', '.join(
+                ['stress'] + [TRIGGER_VOCABULARY[(day * 7 + n) % len(TRIGGER_VOCABULARY)] for n in range(triggers_per_day - 1)]
+            )
+        }
+        for day in range(days)
+    ])
+    # The Core insert bypasses the flush listener that fills record_triggers
+    replace_record_triggers(db.session.connection(), {
+        record_id: parse_triggers(triggers)
+        for record_id, triggers in db.session.execute(
+            select(SmokingRecord.id, SmokingRecord.triggers).where(SmokingRecord.user_id == user.id)
+        )
+    })
+    db.session.commit()
+    return user.id
+
+
+def cleanup():
+    user_ids = db.session.query(User.id).filter(User.username.like(f'{BENCH_PREFIX}%'))
+    record_ids = db.session.query(SmokingRecord.id).filter(SmokingRecord.user_id.in_(user_ids))
+    RecordTrigger.query.filter(RecordTrigger.record_id.in_(record_ids)).delete(synchronize_session=False)
+    SmokingRecord.query.filter(SmokingRecord.user_id.in_(user_ids)).delete(synchronize_session=False)
+    User.query.filter(User.username.like(f'{BENCH_PREFIX}%')).delete(synchronize_session=False)
+    db.session.commit()
+
+
+def legacy_statistics(user_id, start_date):
+    """The route body before the SQL-side rewrite"""
+    records = SmokingRecord.query.filter(
+        SmokingRecord.user_id == user_id,
+        SmokingRecord.record_date >= start_date
+    ).order_by(SmokingRecord.record_date).all()
+
+    moods = [r.mood for r in records if r.mood]
+    all_triggers = [t.strip() for r in records if r.triggers for t in r.triggers.split(',')]
+    stats = {
+        'total_records': len(records),
+        'total_cigarettes': sum(r.cigarettes_smoked for r in records),
+        'total_cravings': sum(r.cravings_count for r in records),
+        'smoke_free_days': sum(1 for r in records if r.cigarettes_smoked == 0),
+        'most_common_mood': max(set(moods), key=moods.count) if moods else None,
+        'most_common_trigger': max(set(all_triggers), key=all_triggers.count) if all_triggers else None
+    }
+    daily_data = [
+        {'date': r.record_date.isoformat(), 'cigarettes': r.cigarettes_smoked, 'cravings': r.cravings_count, 'mood': r.mood}
+        for r in records
+    ]
+    return stats, daily_data
+
+
+def sql_statistics(user_id, start_date):
+    return record_statistics(user_id, start_date), daily_series(user_id, start_date)
+
+
+def main():
+    parser = argparse.ArgumentParser()
+    parser.add_argument('--days', type=int, default=365)
+    parser.add_argument('--triggers', type=int, default=40, help='triggers per check-in')
+    parser.add_argument('--repeat', type=int, default=20)
+    args = parser.parse_args()
+
+    app = create_app()
+    rows, results = [], {}
+    with app.app_context():
+        dialect = db.engine.dialect.name
+        cleanup()
+        try:
+            user_id = seed(args.days, args.triggers)
+            for table in ('smoking_records', 'record_triggers', 'triggers'):
+                db.session.execute(db.text(f'ANALYZE {table}'))
+            db.session.commit()
+            start_date = date.today() - timedelta(days=args.days)
+            for name, compute in (('legacy ORM + Python', legacy_statistics), ('SQL aggregates', sql_statistics)):
+                db.session.expunge_all()
+                with QueryCounter(db.engine) as counter, timed() as elapsed:
+                    for _ in range(args.repeat):
+                        results[name] = compute(user_id, start_date)
+                        db.session.expunge_all()
+                rows.append([name, counter.count // args.repeat, f"{elapsed['seconds'] / args.repeat * 1000:.1f}"])
+        finally:
+            db.session.rollback()
+            cleanup()
+
+    print(f"{args.days}-day window, {args.triggers} triggers per check-in, {dialect}\n")
+    print_table(['variant', 'statements', 'ms per call'], rows)
+    legacy, sql = results.values()
+    print(f"\nsame statistics: {legacy[0] == sql[0]}, same daily_data: {legacy[1] == sql[1]}")
+
+
+if __name__ == '__main__':
+    main()
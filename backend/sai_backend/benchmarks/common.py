@@ -0,0 +1,98 @@
+"""
+Shared helpers for the benchmark scripts.
+
+Benchmarks run against the database configured through DATABASE_URL (see
+app/config/config.py) and clean up every row they create.
+"""
+import os
+import sys
+import threading
+import time
+from contextlib import contextmanager
+from sqlalchemy import event
+
+# Allow running as `python benchmarks/<script>.py` from the backend root
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+
+class QueryCounter:
+    """
+    Count SQL statements issued on an engine while the context is active.
+
+    `executions` also counts each parameter set of an executemany() call, since
+    most drivers run those as one statement per row.
+    """
+
+    def __init__(self, engine):
+        self.engine = engine
+        self.count = 0
+        self.executions = 0
+        self.statements = []
+
+    def _before_cursor_execute(self, conn, cursor, statement, parameters, context, executemany):
+        self.count += 1
+        self.executions += len(parameters) if executemany else 1
+        self.statements.append(statement)
+
+    def __enter__(self):
+        event.listen(self.engine, 'before_cursor_execute', self._before_cursor_execute)
+        return self
+
+    def __exit__(self, *exc):
+        event.remove(self.engine, 'before_cursor_execute', self._before_cursor_execute)
+
+
+@contextmanager
+def timed():
+    """Yield a dict whose 'seconds' key is filled in when the block exits"""
+    result = {}
+    start = time.perf_counter()
+    try:
+        yield result
+    finally:
+        result['seconds'] = time.perf_counter() - start
+
+
+def print_table(headers, rows):
+    """Print rows as a fixed-width table"""
+    widths = [max(len(str(h)), *(len(str(r[i])) for r in rows)) for i, h in enumerate(headers)]
+    print("  ".join(str(h).ljust(w) for h, w in zip(headers, widths)))
+    print("  ".join("-" * w for w in widths))
+    for row in rows:
+        print("  ".join(str(c).ljust(w) for c, w in zip(row, widths)))
+
+
+class ConnectionHoldTracker:
+    """Record how long each pooled connection stays checked out"""
+
+    def __init__(self, engine):
+        self.engine = engine
+        self.holds = []
+        self._lock = threading.Lock()
+
+    def _checkout(self, dbapi_connection, connection_record, connection_proxy):
+        connection_record.info['bench_checkout_at'] = time.perf_counter()
+
+    def _checkin(self, dbapi_connection, connection_record):
+        started = connection_record.info.pop('bench_checkout_at', None)
+        if started is not None:
+            with self._lock:
+                self.holds.append(time.perf_counter() - started)
+
+    def __enter__(self):
+        event.listen(self.engine, 'checkout', self._checkout)
+        event.listen(self.engine, 'checkin', self._checkin)
+        return self
+
+    def __exit__(self, *exc):
+        event.remove(self.engine, 'checkout', self._checkout)
+        event.remove(self.engine, 'checkin', self._checkin)
+
+
+def percentile(values, pct):
+    """Nearest-rank percentile of a list of numbers"""
+    if not values:
+        return 0.0
+    ordered = sorted(values)
+    index = min(len(ordered) - 1, max(0, int(round(pct / 100 * len(ordered))) - 1))
+    return ordered[index]
@@ -0,0 +1,83 @@
+"""Unique natural keys for seeded achievements and content
+
+Revision ID: 2b8e4f6a9c13
+Revises: 6f1b3d8a2c57
+Create Date: 2026-10-18 23:05:12.602417
+
+Seeding used to run in every worker at boot with a check-then-insert, so
+workers starting together could insert the same achievement or podcast
+twice. Those duplicates are merged into the oldest row first: user progress
+pointing at a duplicate is moved to the kept row (or dropped when the user
+already has a row for it), then the duplicate is deleted.
+"""
+from alembic import op
+import sqlalchemy as sa
+
+
+# revision identifiers, used by Alembic.
+revision = '2b8e4f6a9c13'
+down_revision = '6f1b3d8a2c57'
+branch_labels = None
+depends_on = None
+
+achievements = sa.table('achievements', sa.column('id', sa.Integer), sa.column('name', sa.String))
+user_achievements = sa.table(
+    'user_achievements', sa.column('user_id', sa.Integer), sa.column('achievement_id', sa.Integer)
+)
+educational_content = sa.table(
+    'educational_content', sa.column('id', sa.Integer), sa.column('category', sa.String), sa.column('title', sa.String)
+)
+user_content_progress = sa.table(
+    'user_content_progress', sa.column('user_id', sa.Integer), sa.column('content_id', sa.Integer)
+)
+
+
+def dedupe(table, key_columns, child, child_key):
+    """Merge rows sharing key_columns into the one with the lowest id; returns how many were removed"""
+    connection = op.get_bind()
+    rows = connection.execute(
+        sa.select(table.c.id, *[table.c[name] for name in key_columns]).order_by(table.c.id)
+    ).all()
+    kept, duplicates = {}, []
+    for row in rows:
+        key = tuple(row[1:])
+        if key in kept:
+            duplicates.append((row.id, kept[key]))
+        else:
+            kept[key] = row.id
+
+    existing = child.alias('existing')
+    for duplicate_id, kept_id in duplicates:
+        # One row per (user, parent) is enforced on the child table, so only move rows the kept parent lacks
+        connection.execute(
+            child.update()
+            .where(
+                child.c[child_key] == duplicate_id,
+                ~sa.exists().where(existing.c.user_id == child.c.user_id, existing.c[child_key] == kept_id)
+            )
+            .values({child_key: kept_id})
+        )
+        connection.execute(child.delete().where(child.c[child_key] == duplicate_id))
+        connection.execute(table.delete().where(table.c.id == duplicate_id))
+    return len(duplicates)
+
+
+def upgrade():
+    removed = dedupe(achievements, ['name'], user_achievements, 'achievement_id')
+    removed += dedupe(educational_content, ['category', 'title'], user_content_progress, 'content_id')
+    if removed:
+        print(f"Merged {removed} duplicate seeded achievements / content rows.")
+
+    with op.batch_alter_table('achievements', schema=None) as batch_op:
+        batch_op.create_unique_constraint('uq_achievements_name', ['name'])
+
+    with op.batch_alter_table('educational_content', schema=None) as batch_op:
+        batch_op.create_unique_constraint('uq_educational_content_category_title', ['category', 'title'])
+
+
+def downgrade():
+    with op.batch_alter_table('educational_content', schema=None) as batch_op:
+        batch_op.drop_constraint('uq_educational_content_category_title', type_='unique')
+
+    with op.batch_alter_table('achievements', schema=None) as batch_op:
+        batch_op.drop_constraint('uq_achievements_name', type_='unique')
@@ -0,0 +1,66 @@
+"""Add composite and partial indexes for per-user hot queries
+
+Revision ID: 3b9d0c7e41a2
+Revises: f0d24dcce60a
+Create Date: 2026-10-18 10:12:31.204518
+
+"""
+from alembic import op
+import sqlalchemy as sa
+
+
+# revision identifiers, used by Alembic.
+revision = '3b9d0c7e41a2'
+down_revision = 'f0d24dcce60a'
+branch_labels = None
+depends_on = None
+
+
+def upgrade():
+    with op.batch_alter_table('smoking_records', schema=None) as batch_op:
+        batch_op.create_index('ix_smoking_records_user_id_record_date', ['user_id', 'record_date'], unique=False)
+
+    with op.batch_alter_table('notifications', schema=None) as batch_op:
+        batch_op.create_index('ix_notifications_user_id_is_read_created_at', ['user_id', 'is_read', 'created_at'], unique=False)
+        batch_op.create_index(
+            'ix_notifications_unread_user_id_created_at', ['user_id', 'created_at'], unique=False,
+            postgresql_where=sa.text('is_read = false')
+        )
+
+    with op.batch_alter_table('chat_sessions', schema=None) as batch_op:
+        batch_op.create_index('ix_chat_sessions_user_id_last_message_at', ['user_id', 'last_message_at'], unique=False)
+
+    with op.batch_alter_table('chat_messages', schema=None) as batch_op:
+        batch_op.create_index('ix_chat_messages_session_id_created_at', ['session_id', 'created_at'], unique=False)
+
+    with op.batch_alter_table('goals', schema=None) as batch_op:
+        batch_op.create_index('ix_goals_user_id_status', ['user_id', 'status'], unique=False)
+        batch_op.create_index(
+            'ix_goals_target_date_unsent', ['target_date'], unique=False,
+            postgresql_where=sa.text('notification_sent = false')
+        )
+
+    with op.batch_alter_table('user_content_progress', schema=None) as batch_op:
+        batch_op.create_index('ix_user_content_progress_user_id_completed', ['user_id', 'completed'], unique=False)
+
+
+def downgrade():
+    with op.batch_alter_table('user_content_progress', schema=None) as batch_op:
+        batch_op.drop_index('ix_user_content_progress_user_id_completed')
+
+    with op.batch_alter_table('goals', schema=None) as batch_op:
+        batch_op.drop_index('ix_goals_target_date_unsent')
+        batch_op.drop_index('ix_goals_user_id_status')
+
+    with op.batch_alter_table('chat_messages', schema=None) as batch_op:
+        batch_op.drop_index('ix_chat_messages_session_id_created_at')
+
+    with op.batch_alter_table('chat_sessions', schema=None) as batch_op:
+        batch_op.drop_index('ix_chat_sessions_user_id_last_message_at')
+
+    with op.batch_alter_table('notifications', schema=None) as batch_op:
+        batch_op.drop_index('ix_notifications_unread_user_id_created_at')
+        batch_op.drop_index('ix_notifications_user_id_is_read_created_at')
+
+    with op.batch_alter_table('smoking_records', schema=None) as batch_op:
+        batch_op.drop_index('ix_smoking_records_user_id_record_date')
@@ -0,0 +1,95 @@
+"""Full-text search column, trigger and GIN index for educational content
+
+Revision ID: 4e2f8b1c7a93
+Revises: b7e3c9a41d05
+Create Date: 2026-10-19 14:27:05.731840
+
+Adds educational_content.search_vector and the
+sai_normalize_arabic / sai_content_document / sai_search_query functions
+(see app/services/content_service.py), a trigger keeping the column current,
+a GIN index, and backfills existing rows. The 'arabic' text search
+configuration (PostgreSQL 12+) is used when available, 'simple' otherwise.
+"""
+from alembic import op
+import sqlalchemy as sa
+from sqlalchemy.dialects import postgresql
+
+
+# revision identifiers, used by Alembic.
+revision = '4e2f8b1c7a93'
+down_revision = 'b7e3c9a41d05'
+branch_labels = None
+depends_on = None
+
+# Keep in sync with content_service.normalize_arabic
+NORMALIZE_FUNCTION = r"""
+CREATE OR REPLACE FUNCTION sai_normalize_arabic(input text) RETURNS text
+LANGUAGE sql IMMUTABLE PARALLEL SAFE AS $$
+    SELECT translate(
+        lower(regexp_replace(coalesce(input, ''), '[\u0610-\u061a\u064b-\u065f\u0670\u06d6-\u06ed\u0640]', '', 'g')),
+        'أإآٱىةؤئ',
+        'اااايهوي'
+    )
+$$
+"""
+
+DOCUMENT_FUNCTION = """
+CREATE OR REPLACE FUNCTION sai_content_document(title text, body text) RETURNS tsvector
+LANGUAGE sql IMMUTABLE PARALLEL SAFE AS $$
+    SELECT setweight(to_tsvector('{config}', sai_normalize_arabic(title)), 'A')
+        || setweight(to_tsvector('{config}', sai_normalize_arabic(body)), 'B')
+$$
+"""
+
+QUERY_FUNCTION = """
+CREATE OR REPLACE FUNCTION sai_search_query(input text) RETURNS tsquery
+LANGUAGE sql IMMUTABLE PARALLEL SAFE AS $$
+    SELECT plainto_tsquery('{config}', sai_normalize_arabic(input))
+$$
+"""
+
+TRIGGER_FUNCTION = """
+CREATE OR REPLACE FUNCTION educational_content_search_vector_update() RETURNS trigger
+LANGUAGE plpgsql AS $$
+BEGIN
+    NEW.search_vector := sai_content_document(NEW.title, NEW.content_text);
+    RETURN NEW;
+END
+$$
+"""
+
+TRIGGER = """
+CREATE TRIGGER educational_content_search_vector_update
+    BEFORE INSERT OR UPDATE OF title, content_text ON educational_content
+    FOR EACH ROW EXECUTE FUNCTION educational_content_search_vector_update()
+"""
+
+
+def upgrade():
+    connection = op.get_bind()
+    op.add_column('educational_content', sa.Column('search_vector', postgresql.TSVECTOR(), nullable=True))
+
+    has_arabic = connection.execute(sa.text("SELECT 1 FROM pg_ts_config WHERE cfgname = 'arabic'")).scalar()
+    config = 'arabic' if has_arabic else 'simple'
+    op.execute(NORMALIZE_FUNCTION)
+    op.execute(DOCUMENT_FUNCTION.format(config=config))
+    op.execute(QUERY_FUNCTION.format(config=config))
+    op.execute(TRIGGER_FUNCTION)
+    op.execute(TRIGGER)
+    op.execute("UPDATE educational_content SET search_vector = sai_content_document(title, content_text)")
+    op.create_index(
+        'ix_educational_content_search_vector', 'educational_content', ['search_vector'],
+        unique=False, postgresql_using='gin'
+    )
+    if not has_arabic:
+        print("No 'arabic' text search configuration on this server; content search uses 'simple' (no stemming).")
+
+
+def downgrade():
+    op.drop_index('ix_educational_content_search_vector', table_name='educational_content')
+    op.execute("DROP TRIGGER educational_content_search_vector_update ON educational_content")
+    op.execute("DROP FUNCTION educational_content_search_vector_update()")
+    op.execute("DROP FUNCTION sai_search_query(text)")
+    op.execute("DROP FUNCTION sai_content_document(text, text)")
+    op.execute("DROP FUNCTION sai_normalize_arabic(text)")
+    op.drop_column('educational_content', 'search_vector')
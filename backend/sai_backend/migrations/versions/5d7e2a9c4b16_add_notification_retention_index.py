@@ -0,0 +1,29 @@
+"""Add partial index for the read-notification retention purge
+
+Revision ID: 5d7e2a9c4b16
+Revises: 8c21f5a9d3e7
+Create Date: 2026-10-18 15:21:07.483910
+
+"""
+from alembic import op
+import sqlalchemy as sa
+
+
+# revision identifiers, used by Alembic.
+revision = '5d7e2a9c4b16'
+down_revision = '8c21f5a9d3e7'
+branch_labels = None
+depends_on = None
+
+
+def upgrade():
+    with op.batch_alter_table('notifications', schema=None) as batch_op:
+        batch_op.create_index(
+            'ix_notifications_read_created_at', ['created_at'], unique=False,
+            postgresql_where=sa.text('is_read = true')
+        )
+
+
+def downgrade():
+    with op.batch_alter_table('notifications', schema=None) as batch_op:
+        batch_op.drop_index('ix_notifications_read_created_at')
@@ -0,0 +1,65 @@
+"""Make smoking_records unique per (user_id, record_date)
+
+Revision ID: 6f1b3d8a2c57
+Revises: e93b05c7d218
+Create Date: 2026-10-18 21:12:40.318205
+
+Duplicate day records (double-taps and retries) are removed first, keeping the
+earliest one per day. Their users' dashboard summaries and streak / savings
+counters included the duplicates, so the upgrade prints the commands that
+recompute them.
+"""
+from alembic import op
+import sqlalchemy as sa
+
+
+# revision identifiers, used by Alembic.
+revision = '6f1b3d8a2c57'
+down_revision = 'e93b05c7d218'
+branch_labels = None
+depends_on = None
+
+smoking_records = sa.table(
+    'smoking_records', sa.column('id', sa.Integer), sa.column('user_id', sa.Integer), sa.column('record_date', sa.Date)
+)
+
+
+def dedupe():
+    """Delete every record that has an older record for the same user and day"""
+    connection = op.get_bind()
+    candidate, kept = smoking_records.alias('candidate'), smoking_records.alias('kept')
+    duplicates = sa.select(candidate.c.id).where(
+        sa.exists().where(
+            kept.c.user_id == candidate.c.user_id,
+            kept.c.record_date == candidate.c.record_date,
+            kept.c.id < candidate.c.id
+        )
+    )
+    removed, affected_users = connection.execute(
+        sa.select(sa.func.count(), sa.func.count(sa.distinct(smoking_records.c.user_id))).where(
+            smoking_records.c.id.in_(duplicates)
+        )
+    ).one()
+    if not removed:
+        return
+
+    # record_triggers rows go with them (ON DELETE CASCADE)
+    connection.execute(smoking_records.delete().where(smoking_records.c.id.in_(duplicates)))
+    print(
+        f"Removed {removed} duplicate smoking records of {affected_users} users. "
+        "Run `flask sai rebuild-summaries` and `flask sai recompute-progress` to recompute their counters."
+    )
+
+
+def upgrade():
+    dedupe()
+
+    with op.batch_alter_table('smoking_records', schema=None) as batch_op:
+        batch_op.drop_index('ix_smoking_records_user_id_record_date')
+        batch_op.create_unique_constraint('uq_smoking_records_user_id_record_date', ['user_id', 'record_date'])
+
+
+def downgrade():
+    with op.batch_alter_table('smoking_records', schema=None) as batch_op:
+        batch_op.drop_constraint('uq_smoking_records_user_id_record_date', type_='unique')
+        batch_op.create_index('ix_smoking_records_user_id_record_date', ['user_id', 'record_date'], unique=False)
@@ -0,0 +1,42 @@
+"""Add notification_counters cache
+
+Revision ID: 8c21f5a9d3e7
+Revises: 3b9d0c7e41a2
+Create Date: 2026-10-18 14:03:52.918306
+
+"""
+from alembic import op
+import sqlalchemy as sa
+
+
+# revision identifiers, used by Alembic.
+revision = '8c21f5a9d3e7'
+down_revision = '3b9d0c7e41a2'
+branch_labels = None
+depends_on = None
+
+
+def upgrade():
+    op.create_table('notification_counters',
+    sa.Column('user_id', sa.Integer(), nullable=False),
+    sa.Column('notification_type', sa.String(length=50), nullable=False),
+    sa.Column('total_count', sa.Integer(), nullable=False),
+    sa.Column('unread_count', sa.Integer(), nullable=False),
+    sa.ForeignKeyConstraint(['user_id'], ['users.id'], ondelete='CASCADE'),
+    sa.PrimaryKeyConstraint('user_id', 'notification_type')
+    )
+
+    # Backfill from the existing notifications
+    op.execute(
+        """
+        INSERT INTO notification_counters (user_id, notification_type, total_count, unread_count)
+        SELECT user_id, notification_type, COUNT(*),
+               SUM(CASE WHEN is_read = false THEN 1 ELSE 0 END)
+        FROM notifications
+        GROUP BY user_id, notification_type
+        """
+    )
+
+
+def downgrade():
+    op.drop_table('notification_counters')
@@ -0,0 +1,31 @@
+"""Add scheduled_job_runs for the background scheduler
+
+Revision ID: 9d4a7c2e6b81
+Revises: 2b8e4f6a9c13
+Create Date: 2026-10-19 00:12:37.481926
+
+"""
+from alembic import op
+import sqlalchemy as sa
+
+
+# revision identifiers, used by Alembic.
+revision = '9d4a7c2e6b81'
+down_revision = '2b8e4f6a9c13'
+branch_labels = None
+depends_on = None
+
+
+def upgrade():
+    op.create_table('scheduled_job_runs',
+    sa.Column('job_name', sa.String(length=100), nullable=False),
+    sa.Column('period_start', sa.DateTime(), nullable=False),
+    sa.Column('started_at', sa.DateTime(), nullable=False),
+    sa.Column('finished_at', sa.DateTime(), nullable=True),
+    sa.Column('result', sa.Integer(), nullable=True),
+    sa.PrimaryKeyConstraint('job_name', 'period_start')
+    )
+
+
+def downgrade():
+    op.drop_table('scheduled_job_runs')
@@ -0,0 +1,70 @@
+"""Add user_summaries dashboard table
+
+Revision ID: a4c8e61f2b93
+Revises: 5d7e2a9c4b16
+Create Date: 2026-10-18 16:42:18.775203
+
+"""
+from alembic import op
+import sqlalchemy as sa
+
+
+# revision identifiers, used by Alembic.
+revision = 'a4c8e61f2b93'
+down_revision = '5d7e2a9c4b16'
+branch_labels = None
+depends_on = None
+
+
+def upgrade():
+    op.create_table('user_summaries',
+    sa.Column('user_id', sa.Integer(), nullable=False),
+    sa.Column('total_records', sa.Integer(), nullable=False),
+    sa.Column('total_cigarettes', sa.Integer(), nullable=False),
+    sa.Column('recent_days', sa.JSON(), nullable=False),
+    sa.Column('active_goals', sa.Integer(), nullable=False),
+    sa.Column('completed_goals', sa.Integer(), nullable=False),
+    sa.Column('updated_at', sa.DateTime(), nullable=True),
+    sa.ForeignKeyConstraint(['user_id'], ['users.id'], ondelete='CASCADE'),
+    sa.PrimaryKeyConstraint('user_id')
+    )
+
+    # Backfill from the existing records and goals
+    op.execute(
+        """
+        INSERT INTO user_summaries (user_id, total_records, total_cigarettes, recent_days,
+                                    active_goals, completed_goals, updated_at)
+        SELECT u.id,
+               COALESCE(r.total_records, 0), COALESCE(r.total_cigarettes, 0),
+               COALESCE(w.recent_days, '{}'::json),
+               COALESCE(g.active_goals, 0), COALESCE(g.completed_goals, 0),
+               CURRENT_TIMESTAMP
+        FROM users u
+        LEFT JOIN (
+            SELECT user_id, COUNT(*) AS total_records, SUM(cigarettes_smoked) AS total_cigarettes
+            FROM smoking_records
+            GROUP BY user_id
+        ) r ON r.user_id = u.id
+        LEFT JOIN (
+            SELECT user_id, json_object_agg(record_date::text, json_build_array(records, cigarettes)) AS recent_days
+            FROM (
+                SELECT user_id, record_date, COUNT(*) AS records, SUM(cigarettes_smoked) AS cigarettes
+                FROM smoking_records
+                WHERE record_date >= CURRENT_DATE - 7
+                GROUP BY user_id, record_date
+            ) days
+            GROUP BY user_id
+        ) w ON w.user_id = u.id
+        LEFT JOIN (
+            SELECT user_id,
+                   SUM(CASE WHEN status = 'active' THEN 1 ELSE 0 END) AS active_goals,
+                   SUM(CASE WHEN status = 'completed' THEN 1 ELSE 0 END) AS completed_goals
+            FROM goals
+            GROUP BY user_id
+        ) g ON g.user_id = u.id
+        """
+    )
+
+
+def downgrade():
+    op.drop_table('user_summaries')
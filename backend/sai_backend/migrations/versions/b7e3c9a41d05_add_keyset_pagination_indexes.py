@@ -0,0 +1,46 @@
+"""Add (created_at, id) indexes for keyset pagination
+
+Revision ID: b7e3c9a41d05
+Revises: 9d4a7c2e6b81
+Create Date: 2026-10-19 09:41:26.015733
+
+The chat message index gains id as its last column and replaces the
+(session_id, created_at) one. Tracking records need nothing new: the unique
+(user_id, record_date) constraint already orders a user's records.
+"""
+from alembic import op
+import sqlalchemy as sa
+
+
+# revision identifiers, used by Alembic.
+revision = 'b7e3c9a41d05'
+down_revision = '9d4a7c2e6b81'
+branch_labels = None
+depends_on = None
+
+
+def upgrade():
+    with op.batch_alter_table('notifications', schema=None) as batch_op:
+        batch_op.create_index('ix_notifications_user_id_created_at_id', ['user_id', 'created_at', 'id'], unique=False)
+
+    with op.batch_alter_table('chat_messages', schema=None) as batch_op:
+        batch_op.create_index('ix_chat_messages_session_id_created_at_id', ['session_id', 'created_at', 'id'], unique=False)
+        batch_op.drop_index('ix_chat_messages_session_id_created_at')
+
+    with op.batch_alter_table('educational_content', schema=None) as batch_op:
+        batch_op.create_index(
+            'ix_educational_content_published_created_at_id', ['created_at', 'id'], unique=False,
+            postgresql_where=sa.text('is_published = true')
+        )
+
+
+def downgrade():
+    with op.batch_alter_table('educational_content', schema=None) as batch_op:
+        batch_op.drop_index('ix_educational_content_published_created_at_id')
+
+    with op.batch_alter_table('chat_messages', schema=None) as batch_op:
+        batch_op.create_index('ix_chat_messages_session_id_created_at', ['session_id', 'created_at'], unique=False)
+        batch_op.drop_index('ix_chat_messages_session_id_created_at_id')
+
+    with op.batch_alter_table('notifications', schema=None) as batch_op:
+        batch_op.drop_index('ix_notifications_user_id_created_at_id')
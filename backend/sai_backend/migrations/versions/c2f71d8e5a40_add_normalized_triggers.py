@@ -0,0 +1,94 @@
+"""Add triggers dictionary and record_triggers join table
+
+Revision ID: c2f71d8e5a40
+Revises: a4c8e61f2b93
+Create Date: 2026-10-18 18:05:44.120937
+
+"""
+from alembic import op
+import sqlalchemy as sa
+
+
+# revision identifiers, used by Alembic.
+revision = 'c2f71d8e5a40'
+down_revision = 'a4c8e61f2b93'
+branch_labels = None
+depends_on = None
+
+BACKFILL_BATCH = 5000
+TRIGGER_NAME_LENGTH = 100
+
+smoking_records = sa.table('smoking_records', sa.column('id', sa.Integer), sa.column('triggers', sa.Text))
+triggers = sa.table('triggers', sa.column('id', sa.Integer), sa.column('name', sa.String), sa.column('created_at', sa.DateTime))
+record_triggers = sa.table('record_triggers', sa.column('record_id', sa.Integer), sa.column('trigger_id', sa.Integer))
+
+
+def parse_triggers(text):
+    # Same normalization as app.services.tracking_service.parse_triggers
+    names = []
+    for part in (text or '').split(','):
+        name = ' '.join(part.split())[:TRIGGER_NAME_LENGTH]
+        if name and name not in names:
+            names.append(name)
+    return names
+
+
+def backfill():
+    """Parse the existing comma-separated triggers in id-ordered batches"""
+    connection = op.get_bind()
+    trigger_ids = {}
+    last_id = 0
+    while True:
+        rows = connection.execute(
+            sa.select(smoking_records.c.id, smoking_records.c.triggers).where(
+                smoking_records.c.id > last_id,
+                smoking_records.c.triggers.is_not(None)
+            ).order_by(smoking_records.c.id).limit(BACKFILL_BATCH)
+        ).all()
+        if not rows:
+            return
+        last_id = rows[-1][0]
+
+        parsed = [(record_id, parse_triggers(text)) for record_id, text in rows]
+        new_names = sorted({name for _, names in parsed for name in names} - set(trigger_ids))
+        if new_names:
+            connection.execute(triggers.insert().values(created_at=sa.func.now()), [{'name': name} for name in new_names])
+            trigger_ids.update(connection.execute(
+                sa.select(triggers.c.name, triggers.c.id).where(triggers.c.name.in_(new_names))
+            ).all())
+
+        links = [
+            {'record_id': record_id, 'trigger_id': trigger_ids[name]}
+            for record_id, names in parsed for name in names
+        ]
+        if links:
+            connection.execute(record_triggers.insert(), links)
+
+
+def upgrade():
+    op.create_table('triggers',
+    sa.Column('id', sa.Integer(), nullable=False),
+    sa.Column('name', sa.String(length=100), nullable=False),
+    sa.Column('created_at', sa.DateTime(), nullable=True),
+    sa.PrimaryKeyConstraint('id'),
+    sa.UniqueConstraint('name')
+    )
+    op.create_table('record_triggers',
+    sa.Column('record_id', sa.Integer(), nullable=False),
+    sa.Column('trigger_id', sa.Integer(), nullable=False),
+    sa.ForeignKeyConstraint(['record_id'], ['smoking_records.id'], ondelete='CASCADE'),
+    sa.ForeignKeyConstraint(['trigger_id'], ['triggers.id'], ondelete='CASCADE'),
+    sa.PrimaryKeyConstraint('record_id', 'trigger_id')
+    )
+    with op.batch_alter_table('record_triggers', schema=None) as batch_op:
+        batch_op.create_index('ix_record_triggers_trigger_id_record_id', ['trigger_id', 'record_id'], unique=False)
+
+    backfill()
+
+
+def downgrade():
+    with op.batch_alter_table('record_triggers', schema=None) as batch_op:
+        batch_op.drop_index('ix_record_triggers_trigger_id_record_id')
+
+    op.drop_table('record_triggers')
+    op.drop_table('triggers')
@@ -0,0 +1,31 @@
+"""Add user_trends precomputed trend payloads
+
+Revision ID: e93b05c7d218
+Revises: c2f71d8e5a40
+Create Date: 2026-10-18 19:27:03.551846
+
+"""
+from alembic import op
+import sqlalchemy as sa
+
+
+# revision identifiers, used by Alembic.
+revision = 'e93b05c7d218'
+down_revision = 'c2f71d8e5a40'
+branch_labels = None
+depends_on = None
+
+
+def upgrade():
+    op.create_table('user_trends',
+    sa.Column('user_id', sa.Integer(), nullable=False),
+    sa.Column('window_days', sa.Integer(), nullable=False),
+    sa.Column('payload', sa.JSON(), nullable=False),
+    sa.Column('computed_at', sa.DateTime(), nullable=False),
+    sa.ForeignKeyConstraint(['user_id'], ['users.id'], ondelete='CASCADE'),
+    sa.PrimaryKeyConstraint('user_id', 'window_days')
+    )
+
+
+def downgrade():
+    op.drop_table('user_trends')
@@ -0,0 +1,93 @@
+"""
+Shared fixtures for the test suite.
+
+Tests marked `postgres` exercise PostgreSQL behaviour (query plans, row and
+advisory locks, ON CONFLICT) against the database in DATABASE_URL, and are
+skipped unless it points at PostgreSQL. That database is migrated to head
+once per run; each test deletes the rows it creates, most of them through
+`create_users`.
+"""
+import os
+import pytest
+
+MIGRATIONS_DIR = os.path.join(os.path.dirname(os.path.dirname(os.path.abspath(__file__))), 'migrations')
+POSTGRES = os.environ.get('DATABASE_URL', '').startswith('postgresql')
+
+
+def pytest_configure(config):
+    config.addinivalue_line('markers', 'postgres: needs DATABASE_URL pointing at a PostgreSQL database')
+
+
+def pytest_collection_modifyitems(config, items):
+    if POSTGRES:
+        return
+    skip = pytest.mark.skip(reason='needs DATABASE_URL pointing at a PostgreSQL database')
+    for item in items:
+        if 'postgres' in item.keywords:
+            item.add_marker(skip)
+
+
+@pytest.fixture(scope='session')
+def make_app():
+    """create_app with the test config; every call builds its own engine and pool"""
+    # Imported here: building the engine needs the PostgreSQL driver
+    from app import create_app
+    from app.config.config import Config
+
+    class TestConfig(Config):
+        TESTING = True
+        SQLALCHEMY_ECHO = False
+
+    return lambda: create_app(TestConfig)
+
+
+@pytest.fixture(scope='session')
+def app(make_app):
+    from flask_migrate import upgrade
+    app = make_app()
+    with app.app_context():
+        upgrade(directory=MIGRATIONS_DIR)
+    return app
+
+
+@pytest.fixture
+def app_context(app):
+    with app.app_context():
+        yield
+
+
+@pytest.fixture
+def create_users(app_context):
+    """
+    Factory: create_users(prefix, count=1, cigarettes_per_day=None) inserts
+    users named prefix0..prefix<count - 1>, with a profile when
+    cigarettes_per_day is given, and returns their ids. Afterwards the users of
+    every prefix used are deleted, taking their rows with them (ON DELETE CASCADE).
+    """
+    from app.extensions import db
+    from app.models.user import User, UserProfile
+
+    prefixes = []
+
+    def delete_users(prefix):
+        User.query.filter(User.username.like(f'{prefix}%')).delete(synchronize_session=False)
+        db.session.commit()
+
+    def create(prefix, count=1, cigarettes_per_day=None):
+        delete_users(prefix)  # left over by an interrupted run
+        prefixes.append(prefix)
+        users = [
+            User(username=f'{prefix}{n}', email=f'{prefix}{n}@example.com', password_hash='x')
+            for n in range(count)
+        ]
+        db.session.add_all(users)
+        db.session.flush()
+        if cigarettes_per_day is not None:
+            db.session.add_all(UserProfile(user_id=user.id, cigarettes_per_day=cigarettes_per_day) for user in users)
+        db.session.commit()
+        return [user.id for user in users]
+
+    yield create
+    db.session.rollback()
+    for prefix in prefixes:
+        delete_users(prefix)
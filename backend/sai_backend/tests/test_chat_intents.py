@@ -0,0 +1,59 @@
+"""
+`flask sai export-chat-intents`: user messages labelled with the router's intent.
+"""
+import json
+from datetime import datetime, timedelta
+
+import pytest
+
+from app.extensions import db
+from app.models.chat import ChatMessage, ChatSession
+from app.utils.constants import SENDER_ASSISTANT, SENDER_USER
+
+pytestmark = pytest.mark.postgres
+
+# Conversation turns: (user text, router intent on the reply, reply flagged)
+TURNS = [
+    ('السلام عليكم', 'تحية', False),
+    ('كيفاش نحبس الدخان؟', 'smoking', False),
+    ('يا الحمار', 'سب', True),
+    ('واش الجو غدوة؟', None, False),
+    ('السلام عليكم ', 'greeting', False),
+    ('عطيني وصفة الكسكسي', 'غير ذي صلة', False),
+]
+
+
+@pytest.fixture
+def session_id(create_users):
+    [user_id] = create_users('test_chat_intents_')
+    session = ChatSession(user_id=user_id)
+    db.session.add(session)
+    db.session.flush()
+    # Old enough that the real chat history sorts after it
+    created_at = datetime(2000, 1, 1)
+    for text, intent, flagged in TURNS:
+        db.session.add_all([
+            ChatMessage(session_id=session.id, sender_type=SENDER_USER, message_text=text, created_at=created_at),
+            ChatMessage(session_id=session.id, sender_type=SENDER_ASSISTANT, message_text='...', flagged=flagged,
+                        message_metadata={'intent': intent}, created_at=created_at + timedelta(seconds=1)),
+        ])
+        created_at += timedelta(minutes=1)
+    # Unanswered last message
+    db.session.add(ChatMessage(session_id=session.id, sender_type=SENDER_USER, message_text='باي', created_at=created_at))
+    db.session.commit()
+    return session.id
+
+
+def test_export_writes_router_intents_as_json_lines(app, session_id, tmp_path):
+    output = tmp_path / 'chat_intents.jsonl'
+
+    result = app.test_cli_runner().invoke(args=['sai', 'export-chat-intents', '--output', str(output)])
+
+    assert result.exit_code == 0, result.output
+    exported = [json.loads(line) for line in output.read_text(encoding='utf-8').splitlines()]
+    texts = {text.strip() for text, _, _ in TURNS}
+    assert [line for line in exported if line['text'] in texts] == [
+        {'text': 'السلام عليكم', 'intent': 'greeting'},
+        {'text': 'كيفاش نحبس الدخان؟', 'intent': 'smoking'},
+        {'text': 'عطيني وصفة الكسكسي', 'intent': 'off_topic'},
+    ]
@@ -0,0 +1,87 @@
+"""
+Concurrency checks for check-ins.
+
+Fires POST /api/tracking/record requests for one user from parallel threads,
+released together, and asserts that every day ends up with exactly one row and
+that the profile counters and dashboard summary equal a full recompute. The
+counters rely on the profile row lock (SELECT ... FOR UPDATE).
+"""
+import threading
+from collections import Counter
+from concurrent.futures import ThreadPoolExecutor
+from datetime import date, timedelta
+
+import pytest
+
+from app.extensions import db
+from app.models.tracking import SmokingRecord
+from app.models.user import UserProfile, UserSummary
+from app.services.progress_service import recompute_progress
+from app.services.user_service import compute_summaries
+
+pytestmark = pytest.mark.postgres
+
+THREADS = 16
+DAYS = 12
+PROFILE_COUNTERS = ['current_streak_days', 'longest_streak_days', 'total_cigarettes_avoided', 'total_money_saved']
+
+
+def fire(app, payloads):
+    """POST every payload from its own thread, released together; returns the status codes"""
+    barrier = threading.Barrier(len(payloads))
+
+    def post(payload):
+        client = app.test_client()
+        barrier.wait()
+        return client.post('/api/tracking/record', json=payload).status_code
+
+    with ThreadPoolExecutor(max_workers=len(payloads)) as pool:
+        return Counter(pool.map(post, payloads))
+
+
+def profile_counters(user_id):
+    db.session.expire_all()
+    profile = UserProfile.query.filter_by(user_id=user_id).one()
+    return [int(getattr(profile, name) or 0) for name in PROFILE_COUNTERS]
+
+
+def assert_counters_match_recompute(user_id):
+    incremental = profile_counters(user_id)
+    summary = db.session.get(UserSummary, user_id)
+    expected_summary = compute_summaries(user_id, user_id)[user_id]
+    assert (summary.total_records, summary.total_cigarettes) == (
+        expected_summary['total_records'], expected_summary['total_cigarettes']
+    )
+    recompute_progress([user_id])
+    assert incremental == profile_counters(user_id), PROFILE_COUNTERS
+
+
+@pytest.fixture
+def user_id(create_users):
+    [user_id] = create_users('test_checkin_concurrency_', cigarettes_per_day=20)
+    return user_id
+
+
+def test_identical_checkins_store_one_row(app, user_id):
+    today = date.today()
+    payload = {'user_id': user_id, 'record_date': today.isoformat(), 'cigarettes_smoked': 0, 'triggers': 'coffee'}
+
+    statuses = fire(app, [payload] * THREADS)
+
+    assert statuses == {201: 1, 400: THREADS - 1}
+    assert SmokingRecord.query.filter_by(user_id=user_id, record_date=today).count() == 1
+    assert_counters_match_recompute(user_id)
+
+
+def test_distinct_day_checkins_are_all_counted(app, user_id):
+    today = date.today()
+    payloads = [
+        {'user_id': user_id, 'record_date': (today - timedelta(days=n)).isoformat(), 'cigarettes_smoked': n % 3}
+        for n in range(DAYS)
+    ]
+
+    statuses = fire(app, payloads)
+
+    assert statuses == {201: DAYS}
+    assert SmokingRecord.query.filter_by(user_id=user_id).count() == DAYS
+    assert_counters_match_recompute(user_id)
@@ -0,0 +1,35 @@
+"""
+Admin content routes and the (category, title) natural key.
+"""
+import pytest
+
+from app.extensions import db
+from app.models.content import EducationalContent
+
+pytestmark = pytest.mark.postgres
+
+CATEGORY = 'test_content_routes'
+
+
+@pytest.fixture
+def client(app, app_context):
+    EducationalContent.query.filter_by(category=CATEGORY).delete()
+    db.session.commit()
+    yield app.test_client()
+    db.session.rollback()
+    EducationalContent.query.filter_by(category=CATEGORY).delete()
+    db.session.commit()
+
+
+def test_duplicate_title_is_a_conflict(client):
+    assert client.post('/api/content/create', json={'title': 'first', 'category': CATEGORY}).status_code == 201
+    second = client.post('/api/content/create', json={'title': 'second', 'category': CATEGORY})
+    assert second.status_code == 201
+
+    created = client.post('/api/content/create', json={'title': 'first', 'category': CATEGORY})
+    renamed = client.put(f"/api/content/{second.get_json()['content']['id']}", json={'title': 'first'})
+
+    for response in (created, renamed):
+        assert response.status_code == 409
+        assert response.get_json()['field'] == 'title'
+    assert EducationalContent.query.filter_by(category=CATEGORY).count() == 2
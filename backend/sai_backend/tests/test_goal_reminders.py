@@ -0,0 +1,122 @@
+"""
+Exactly-once delivery of goal deadline reminders with several workers.
+
+Every seeded user has goals due today, one due tomorrow and one already
+notified. After each scenario every due goal must have produced exactly one
+notification, the others none, and the unread counters must match.
+"""
+import threading
+from collections import Counter
+from concurrent.futures import ThreadPoolExecutor
+from datetime import date, datetime, timedelta
+
+import pytest
+from sqlalchemy import func
+
+from app.extensions import db
+from app.models.goal import Goal
+from app.models.job import ScheduledJobRun
+from app.models.notification import Notification, NotificationCounter
+from app.scheduler import Scheduler
+from app.services.goal_service import send_due_goal_reminders
+from app.utils.constants import NOTIF_GOAL_REMINDER
+
+pytestmark = pytest.mark.postgres
+
+WORKERS = 8
+USERS = 50
+GOALS_PER_USER = 3
+ROUNDS = 3
+# Scheduler periods are claimed in scheduled_job_runs; use one no real run will ever have
+TEST_NOW = datetime(2000, 1, 1, 12, 0)
+
+
+def forget_test_period():
+    ScheduledJobRun.query.filter_by(job_name='goal-reminders', period_start=TEST_NOW.replace(minute=0)).delete()
+    db.session.commit()
+
+
+def run_together(count, work):
+    """Call work(n) from `count` threads released at the same moment"""
+    barrier = threading.Barrier(count)
+
+    def call(n):
+        barrier.wait()
+        return work(n)
+
+    with ThreadPoolExecutor(max_workers=count) as pool:
+        return list(pool.map(call, range(count)))
+
+
+def assert_notified_once(user_ids):
+    db.session.expire_all()
+    per_user = Counter(dict(
+        db.session.query(Notification.user_id, func.count()).filter(
+            Notification.user_id.in_(user_ids), Notification.notification_type == NOTIF_GOAL_REMINDER
+        ).group_by(Notification.user_id).all()
+    ))
+    assert {user_id: per_user[user_id] for user_id in user_ids} == dict.fromkeys(user_ids, GOALS_PER_USER)
+
+    unread = dict(
+        db.session.query(NotificationCounter.user_id, NotificationCounter.unread_count).filter(
+            NotificationCounter.user_id.in_(user_ids), NotificationCounter.notification_type == NOTIF_GOAL_REMINDER
+        ).all()
+    )
+    assert unread == dict.fromkeys(user_ids, GOALS_PER_USER)
+
+    today = date.today()
+    assert Goal.query.filter(Goal.user_id.in_(user_ids), Goal.target_date == today, Goal.notification_sent == False).count() == 0
+    assert Goal.query.filter(Goal.user_id.in_(user_ids), Goal.target_date > today, Goal.notification_sent == True).count() == 0
+
+
+@pytest.fixture
+def user_ids(create_users):
+    """Users with GOALS_PER_USER goals due today, one due tomorrow and one already notified"""
+    forget_test_period()
+    user_ids = create_users('test_goal_reminders_', count=USERS)
+    today = date.today()
+    goals = [(today, False)] * GOALS_PER_USER + [(today + timedelta(days=1), False), (today, True)]
+    db.session.add_all(
+        Goal(user_id=user_id, goal_type=f'goal_{i}', target_value=1, start_date=today,
+             target_date=target_date, notification_sent=sent)
+        for user_id in user_ids for i, (target_date, sent) in enumerate(goals)
+    )
+    db.session.commit()
+    yield user_ids
+    db.session.rollback()
+    forget_test_period()
+
+
+def test_concurrent_schedulers_notify_each_goal_once(make_app, user_ids):
+    # One app per worker: own engine and pool, like separate gunicorn workers
+    schedulers = [Scheduler(make_app(), job_names=['goal-reminders'], poll_seconds=1) for _ in range(WORKERS)]
+    leaders_per_round, sent = [], 0
+    try:
+        for _ in range(ROUNDS):
+            results = run_together(WORKERS, lambda n: schedulers[n].tick(TEST_NOW))
+            sent += sum(result.get('goal-reminders', 0) for result in results)
+            leaders_per_round.append(sum(scheduler.lock_connection is not None for scheduler in schedulers))
+    finally:
+        for scheduler in schedulers:
+            with scheduler.app.app_context():
+                scheduler.resign()
+                db.engine.dispose()
+
+    assert leaders_per_round == [1] * ROUNDS
+    assert sent == USERS * GOALS_PER_USER
+    assert_notified_once(user_ids)
+
+
+def test_split_brain_scans_notify_each_goal_once(app, user_ids):
+    # No leader election: every worker scans at once, in small chunks
+    chunk_size = max(1, USERS * GOALS_PER_USER // (WORKERS * 4))
+
+    def scan(n):
+        with app.app_context():
+            try:
+                return send_due_goal_reminders(chunk_size=chunk_size)
+            finally:
+                db.session.remove()
+
+    assert sum(run_together(WORKERS, scan)) == USERS * GOALS_PER_USER
+    assert_notified_once(user_ids)
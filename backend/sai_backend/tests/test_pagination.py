@@ -0,0 +1,59 @@
+"""
+OFFSET and keyset pages of a user's check-in list, with and without COUNT(*).
+"""
+from datetime import date, timedelta
+
+import pytest
+
+from app.extensions import db
+from app.models.tracking import SmokingRecord
+
+pytestmark = pytest.mark.postgres
+
+RECORDS = 45
+PER_PAGE = 20
+
+
+@pytest.fixture
+def user_id(create_users):
+    [user_id] = create_users('test_pagination_')
+    today = date.today()
+    db.session.add_all(
+        SmokingRecord(user_id=user_id, record_date=today - timedelta(days=day), cigarettes_smoked=0)
+        for day in range(RECORDS)
+    )
+    db.session.commit()
+    return user_id
+
+
+@pytest.mark.parametrize('include_total', ['true', 'false'])
+def test_offset_pages_report_has_next(app, user_id, include_total):
+    client = app.test_client()
+    dates, has_next = [], []
+    for page in (1, 2, 3):
+        body = client.get(
+            f'/api/tracking/records/{user_id}?page={page}&per_page={PER_PAGE}&include_total={include_total}'
+        ).get_json()
+        dates += [record['record_date'] for record in body['records']]
+        has_next.append(body['has_next'])
+        if include_total == 'true':
+            assert (body['total'], body['pages']) == (RECORDS, 3)
+        else:
+            assert (body['total'], body['pages']) == (None, None)
+
+    assert has_next == [True, True, False]
+    assert len(dates) == len(set(dates)) == RECORDS
+
+
+def test_cursor_pages_cover_every_record(app, user_id):
+    client = app.test_client()
+    dates, cursor = [], ''
+    while cursor is not None:
+        body = client.get(
+            f'/api/tracking/records/{user_id}?cursor={cursor}&per_page={PER_PAGE}&include_total=false'
+        ).get_json()
+        dates += [record['record_date'] for record in body['records']]
+        cursor = body['next_cursor']
+
+    assert dates == sorted(dates, reverse=True)
+    assert len(set(dates)) == RECORDS
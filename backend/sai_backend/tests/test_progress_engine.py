@@ -0,0 +1,87 @@
+"""
+Randomized check of the incremental streak / savings engine.
+
+Replays seeded random check-in inserts (including back-dated ones), edits and
+deletes through progress_service.update_progress - the path the tracking
+routes take - and after every step compares the profile counters with a
+pure-Python recomputation and with the bulk window-function recompute.
+"""
+import random
+from datetime import date, timedelta
+
+import pytest
+
+from app.extensions import db
+from app.models.tracking import SmokingRecord
+from app.models.user import UserProfile
+from app.services.progress_service import avoided, recompute_progress, streak_runs, update_progress
+from app.utils.constants import CIGARETTE_PRICE
+
+pytestmark = pytest.mark.postgres
+
+STEPS = 150
+DAYS = 60
+COUNTERS = ['current_streak_days', 'longest_streak_days', 'total_cigarettes_avoided', 'total_money_saved']
+
+
+def expected(cigarettes_per_day, records):
+    """Counters recomputed in Python from {record_date: cigarettes}"""
+    current, longest = streak_runs(sorted(records.items()))
+    total_avoided = sum(avoided(cigarettes_per_day, cigarettes) for cigarettes in records.values())
+    return [current, longest, total_avoided, total_avoided * CIGARETTE_PRICE]
+
+
+def counters(profile):
+    return [int(getattr(profile, name) or 0) for name in COUNTERS]
+
+
+def random_step(rng, profile, records, first_day):
+    """Apply one random insert / edit / delete; returns (operation, change)"""
+    cigarettes = 0 if rng.random() < 0.6 else rng.randint(1, 15)
+    operation = rng.choice(['insert', 'insert', 'edit', 'delete']) if records else 'insert'
+    if operation == 'insert':
+        free_days = [first_day + timedelta(days=n) for n in range(DAYS) if first_day + timedelta(days=n) not in records]
+        if not free_days:
+            operation = 'edit'
+        else:
+            record_date = rng.choice(free_days)
+            db.session.add(SmokingRecord(user_id=profile.user_id, record_date=record_date, cigarettes_smoked=cigarettes))
+            records[record_date] = cigarettes
+            return operation, (record_date, None, cigarettes)
+
+    record_date = rng.choice(sorted(records))
+    record = SmokingRecord.query.filter_by(user_id=profile.user_id, record_date=record_date).one()
+    old = records[record_date]
+    if operation == 'edit':
+        record.cigarettes_smoked = cigarettes
+        records[record_date] = cigarettes
+        return operation, (record_date, old, cigarettes)
+    db.session.delete(record)
+    del records[record_date]
+    return operation, (record_date, old, None)
+
+
+@pytest.fixture
+def profile(create_users):
+    [user_id] = create_users('test_progress_', cigarettes_per_day=15)
+    return UserProfile.query.filter_by(user_id=user_id).one()
+
+
+@pytest.mark.parametrize('seed', range(5))
+def test_incremental_matches_full_recompute(profile, seed):
+    rng = random.Random(seed)
+    profile.cigarettes_per_day = rng.randint(5, 25)
+    db.session.commit()
+    first_day = date.today() - timedelta(days=DAYS - 1)
+    records = {}
+
+    for step in range(STEPS):
+        operation, change = random_step(rng, profile, records, first_day)
+        update_progress(profile, [change])
+        db.session.commit()
+
+        want = expected(profile.cigarettes_per_day, records)
+        assert counters(profile) == want, f"incremental, step {step} {operation} {change}"
+        recompute_progress([profile.user_id])
+        assert counters(profile) == want, f"full recompute, step {step} {operation} {change}"
+        db.session.commit()
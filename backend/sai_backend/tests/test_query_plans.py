@@ -0,0 +1,206 @@
+"""
+EXPLAIN regression checks for the per-user hot route queries.
+
+Seeds many users, each with a year of check-ins, notifications, chat history,
+goals and content progress, refreshes the planner statistics and asserts that
+no hot query plans a sequential scan of the table it reads.
+"""
+import json
+from datetime import date, datetime, timedelta
+
+import pytest
+from sqlalchemy import desc, func, insert, select
+
+from app.extensions import db
+from app.models.chat import ChatSession, ChatMessage
+from app.models.content import EducationalContent, UserContentProgress
+from app.models.goal import Goal
+from app.models.notification import Notification
+from app.models.tracking import SmokingRecord
+from app.models.user import User
+from app.utils.constants import GOAL_STATUS_ACTIVE, GOAL_STATUS_COMPLETED, SENDER_ASSISTANT, SENDER_USER
+
+pytestmark = pytest.mark.postgres
+
+PREFIX = 'test_query_plans_'
+USERS = 300
+DAYS = 365
+INSERT_BATCH = 10000
+NOTIFICATIONS_PER_USER = 200
+SESSIONS_PER_USER = 5
+MESSAGES_PER_SESSION = 40
+GOALS_PER_USER = 10
+CONTENT_ITEMS = 20
+TABLES = ('users', 'smoking_records', 'notifications', 'chat_sessions', 'chat_messages',
+          'goals', 'user_content_progress', 'educational_content')
+
+# (name, table it reads, query builder taking (user_id, session_id, today, now))
+HOT_QUERIES = [
+    ('tracking history / statistics', 'smoking_records', lambda user_id, session_id, today, now: SmokingRecord.query.filter(
+        SmokingRecord.user_id == user_id,
+        SmokingRecord.record_date >= today - timedelta(days=30)
+    ).order_by(SmokingRecord.record_date)),
+    ('check-in exists', 'smoking_records', lambda user_id, session_id, today, now: SmokingRecord.query.filter_by(
+        user_id=user_id, record_date=today
+    )),
+    ('notification list', 'notifications', lambda user_id, session_id, today, now: Notification.query.filter_by(
+        user_id=user_id
+    ).order_by(desc(Notification.created_at)).limit(20)),
+    ('unread count', 'notifications', lambda user_id, session_id, today, now: db.session.query(func.count(Notification.id)).filter(
+        Notification.user_id == user_id,
+        Notification.is_read == False
+    )),
+    ('unread list', 'notifications', lambda user_id, session_id, today, now: Notification.query.filter_by(
+        user_id=user_id, is_read=False
+    ).order_by(desc(Notification.created_at)).limit(50)),
+    ('recent notifications', 'notifications', lambda user_id, session_id, today, now: Notification.query.filter(
+        Notification.user_id == user_id,
+        Notification.created_at >= now - timedelta(days=7)
+    ).order_by(desc(Notification.created_at))),
+    ('old read notifications', 'notifications', lambda user_id, session_id, today, now: Notification.query.filter(
+        Notification.user_id == user_id,
+        Notification.is_read == True,
+        Notification.created_at < now - timedelta(days=30)
+    )),
+    ('chat sessions', 'chat_sessions', lambda user_id, session_id, today, now: ChatSession.query.filter_by(
+        user_id=user_id
+    ).order_by(desc(ChatSession.last_message_at))),
+    ('chat history page', 'chat_messages', lambda user_id, session_id, today, now: ChatMessage.query.filter_by(
+        session_id=session_id
+    ).order_by(ChatMessage.created_at).limit(50)),
+    ('goals by status', 'goals', lambda user_id, session_id, today, now: db.session.query(func.count(Goal.id)).filter(
+        Goal.user_id == user_id,
+        Goal.status == GOAL_STATUS_ACTIVE
+    )),
+    ('due goal reminders', 'goals', lambda user_id, session_id, today, now: Goal.query.filter(
+        Goal.target_date == today,
+        Goal.notification_sent == False
+    )),
+    ('completed content', 'user_content_progress', lambda user_id, session_id, today, now: db.session.query(
+        func.count(UserContentProgress.id)
+    ).filter(
+        UserContentProgress.user_id == user_id,
+        UserContentProgress.completed == True
+    )),
+]
+
+
+def insert_batched(model, rows):
+    for start in range(0, len(rows), INSERT_BATCH):
+        db.session.execute(insert(model), rows[start:start + INSERT_BATCH])
+
+
+def seed():
+    """Insert the dataset and return the user ids"""
+    now = datetime.utcnow()
+    today = date.today()
+
+    insert_batched(User, [
+        {'username': f'{PREFIX}{i}', 'email': f'{PREFIX}{i}@example.com', 'password_hash': 'x'}
+        for i in range(USERS)
+    ])
+    insert_batched(EducationalContent, [
+        {'title': f'{PREFIX}{i}', 'category': PREFIX, 'is_published': True, 'created_at': now}
+        for i in range(CONTENT_ITEMS)
+    ])
+    user_ids = db.session.scalars(select(User.id).where(User.username.like(f'{PREFIX}%'))).all()
+    content_ids = db.session.scalars(
+        select(EducationalContent.id).where(EducationalContent.category == PREFIX)
+    ).all()
+
+    insert_batched(SmokingRecord, [
+        {'user_id': user_id, 'record_date': today - timedelta(days=day), 'cigarettes_smoked': day % 7, 'created_at': now}
+        for user_id in user_ids for day in range(DAYS)
+    ])
+    insert_batched(Notification, [
+        {
+            'user_id': user_id,
+            'notification_type': 'daily_reminder',
+            'title': PREFIX,
+            'message': PREFIX,
+            # Most notifications have been read; only the latest few are unread
+            'is_read': n >= 5,
+            'created_at': now - timedelta(hours=n * 6)
+        }
+        for user_id in user_ids for n in range(NOTIFICATIONS_PER_USER)
+    ])
+    insert_batched(Goal, [
+        {
+            'user_id': user_id,
+            'goal_type': 'reduce_cigarettes',
+            'target_value': 10,
+            'start_date': today - timedelta(days=90),
+            'target_date': today + timedelta(days=n - GOALS_PER_USER // 2),
+            'status': GOAL_STATUS_ACTIVE if n % 2 else GOAL_STATUS_COMPLETED,
+            'notification_sent': n < GOALS_PER_USER // 2,
+            'created_at': now
+        }
+        for user_id in user_ids for n in range(GOALS_PER_USER)
+    ])
+    insert_batched(UserContentProgress, [
+        {'user_id': user_id, 'content_id': content_id, 'completed': content_id % 3 == 0, 'last_accessed': now}
+        for user_id in user_ids for content_id in content_ids
+    ])
+    insert_batched(ChatSession, [
+        {'user_id': user_id, 'session_title': PREFIX, 'started_at': now, 'last_message_at': now - timedelta(days=n)}
+        for user_id in user_ids for n in range(SESSIONS_PER_USER)
+    ])
+    session_ids = db.session.scalars(select(ChatSession.id).where(ChatSession.user_id.in_(user_ids))).all()
+    insert_batched(ChatMessage, [
+        {
+            'session_id': session_id,
+            'sender_type': SENDER_USER if n % 2 == 0 else SENDER_ASSISTANT,
+            'message_text': PREFIX,
+            'created_at': now - timedelta(minutes=n)
+        }
+        for session_id in session_ids for n in range(MESSAGES_PER_SESSION)
+    ])
+    db.session.commit()
+    return user_ids
+
+
+def cleanup():
+    """Delete everything seed() inserted; users take their rows with them (ON DELETE CASCADE)"""
+    EducationalContent.query.filter(EducationalContent.category == PREFIX).delete(synchronize_session=False)
+    User.query.filter(User.username.like(f'{PREFIX}%')).delete(synchronize_session=False)
+    db.session.commit()
+
+
+def explain(query):
+    """Return (seq_scanned_tables, access_paths) from EXPLAIN (FORMAT JSON)"""
+    compiled = query.statement.compile(dialect=db.engine.dialect)
+    plan = db.session.connection().exec_driver_sql(f'EXPLAIN (FORMAT JSON) {compiled}', compiled.params).scalar()
+    plan = json.loads(plan) if isinstance(plan, str) else plan
+    seq_scans, paths = set(), []
+    nodes = [plan[0]['Plan']]
+    while nodes:
+        node = nodes.pop()
+        nodes.extend(node.get('Plans', []))
+        if 'Relation Name' not in node:
+            continue
+        if node['Node Type'] == 'Seq Scan':
+            seq_scans.add(node['Relation Name'])
+        paths.append(f"{node['Node Type']} {node.get('Index Name', node['Relation Name'])}")
+    return seq_scans, paths
+
+
+@pytest.fixture(scope='module')
+def hot_user(app):
+    """(user_id, session_id) of a user in the middle of the seeded dataset"""
+    with app.app_context():
+        cleanup()
+        user_ids = seed()
+        for table in TABLES:
+            db.session.execute(db.text(f'ANALYZE {table}'))
+        db.session.commit()
+        user_id = user_ids[len(user_ids) // 2]
+        session_id = db.session.scalar(select(ChatSession.id).where(ChatSession.user_id == user_id).limit(1))
+    yield user_id, session_id
+    with app.app_context():
+        cleanup()
+
+
+@pytest.mark.parametrize('name, table, build', HOT_QUERIES, ids=[name for name, _, _ in HOT_QUERIES])
+def test_hot_query_uses_an_index(app_context, hot_user, name, table, build):
+    seq_scans, paths = explain(build(*hot_user, date.today(), datetime.utcnow()))
+    assert table not in seq_scans, f"{name} scans {table} sequentially: {'; '.join(paths)}"
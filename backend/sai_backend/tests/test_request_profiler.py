@@ -0,0 +1,29 @@
+"""
+The X-Debug-Profile stack sampler: off unless enabled, bounded on disk.
+"""
+import pytest
+
+pytestmark = pytest.mark.postgres
+
+DEBUG_HEADERS = {'X-Debug-Profile': '1'}
+
+
+def test_debug_header_is_ignored_by_default(app, tmp_path, monkeypatch):
+    monkeypatch.setitem(app.config, 'PROFILE_DIR', str(tmp_path))
+
+    response = app.test_client().get('/api/health', headers=DEBUG_HEADERS)
+
+    assert 'X-Profile-File' not in response.headers
+    assert list(tmp_path.iterdir()) == []
+
+
+def test_profiles_are_rotated_and_named_without_paths(app, tmp_path, monkeypatch):
+    monkeypatch.setitem(app.config, 'PROFILER_DEBUG_HEADER', True)
+    monkeypatch.setitem(app.config, 'PROFILE_DIR', str(tmp_path))
+    monkeypatch.setitem(app.config, 'PROFILE_MAX_FILES', 3)
+    client = app.test_client()
+
+    names = [client.get('/api/health', headers=DEBUG_HEADERS).headers['X-Profile-File'] for _ in range(5)]
+
+    assert all('/' not in name and '\\' not in name for name in names)
+    assert sorted(path.name for path in tmp_path.iterdir()) == sorted(names[-3:])
@@ -0,0 +1,66 @@
+"""
+Dashboard summaries rebuilt by the bulk check-in path while a goal edit is in flight.
+"""
+import threading
+import time
+from concurrent.futures import ThreadPoolExecutor
+from datetime import date
+
+import pytest
+
+from app.extensions import db
+from app.models.goal import Goal
+from app.models.user import UserSummary
+from app.services.tracking_service import ingest_records
+from app.services.user_service import compute_summaries
+
+pytestmark = pytest.mark.postgres
+
+SUMMARY_FIELDS = ['total_records', 'total_cigarettes', 'active_goals', 'completed_goals']
+
+
+@pytest.fixture
+def user_id(create_users):
+    [user_id] = create_users('test_summaries_', cigarettes_per_day=20)
+    return user_id
+
+
+def in_app_context(app, work):
+    with app.app_context():
+        try:
+            work()
+        finally:
+            db.session.remove()
+
+
+def test_rebuild_keeps_a_concurrent_goal_delta(app, user_id):
+    goal_flushed, release_goal = threading.Event(), threading.Event()
+
+    def add_goal():
+        # The flush applies the goal delta and holds the summary row lock until commit
+        today = date.today()
+        db.session.add(Goal(user_id=user_id, goal_type='no_smoking', target_value=1, start_date=today, target_date=today))
+        db.session.flush()
+        goal_flushed.set()
+        release_goal.wait()
+        db.session.commit()
+
+    def ingest():
+        ingest_records(user_id, [{'record_date': date.today().isoformat(), 'cigarettes_smoked': 3}])
+        db.session.commit()
+
+    with ThreadPoolExecutor(max_workers=2) as pool:
+        goal_writer = pool.submit(in_app_context, app, add_goal)
+        assert goal_flushed.wait(10)
+        ingester = pool.submit(in_app_context, app, ingest)
+        # Let the rebuild reach the locked summary row before the goal commits
+        time.sleep(0.5)
+        release_goal.set()
+        goal_writer.result()
+        ingester.result()
+
+    db.session.expire_all()
+    summary = db.session.get(UserSummary, user_id)
+    expected = compute_summaries(user_id, user_id)[user_id]
+    assert [getattr(summary, field) for field in SUMMARY_FIELDS] == [expected[field] for field in SUMMARY_FIELDS]
+    assert (summary.total_records, summary.active_goals) == (1, 1)
@@ -0,0 +1,41 @@
+"""
+Invalidation of the precomputed trends in `user_trends`.
+"""
+from datetime import date, timedelta
+
+import pytest
+
+from app.extensions import db
+from app.models.tracking import SmokingRecord
+from app.services.trend_service import compute_trend_chunk, stored_trends
+
+pytestmark = pytest.mark.postgres
+
+
+@pytest.fixture
+def user_id(create_users):
+    [user_id] = create_users('test_trends_')
+    today = date.today()
+    db.session.add_all(
+        SmokingRecord(user_id=user_id, record_date=today - timedelta(days=day), cigarettes_smoked=day % 5, cravings_count=day % 3)
+        for day in range(10)
+    )
+    db.session.commit()
+    return user_id
+
+
+@pytest.mark.parametrize('field, value', [
+    ('cravings_count', 9),
+    ('cigarettes_smoked', 9),
+    ('mood', 'anxious'),
+])
+def test_record_edit_invalidates_stored_trends(user_id, field, value):
+    compute_trend_chunk(user_id, user_id)
+    db.session.commit()
+    assert stored_trends(user_id, 30) is not None
+
+    record = SmokingRecord.query.filter_by(user_id=user_id, record_date=date.today()).one()
+    setattr(record, field, value)
+    db.session.commit()
+
+    assert stored_trends(user_id, 30) is None
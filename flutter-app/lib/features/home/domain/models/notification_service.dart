@@ -3,17 +3,17 @@ import 'package:http/http.dart' as http;
 import '../../../../core/network/url_data.dart';
 
 class NotificationService {
-  // Get unread count using /unread endpoint
+  // Get unread count using /unread-count endpoint (served from the counter cache)
   static Future<int> getUnreadCount(int userId) async {
     try {
       final response = await http.get(
-        Uri.parse('$BASE_URL/api/notifications/unread?user_id=$userId'),
+        Uri.parse('$BASE_URL/api/notifications/unread-count?user_id=$userId'),
         headers: {'Content-Type': 'application/json'},
       );
 
       if (response.statusCode == 200) {
         final data = jsonDecode(response.body);
-        return data['count'] ?? 0; // Your API returns {'count': number}
+        return data['unread_count'] ?? 0; // API returns {'unread_count': number, 'unread_by_type': {...}}
       }
       return 0;
     } catch (e) {